@@ -915,6 +915,72 @@ class GeminiAnalyzer:
 | FDV/MC比 | {rt.get('fdv_mc_ratio', 'N/A')} | >3警惕未解锁代币 |
 | 7日涨跌幅 | {rt.get('change_7d', 'N/A')}% | 短期表现 |
 | 30日涨跌幅 | {rt.get('change_30d', 'N/A')}% | 中期表现 |
+"""
+        
+        # 添加订单簿流动性（深度、滑点、大单墙）
+        if 'liquidity' in context:
+            liq = context['liquidity']
+            depth_rows = "\n".join(
+                f"| ±{pct:g}% | {self._format_crypto_amount(d.get('bid'))} | {self._format_crypto_amount(d.get('ask'))} |"
+                for pct, d in liq.get('depth', {}).items()
+            )
+            slippage_text = "，".join(
+                f"{self._format_crypto_amount(n)}: 买 {s['buy']:.3f}% / 卖 {s['sell']:.3f}%"
+                if s.get('buy') is not None and s.get('sell') is not None
+                else f"{self._format_crypto_amount(n)}: 深度不足"
+                for n, s in liq.get('slippage', {}).items()
+            )
+            walls = [
+                f"{'买' if side == 'bid_walls' else '卖'}墙 ${w['price']:,.6g}（{self._format_crypto_amount(w['notional'])}，距中间价 {w['distance_pct']:.2f}%）"
+                for side in ('bid_walls', 'ask_walls') for w in liq.get(side, [])[:2]
+            ]
+            prompt += f"""
+### 订单簿流动性
+| 深度范围 | 买盘挂单额 | 卖盘挂单额 |
+|----------|------------|------------|
+{depth_rows}
+
+- 买卖价差：{liq.get('spread_pct', 0):.3f}%，±1% 买卖失衡：{liq.get('imbalance_1pct', 0):+.2f}（正数买盘更厚）
+- 市价成交滑点：{slippage_text or '无'}
+- 大单墙：{'；'.join(walls) if walls else '无'}
+"""
+        
+        # 添加永续合约数据（杠杆情绪）
+        if 'derivatives' in context:
+            deriv = context['derivatives']
+            funding = deriv.get('funding_rate') or 0
+            funding_note = "多头拥挤，警惕多杀多" if funding > 0.0005 else ("空头拥挤，警惕轧空" if funding < -0.0003 else "中性")
+            basis = deriv.get('basis_pct')
+            next_funding = (
+                time.strftime('%m-%d %H:%M', time.localtime(deriv['funding_time'] / 1000))
+                if deriv.get('funding_time') else '-'
+            )
+            prompt += f"""
+### 永续合约数据
+| 指标 | 数值 | 说明 |
+|------|------|------|
+| 资金费率 | {funding * 100:.4f}%（年化 {deriv.get('funding_rate_annualized') or 0:.1f}%） | {funding_note} |
+| 下次结算 | {next_funding} | |
+| 基差(标记-指数) | {f"{basis:+.3f}%" if basis is not None else 'N/A'} | 正数为合约溢价 |
+| 持仓价值 | {self._format_crypto_amount(deriv.get('open_interest_value'))} | |
+"""
+        
+        # 添加跨交易所行情（多交易所聚合）
+        if 'cross_exchange' in context:
+            cross = context['cross_exchange']
+            venue_rows = "\n".join(
+                f"| {venue} | ${v.get('price', 0):,.6g} | {cross.get('venue_spreads', {}).get(venue, 0):.3f}% | {self._format_crypto_volume(v.get('volume_24h'))} |"
+                for venue, v in cross.get('venues', {}).items()
+            )
+            prompt += f"""
+### 跨交易所行情
+| 交易所 | 价格 | 买卖价差 | 24h成交量 |
+|--------|------|----------|-----------|
+{venue_rows}
+
+- 成交量加权价格(VWAP)：${cross.get('vwap', 0):,.6g}
+- 最优买价：${cross.get('best_bid', 0):,.6g}（{cross.get('best_bid_venue', '-')}），最优卖价：${cross.get('best_ask', 0):,.6g}（{cross.get('best_ask_venue', '-')}）
+- 跨交易所价格离散度：{cross.get('dispersion_pct', 0):.3f}%（>0.5% 说明流动性割裂或存在异常，需谨慎）
 """
         
         # 添加链上指标数据（加密货币特有）
@@ -29,7 +29,7 @@ os.environ.setdefault('PYTHONUNBUFFERED', '1')
 # 导入分析模块
 try:
     from config import get_config
-    from data_provider.ccxt_fetcher import CCXTFetcher
+    from data_provider.ccxt_fetcher import get_shared_fetcher
     from crypto_analyzer import CryptoTrendAnalyzer
     from analyzer import GeminiAnalyzer
     MODULES_LOADED = True
@@ -100,7 +100,14 @@ def analyze_crypto(
         importlib.reload(config)
         
         # 初始化组件
-        fetcher = CCXTFetcher(exchange=exchange)
+        # 共享 Fetcher：多次 Gradio 请求复用同一实例，避免重复加载市场信息
+        app_config = config.get_config()
+        fetcher = get_shared_fetcher(
+            exchange=exchange,
+            markets_cache_dir=app_config.markets_cache_dir,
+            markets_ttl=app_config.markets_cache_ttl,
+            coalesce_window=app_config.request_coalesce_window,
+        )
         trend_analyzer = CryptoTrendAnalyzer()
         
         # 根据提供商初始化 AI 分析器
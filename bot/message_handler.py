@@ -68,7 +68,11 @@ class MessageHandler:
         "/clear": "清空对话历史",
         "/report": "获取最新市场报告",
         "/status": "查看系统状态",
+        "/price": "查询实时行情，如 /price BTC ETH",
     }
+
+    # /price 单次最多查询的交易对数量
+    MAX_PRICE_SYMBOLS = 20
     
     def __init__(
         self,
@@ -84,6 +88,7 @@ class MessageHandler:
         self.context_manager = context_manager or get_context_manager()
         self.image_generator = image_generator or get_image_generator()
         self._client: Optional[httpx.AsyncClient] = None
+        self._price_fetcher = None
     
     async def _get_client(self) -> httpx.AsyncClient:
         """获取 HTTP 客户端"""
@@ -101,6 +106,23 @@ class MessageHandler:
         """关闭客户端"""
         if self._client and not self._client.is_closed:
             await self._client.aclose()
+        if self._price_fetcher is not None:
+            await self._price_fetcher.close()
+            self._price_fetcher = None
+
+    def _get_price_fetcher(self):
+        """获取异步行情获取器（延迟创建，与 bot 共用事件循环）"""
+        if self._price_fetcher is None:
+            from config import get_config
+            from data_provider.ccxt_async_fetcher import AsyncCCXTFetcher
+
+            config = get_config()
+            self._price_fetcher = AsyncCCXTFetcher(
+                exchange=config.default_exchange,
+                markets_cache_dir=config.markets_cache_dir,
+                markets_ttl=config.markets_cache_ttl,
+            )
+        return self._price_fetcher
     
     def parse_message(self, content: str) -> Tuple[MessageType, str]:
         """解析消息类型和内容"""
@@ -159,6 +181,9 @@ class MessageHandler:
             return await self._cmd_report(message)
         elif command == "/status":
             return await self._cmd_status(message)
+        elif command == "/price":
+            args = parts[1] if len(parts) > 1 else ""
+            return await self._cmd_price(message, args)
         else:
             return BotResponse(text=f"未知命令: {command}\n使用 /help 查看可用命令")
     
@@ -246,6 +271,31 @@ class MessageHandler:
         
         return BotResponse(text=status_text)
     
+    async def _cmd_price(self, message: UserMessage, args: str) -> BotResponse:
+        """处理 /price 命令：并发查询多个交易对的实时行情"""
+        symbols = [s.upper() for s in re.split(r'[\s,，]+', args) if s]
+        if not symbols:
+            return BotResponse(text="用法: /price BTC ETH SOL")
+        symbols = list(dict.fromkeys(symbols))[:self.MAX_PRICE_SYMBOLS]
+
+        try:
+            fetcher = self._get_price_fetcher()
+            quotes = await fetcher.get_multiple_quotes(symbols)
+        except Exception as e:
+            logger.error(f"查询行情失败: {e}")
+            return BotResponse(error=f"查询行情失败: {str(e)}")
+
+        if not quotes:
+            return BotResponse(text=f"⚠️ 未查询到行情: {' '.join(symbols)}")
+
+        lines = ["💹 **实时行情**\n"]
+        for symbol, quote in quotes.items():
+            lines.append(
+                f"`{symbol}` {quote.price:,.6g}  "
+                f"({quote.change_24h:+.2f}%)"
+            )
+        return BotResponse(text="\n".join(lines))
+
     async def _handle_image_request(
         self,
         message: UserMessage,
@@ -187,6 +187,26 @@ class TelegramBot:
         response = await self.message_handler.handle_message(user_msg)
         await self._send_response(update, response)
     
+    async def _handle_price(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE
+    ):
+        """处理 /price 命令"""
+        if not self._check_access(update.effective_chat.id):
+            return
+        
+        args = " ".join(context.args) if context.args else ""
+        
+        user_msg = UserMessage(
+            user_id=str(update.effective_user.id),
+            platform="telegram",
+            content=f"/price {args}"
+        )
+        
+        response = await self.message_handler.handle_message(user_msg)
+        await self._send_response(update, response)
+    
     async def _handle_image(
         self,
         update: Update,
@@ -368,6 +388,9 @@ class TelegramBot:
         self.application.add_handler(
             CommandHandler("status", self._handle_status)
         )
+        self.application.add_handler(
+            CommandHandler("price", self._handle_price)
+        )
         self.application.add_handler(
             CommandHandler("image", self._handle_image)
         )
@@ -70,6 +70,9 @@ class Config:
     # 巨鲸监控阈值 (USD)
     whale_threshold_usd: float = 100000.0
     
+    # 拉取链上代币主交易池成交，统计巨鲸买卖笔数与净流入
+    trade_flow_enabled: bool = True
+    
     # K线周期 (用于趋势分析)
     default_timeframe: str = '4h'  # 1m, 5m, 15m, 1h, 4h, 1d
     
@@ -154,6 +157,43 @@ class Config:
     # === 数据库配置 ===
     database_path: str = "./data/crypto_analysis.db"
     
+    # 本地 K 线仓库：启用后 K 线按 (交易所, 交易对, 周期) 落库，每次只增量拉取新 K 线
+    kline_cache_enabled: bool = True
+    
+    # 交易所市场信息快照：冷启动时从磁盘读取，过期后重新在线加载
+    markets_cache_dir: str = "./data/markets"
+    markets_cache_ttl: int = 21600  # 秒（默认 6 小时）
+    
+    # WebSocket 行情流：启用后实时行情与最新 K 线从内存缓存读取，REST 兜底
+    quote_stream_enabled: bool = False
+    quote_stream_ws_url: str = ""  # 覆盖交易所 WebSocket 地址（留空使用官方地址）
+    quote_stream_max_age: float = 10.0  # 缓存有效期（秒）
+    
+    # 请求合并：相同请求并发时只发一次，完成后在窗口内复用结果（秒）
+    request_coalesce_window: float = 1.0
+    
+    # 按上游主机的共享限速配额，格式 "host=每秒速率/突发容量,..."（留空使用内置默认值）
+    rate_limits: str = ""
+    
+    # 多交易所故障切换：备用交易所（逗号分隔），主交易所超过该延迟分位数后发起对冲请求
+    fallback_exchanges: List[str] = field(default_factory=list)
+    hedge_percentile: float = 90.0
+    crypto_fetch_timeout: float = 15.0  # 单次行情/K线获取的总超时（秒）
+    
+    # 未收盘 K 线的最长复用时间（秒），同一根 K 线内不重复请求
+    kline_partial_max_age: float = 60.0
+    
+    # 永续合约数据（资金费率、持仓量、基差），持仓量与标记价格缓存时间（秒），资金费率缓存到下次结算
+    derivatives_enabled: bool = True
+    derivatives_cache_ttl: float = 300.0
+    
+    # 订单簿深度档数（用于流动性指标，0 表示不获取）
+    orderbook_limit: int = 100
+    
+    # 跨交易所聚合行情：逗号分隔的交易所列表（留空不启用），单个交易所超时（秒）
+    consolidated_exchanges: List[str] = field(default_factory=list)
+    consolidated_timeout: float = 5.0
+    
     # === 日志配置 ===
     log_dir: str = "./logs"  # 日志文件目录
     log_level: str = "INFO"  # 日志级别
@@ -165,6 +205,7 @@ class Config:
     # === 定时任务配置 ===
     schedule_enabled: bool = False            # 是否启用定时任务
     schedule_time: str = "08:00"              # 每日推送时间（HH:MM 格式）- 加密货币24小时交易，默认早8点
+    schedule_timeframe: str = ""              # 按该周期 K 线收盘执行（如 4h、1d），留空使用每日定时
     market_review_enabled: bool = True        # 是否启用市场复盘
     
     # === 流控配置（防封禁关键参数）===
@@ -174,6 +215,22 @@ class Config:
     # GeckoTerminal 请求间隔（秒）
     geckoterminal_request_delay: float = 0.5
     
+    # GeckoTerminal 响应缓存：按接口 TTL 缓存，内存预算（MB），是否持久化到数据库（重启后仍命中）
+    gecko_cache_enabled: bool = True
+    gecko_cache_max_mb: int = 32
+    gecko_cache_persist: bool = True
+    
+    # GeckoTerminal 并发请求线程数（并发请求共享同一限速配额）
+    gecko_max_concurrency: int = 4
+    
+    # 链上代币交易池索引有效期（秒），期间重复分析跳过交易池发现，0 表示不使用索引
+    pool_index_ttl: int = 86400
+    
+    # 新池监控：监控的链（空则使用偏好链）、轮询间隔（秒）、是否同时监控热门池
+    pool_watch_chains: List[str] = field(default_factory=list)
+    pool_watch_interval: float = 15.0
+    pool_watch_trending: bool = False
+    
     # Akshare 请求间隔范围（秒）- 保留兼容
     akshare_sleep_min: float = 2.0
     akshare_sleep_max: float = 5.0
@@ -241,6 +298,10 @@ class Config:
         chains_str = os.getenv('PREFERRED_CHAINS', 'sol,eth,bsc')
         preferred_chains = [c.strip() for c in chains_str.split(',') if c.strip()]
         
+        # 解析新池监控链列表
+        watch_chains_str = os.getenv('POOL_WATCH_CHAINS', '')
+        pool_watch_chains = [c.strip() for c in watch_chains_str.split(',') if c.strip()]
+        
         # 解析均线周期
         ma_str = os.getenv('MA_PERIODS', '7,25,99')
         ma_periods = [int(p.strip()) for p in ma_str.split(',') if p.strip().isdigit()]
@@ -269,6 +330,7 @@ class Config:
             preferred_chains=preferred_chains,
             bias_threshold=float(os.getenv('BIAS_THRESHOLD', '10.0')),
             whale_threshold_usd=float(os.getenv('WHALE_THRESHOLD_USD', '100000.0')),
+            trade_flow_enabled=os.getenv('TRADE_FLOW_ENABLED', 'true').lower() == 'true',
             default_timeframe=os.getenv('DEFAULT_TIMEFRAME', '4h'),
             ma_periods=ma_periods,
             
@@ -327,17 +389,47 @@ class Config:
             
             # 系统配置
             database_path=os.getenv('DATABASE_PATH', './data/crypto_analysis.db'),
+            kline_cache_enabled=os.getenv('KLINE_CACHE_ENABLED', 'true').lower() == 'true',
+            markets_cache_dir=os.getenv('MARKETS_CACHE_DIR', './data/markets'),
+            markets_cache_ttl=int(os.getenv('MARKETS_CACHE_TTL', '21600')),
+            quote_stream_enabled=os.getenv('QUOTE_STREAM_ENABLED', 'false').lower() == 'true',
+            quote_stream_ws_url=os.getenv('QUOTE_STREAM_WS_URL', ''),
+            quote_stream_max_age=float(os.getenv('QUOTE_STREAM_MAX_AGE', '10')),
+            request_coalesce_window=float(os.getenv('REQUEST_COALESCE_WINDOW', '1.0')),
+            rate_limits=os.getenv('RATE_LIMITS', ''),
+            fallback_exchanges=[
+                e.strip().lower() for e in os.getenv('FALLBACK_EXCHANGES', '').split(',') if e.strip()
+            ],
+            hedge_percentile=float(os.getenv('HEDGE_PERCENTILE', '90')),
+            crypto_fetch_timeout=float(os.getenv('CRYPTO_FETCH_TIMEOUT', '15')),
+            kline_partial_max_age=float(os.getenv('KLINE_PARTIAL_MAX_AGE', '60')),
+            derivatives_enabled=os.getenv('DERIVATIVES_ENABLED', 'true').lower() == 'true',
+            derivatives_cache_ttl=float(os.getenv('DERIVATIVES_CACHE_TTL', '300')),
+            orderbook_limit=int(os.getenv('ORDERBOOK_LIMIT', '100')),
+            consolidated_exchanges=[
+                e.strip().lower() for e in os.getenv('CONSOLIDATED_EXCHANGES', '').split(',') if e.strip()
+            ],
+            consolidated_timeout=float(os.getenv('CONSOLIDATED_TIMEOUT', '5')),
             log_dir=os.getenv('LOG_DIR', './logs'),
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
             max_workers=int(os.getenv('MAX_WORKERS', '3')),
             debug=os.getenv('DEBUG', 'false').lower() == 'true',
             schedule_enabled=os.getenv('SCHEDULE_ENABLED', 'false').lower() == 'true',
             schedule_time=os.getenv('SCHEDULE_TIME', '08:00'),
+            schedule_timeframe=os.getenv('SCHEDULE_TIMEFRAME', '').strip(),
             market_review_enabled=os.getenv('MARKET_REVIEW_ENABLED', 'true').lower() == 'true',
             
             # 流控配置
             ccxt_request_delay=float(os.getenv('CCXT_REQUEST_DELAY', '0.5')),
             geckoterminal_request_delay=float(os.getenv('GECKOTERMINAL_REQUEST_DELAY', '0.5')),
+            gecko_cache_enabled=os.getenv('GECKO_CACHE_ENABLED', 'true').lower() == 'true',
+            gecko_cache_max_mb=int(os.getenv('GECKO_CACHE_MAX_MB', '32')),
+            gecko_cache_persist=os.getenv('GECKO_CACHE_PERSIST', 'true').lower() == 'true',
+            gecko_max_concurrency=int(os.getenv('GECKO_MAX_CONCURRENCY', '4')),
+            pool_index_ttl=int(os.getenv('POOL_INDEX_TTL', '86400')),
+            pool_watch_chains=pool_watch_chains,
+            pool_watch_interval=float(os.getenv('POOL_WATCH_INTERVAL', '15')),
+            pool_watch_trending=os.getenv('POOL_WATCH_TRENDING', 'false').lower() == 'true',
         )
     
     @classmethod
@@ -7,18 +7,20 @@
 职责：
 1. 技术指标分析（MA均线、乖离率、趋势判断）
 2. 链上指标分析（巨鲸、持有人、流动性）
-3. 生成结构化分析数据供 AI 决策
+3. 永续合约指标分析（资金费率、基差、持仓量）
+4. 生成结构化分析数据供 AI 决策
 
 核心指标：
 - MA7/MA25/MA99 均线系统
 - 乖离率 BIAS（阈值 10% 适配加密货币波动性）
 - 24h 涨跌幅、成交量变化
 - 链上数据（Holder、巨鲸活动）
+- 永续合约资金费率、基差
 """
 
 import logging
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any, Tuple
 from enum import Enum
 
@@ -26,12 +28,20 @@ import pandas as pd
 import numpy as np
 
 from config import get_config
+from storage import get_db
 from data_provider import (
     CCXTFetcher,
+    get_shared_fetcher,
     GeckoTerminalFetcher,
     CryptoRealtimeQuote,
     CryptoKlineData,
     TokenInfo,
+    DerivativesFetcher,
+    DerivativesSnapshot,
+    get_shared_gecko_fetcher,
+    TradeFlowAggregator,
+    BatchIndicators,
+    compute_batch,
 )
 
 logger = logging.getLogger(__name__)
@@ -115,6 +125,19 @@ class OnchainIndicators:
     buy_sell_ratio: float = 1.0
 
 
+@dataclass
+class DerivativesIndicators:
+    """永续合约指标数据"""
+    contract: Optional[str] = None
+    funding_rate: Optional[float] = None             # 当期资金费率 %
+    funding_rate_annualized: Optional[float] = None  # 年化资金费率 %
+    basis_pct: Optional[float] = None                # 基差 (标记价格 - 指数价格) %
+    mark_price: Optional[float] = None
+    index_price: Optional[float] = None
+    open_interest: Optional[float] = None
+    open_interest_value: Optional[float] = None      # 持仓价值 (USD)
+
+
 @dataclass
 class CryptoAnalysisResult:
     """加密货币分析结果"""
@@ -143,6 +166,9 @@ class CryptoAnalysisResult:
     # 链上指标
     onchain: OnchainIndicators = field(default_factory=OnchainIndicators)
     
+    # 永续合约指标
+    derivatives: DerivativesIndicators = field(default_factory=DerivativesIndicators)
+    
     # 综合信号
     signal: SignalType = SignalType.WAIT
     signal_strength: int = 0  # 0-100
@@ -174,6 +200,7 @@ class CryptoAnalysisResult:
                 'ma25': self.technical.ma25,
                 'ma99': self.technical.ma99,
                 'bias_7': f"{self.technical.bias_7:.2f}%" if self.technical.bias_7 else None,
+                'rsi_14': round(self.technical.rsi_14, 2) if self.technical.rsi_14 is not None else None,
                 'trend': self.technical.trend_status.value,
                 'bias_level': self.technical.bias_level.value,
             },
@@ -183,9 +210,16 @@ class CryptoAnalysisResult:
                 'top10_pct': f"{self.onchain.top10_pct:.1f}%" if self.onchain.top10_pct else None,
                 'whale_buys_24h': self.onchain.whale_buys_24h,
                 'whale_sells_24h': self.onchain.whale_sells_24h,
+                'whale_net_flow': self.onchain.whale_net_flow,
                 'liquidity_usd': self.onchain.liquidity_usd,
                 'buy_sell_ratio': f"{self.onchain.buy_sell_ratio:.2f}",
             },
+            'derivatives': {
+                'funding_rate': f"{self.derivatives.funding_rate:.4f}%" if self.derivatives.funding_rate is not None else None,
+                'funding_rate_annualized': f"{self.derivatives.funding_rate_annualized:.1f}%" if self.derivatives.funding_rate_annualized is not None else None,
+                'basis_pct': f"{self.derivatives.basis_pct:+.3f}%" if self.derivatives.basis_pct is not None else None,
+                'open_interest_value': self.derivatives.open_interest_value,
+            },
             'signal': self.signal.value,
             'signal_strength': self.signal_strength,
             'signal_reasons': self.signal_reasons,
@@ -205,9 +239,15 @@ class CryptoAnalysisResult:
         if self.technical.bias_7 is not None:
             lines.append(f"📐 乖离率: {self.technical.bias_7:.2f}% ({self.technical.bias_level.value})")
         
+        if self.technical.rsi_14 is not None:
+            lines.append(f"📶 RSI(14): {self.technical.rsi_14:.1f}")
+        
         if self.onchain.holder_count:
             lines.append(f"👥 持有人: {self.onchain.holder_count:,}")
         
+        if self.derivatives.funding_rate is not None:
+            lines.append(f"💸 资金费率: {self.derivatives.funding_rate:.4f}%")
+        
         if self.signal_reasons:
             lines.append(f"💡 原因: {', '.join(self.signal_reasons[:3])}")
         
@@ -217,6 +257,48 @@ class CryptoAnalysisResult:
         return '\n'.join(lines)
 
 
+def assess_token_risks(token: TokenInfo, now: Optional[datetime] = None) -> List[str]:
+    """
+    链上代币风险规则（流动性、FDV/市值、买卖比、上线时间）
+
+    供单币分析和新池监控共用，返回风险提示列表。
+    """
+    warnings = []
+    
+    # 流动性检查
+    if token.liquidity_usd < 10000:
+        warnings.append("流动性极低 (<$10K)")
+    elif token.liquidity_usd < 50000:
+        warnings.append("流动性较低 (<$50K)")
+    
+    # FDV 检查
+    if token.fdv and token.market_cap:
+        fdv_ratio = token.fdv / token.market_cap if token.market_cap > 0 else 0
+        if fdv_ratio > 10:
+            warnings.append(f"FDV/市值比过高 ({fdv_ratio:.1f}x)")
+    
+    # 买卖比检查
+    if token.sells_24h > 0:
+        ratio = token.buys_24h / token.sells_24h
+        if ratio < 0.5:
+            warnings.append(f"卖盘压力大 (买卖比 {ratio:.2f})")
+    
+    # 新币检查（GeckoTerminal 返回带时区的 UTC 时间）
+    if token.pool_created_at:
+        created = token.pool_created_at
+        if now is None:
+            now = datetime.now(timezone.utc) if created.tzinfo else datetime.now()
+        elif created.tzinfo and now.tzinfo is None:
+            now = now.astimezone(timezone.utc)
+        age_hours = (now - created).total_seconds() / 3600
+        if age_hours < 24:
+            warnings.append("新币风险 (<24h)")
+        elif age_hours < 72:
+            warnings.append("新币 (<3天)")
+    
+    return warnings
+
+
 class CryptoTrendAnalyzer:
     """
     加密货币趋势分析器
@@ -236,10 +318,17 @@ class CryptoTrendAnalyzer:
     # 巨鲸阈值
     WHALE_THRESHOLD_USD = 100000.0
     
+    # 资金费率阈值（单期 %，常见 8 小时结算，基准费率 0.01%）
+    FUNDING_RATE_HIGH = 0.05       # 多头拥挤
+    FUNDING_RATE_LOW = -0.03       # 空头拥挤
+    # 基差阈值（%）
+    BASIS_THRESHOLD = 0.5
+    
     def __init__(
         self,
         ccxt_fetcher: Optional[CCXTFetcher] = None,
         gecko_fetcher: Optional[GeckoTerminalFetcher] = None,
+        derivatives_fetcher: Optional[DerivativesFetcher] = None,
     ):
         """
         初始化分析器
@@ -247,6 +336,7 @@ class CryptoTrendAnalyzer:
         Args:
             ccxt_fetcher: CCXT 数据获取器（交易所数据）
             gecko_fetcher: GeckoTerminal 数据获取器（链上数据）
+            derivatives_fetcher: 永续合约数据获取器（未提供且 DERIVATIVES_ENABLED 时基于 ccxt_fetcher 创建）
         """
         self.config = get_config()
         
@@ -254,25 +344,48 @@ class CryptoTrendAnalyzer:
         if ccxt_fetcher:
             self.ccxt = ccxt_fetcher
         else:
-            self.ccxt = CCXTFetcher(
+            self.ccxt = get_shared_fetcher(
                 exchange=self.config.default_exchange,
                 api_key=self.config.binance_api_key or '',
                 api_secret=self.config.binance_api_secret or '',
+                candle_store=get_db() if self.config.kline_cache_enabled else None,
+                markets_cache_dir=self.config.markets_cache_dir,
+                markets_ttl=self.config.markets_cache_ttl,
+                coalesce_window=self.config.request_coalesce_window,
             )
         
         if gecko_fetcher:
             self.gecko = gecko_fetcher
         else:
-            self.gecko = GeckoTerminalFetcher(
-                api_key=self.config.geckoterminal_api_key or ''
-            )
+            self.gecko = get_shared_gecko_fetcher(self.config)
+        
+        if derivatives_fetcher:
+            self.derivatives = derivatives_fetcher
+        elif self.config.derivatives_enabled:
+            self.derivatives = DerivativesFetcher(self.ccxt, ttl=self.config.derivatives_cache_ttl)
+        else:
+            self.derivatives = None
+        
+        # 主交易池成交流（巨鲸买卖），成交游标跨多次分析保留
+        self.trade_flow: Optional[TradeFlowAggregator] = None
+        if self.config.trade_flow_enabled:
+            self.trade_flow = TradeFlowAggregator(self.gecko, whale_threshold_usd=self.config.whale_threshold_usd)
         
         # 更新阈值
         self.BIAS_THRESHOLD_CAUTION = self.config.bias_threshold
+        self.WHALE_THRESHOLD_USD = self.config.whale_threshold_usd
         
         logger.info("CryptoTrendAnalyzer 初始化完成")
     
-    def analyze(self, identifier: str) -> Optional[CryptoAnalysisResult]:
+    def analyze(
+        self,
+        identifier: str,
+        kline: Optional[CryptoKlineData] = None,
+        quote: Optional[CryptoRealtimeQuote] = None,
+        derivatives: Optional[DerivativesSnapshot] = None,
+        token: Optional[TokenInfo] = None,
+        technical: Optional[TechnicalIndicators] = None,
+    ) -> Optional[CryptoAnalysisResult]:
         """
         分析加密货币
         
@@ -281,6 +394,11 @@ class CryptoTrendAnalyzer:
                 - "BTC/USDT" - 交易所代币
                 - "binance:ETH/USDT" - 指定交易所
                 - "sol:address" - 链上代币
+            kline: 已获取的K线（可选，交易所代币使用，避免重复请求）
+            quote: 已获取的实时行情（可选，同上）
+            derivatives: 已获取的永续合约数据（可选，同上）
+            token: 已获取的代币信息（可选，链上代币使用）
+            technical: 已批量计算的技术指标（可选，交易所代币使用）
         
         Returns:
             CryptoAnalysisResult 或 None
@@ -292,12 +410,17 @@ class CryptoTrendAnalyzer:
             if parsed['type'] == 'exchange':
                 return self._analyze_exchange_token(
                     symbol=parsed['symbol'],
-                    exchange=parsed['exchange']
+                    exchange=parsed['exchange'],
+                    kline=kline,
+                    quote=quote,
+                    derivatives=derivatives,
+                    technical=technical,
                 )
             else:
                 return self._analyze_onchain_token(
                     chain=parsed['chain'],
-                    address=parsed['address']
+                    address=parsed['address'],
+                    token=token,
                 )
                 
         except Exception as e:
@@ -307,22 +430,28 @@ class CryptoTrendAnalyzer:
     def _analyze_exchange_token(
         self,
         symbol: str,
-        exchange: str = 'binance'
+        exchange: str = 'binance',
+        kline: Optional[CryptoKlineData] = None,
+        quote: Optional[CryptoRealtimeQuote] = None,
+        derivatives: Optional[DerivativesSnapshot] = None,
+        technical: Optional[TechnicalIndicators] = None,
     ) -> Optional[CryptoAnalysisResult]:
-        """分析交易所代币"""
+        """分析交易所代币（可复用调用方已获取的行情、K线、技术指标和永续合约数据）"""
         try:
             # 获取实时行情
-            quote = self.ccxt.get_realtime_quote(symbol)
+            if quote is None:
+                quote = self.ccxt.get_realtime_quote(symbol)
             if not quote:
                 logger.warning(f"无法获取 {symbol} 行情")
                 return None
             
             # 获取K线数据
-            kline = self.ccxt.get_kline(
-                symbol,
-                timeframe=self.config.default_timeframe,
-                limit=100
-            )
+            if kline is None and technical is None:
+                kline = self.ccxt.get_kline(
+                    symbol,
+                    timeframe=self.config.default_timeframe,
+                    limit=100
+                )
             
             # 创建结果对象
             result = CryptoAnalysisResult(
@@ -336,9 +465,20 @@ class CryptoTrendAnalyzer:
             )
             
             # 计算技术指标
-            if kline and kline.data is not None and len(kline.data) > 0:
+            if technical is not None:
+                result.technical = technical
+            elif kline and kline.data is not None and len(kline.data) > 0:
                 self._calculate_technical_indicators(result, kline)
             
+            # 永续合约指标（批量预取后命中缓存）
+            if derivatives is None and self.derivatives is not None:
+                try:
+                    derivatives = self.derivatives.get(symbol)
+                except Exception as e:
+                    logger.debug(f"获取 {symbol} 永续合约数据失败: {e}")
+            if derivatives is not None:
+                self._fill_derivatives(result, derivatives)
+            
             # 生成交易信号
             self._generate_signal(result)
             
@@ -352,12 +492,13 @@ class CryptoTrendAnalyzer:
     def _analyze_onchain_token(
         self,
         chain: str,
-        address: str
+        address: str,
+        token: Optional[TokenInfo] = None,
     ) -> Optional[CryptoAnalysisResult]:
-        """分析链上代币"""
+        """分析链上代币（可复用批量获取的代币信息）"""
         try:
             # 获取代币信息
-            token_info = self.gecko.get_token_with_pools(chain, address)
+            token_info = self.gecko.get_token_with_pools(chain, address, token=token)
             if not token_info or not token_info.get('token'):
                 logger.warning(f"无法获取 {chain}:{address} 信息")
                 return None
@@ -389,15 +530,28 @@ class CryptoTrendAnalyzer:
             if token.sells_24h > 0:
                 result.onchain.buy_sell_ratio = token.buys_24h / token.sells_24h
             
-            # 获取K线数据
+            # 获取K线数据（主池来自索引时直接请求 K 线，主池失效则重新发现一次）
+            df = None
             if main_pool:
-                df = self.gecko.get_pool_ohlcv(
+                df = self.gecko.get_pool_history(  # 增量同步到本地 K 线仓库
                     chain,
                     main_pool.address,
                     timeframe='hour',
-                    limit=100,
-                    aggregate=4  # 4小时K线
+                    aggregate=4,  # 4小时K线
+                    bars=100
                 )
+                if (df is None or df.empty) and token_info.get('pools_from_index'):
+                    logger.info(f"{token.symbol} 索引中的主池无数据，重新发现交易池")
+                    refreshed = self.gecko.get_token_with_pools(chain, address, token=token, refresh_pools=True)
+                    main_pool = refreshed.get('main_pool') if refreshed else None
+                    if main_pool:
+                        df = self.gecko.get_pool_history(
+                            chain,
+                            main_pool.address,
+                            timeframe='hour',
+                            aggregate=4,
+                            bars=100
+                        )
                 
                 if df is not None and len(df) > 7:
                     # 创建临时 kline 对象用于指标计算
@@ -409,6 +563,10 @@ class CryptoTrendAnalyzer:
                     )
                     self._calculate_technical_indicators(result, kline)
             
+            # 主池成交流：巨鲸买卖笔数与净流入
+            if main_pool and self.trade_flow is not None:
+                self._fill_trade_flow(result, chain, main_pool.address)
+            
             # 链上风险检测
             self._check_onchain_risks(result, token)
             
@@ -422,67 +580,67 @@ class CryptoTrendAnalyzer:
             logger.error(f"分析链上代币 {chain}:{address} 失败: {e}")
             return None
     
+    def _fill_trade_flow(self, result: CryptoAnalysisResult, chain: str, pool_address: str):
+        """用主交易池 24h 成交流填充巨鲸指标"""
+        try:
+            flow = self.trade_flow.get_flow(chain, pool_address, '24h')
+        except Exception as e:
+            logger.debug(f"{result.symbol} 获取成交流失败: {e}")
+            return
+        
+        result.onchain.whale_buys_24h = flow.whale_buys
+        result.onchain.whale_sells_24h = flow.whale_sells
+        result.onchain.whale_net_flow = flow.whale_net_flow_usd
+    
     def _calculate_technical_indicators(
         self,
         result: CryptoAnalysisResult,
         kline: CryptoKlineData
     ):
         """计算技术指标"""
-        df = kline.data
-        
-        if len(df) < 7:
-            return
-        
-        current_price = df['close'].iloc[-1]
-        
-        # 计算均线
-        ma7 = df['close'].rolling(window=7).mean()
-        result.technical.ma7 = ma7.iloc[-1]
-        
-        if len(df) >= 25:
-            ma25 = df['close'].rolling(window=25).mean()
-            result.technical.ma25 = ma25.iloc[-1]
-        
-        if len(df) >= 99:
-            ma99 = df['close'].rolling(window=99).mean()
-            result.technical.ma99 = ma99.iloc[-1]
+        result.technical = self._technical_from_batch(compute_batch([kline.data]), 0)
+    
+    def _technical_from_batch(self, batch: BatchIndicators, i: int) -> TechnicalIndicators:
+        """由批量指标结果的第 i 行生成技术指标（K 线不足 7 根时保持默认值）"""
+        tech = TechnicalIndicators()
+        if batch.lengths[i] < 7:
+            return tech
         
-        # 计算乖离率
-        if result.technical.ma7 and result.technical.ma7 > 0:
-            result.technical.bias_7 = (
-                (current_price - result.technical.ma7) / result.technical.ma7
-            ) * 100
+        row = batch.row(i)
         
-        if result.technical.ma25 and result.technical.ma25 > 0:
-            result.technical.bias_25 = (
-                (current_price - result.technical.ma25) / result.technical.ma25
-            ) * 100
+        # 均线与乖离率
+        tech.ma7 = row['ma7']
+        tech.ma25 = row['ma25']
+        tech.ma99 = row['ma99']
+        tech.bias_7 = row['bias_7']
+        tech.bias_25 = row['bias_25']
         
         # 判断趋势状态
-        result.technical.trend_status = self._determine_trend(
-            result.technical.ma7,
-            result.technical.ma25,
-            result.technical.ma99
-        )
+        tech.trend_status = self._determine_trend(tech.ma7, tech.ma25, tech.ma99)
         
         # 判断乖离率级别
-        result.technical.bias_level = self._determine_bias_level(
-            result.technical.bias_7
-        )
-        
-        # 计算成交量变化
-        if len(df) >= 2:
-            vol_today = df['volume'].iloc[-1]
-            vol_yesterday = df['volume'].iloc[-2]
-            if vol_yesterday > 0:
-                result.technical.volume_change_24h = (
-                    (vol_today - vol_yesterday) / vol_yesterday
-                ) * 100
-        
-        # 计算支撑阻力位
-        if len(df) >= 20:
-            result.technical.support_level = df['low'].iloc[-20:].min()
-            result.technical.resistance_level = df['high'].iloc[-20:].max()
+        tech.bias_level = self._determine_bias_level(tech.bias_7)
+        
+        # RSI(14)（K 线不足 15 根时为 None）
+        tech.rsi_14 = row['rsi_14']
+        
+        # 成交量变化与支撑阻力位
+        tech.volume_change_24h = row['volume_change']
+        tech.support_level = row['support']
+        tech.resistance_level = row['resistance']
+        return tech
+    
+    def _fill_derivatives(self, result: CryptoAnalysisResult, snap: DerivativesSnapshot):
+        """填充永续合约指标（资金费率转为 %）"""
+        deriv = result.derivatives
+        deriv.contract = snap.contract
+        deriv.funding_rate = snap.funding_rate * 100 if snap.funding_rate is not None else None
+        deriv.funding_rate_annualized = snap.funding_rate_annualized
+        deriv.basis_pct = snap.basis_pct
+        deriv.mark_price = snap.mark_price
+        deriv.index_price = snap.index_price
+        deriv.open_interest = snap.open_interest
+        deriv.open_interest_value = snap.open_interest_value
     
     def _determine_trend(
         self,
@@ -531,35 +689,7 @@ class CryptoTrendAnalyzer:
         token: TokenInfo
     ):
         """检查链上风险"""
-        warnings = []
-        
-        # 流动性检查
-        if token.liquidity_usd < 10000:
-            warnings.append("流动性极低 (<$10K)")
-        elif token.liquidity_usd < 50000:
-            warnings.append("流动性较低 (<$50K)")
-        
-        # FDV 检查
-        if token.fdv and token.market_cap:
-            fdv_ratio = token.fdv / token.market_cap if token.market_cap > 0 else 0
-            if fdv_ratio > 10:
-                warnings.append(f"FDV/市值比过高 ({fdv_ratio:.1f}x)")
-        
-        # 买卖比检查
-        if token.sells_24h > 0:
-            ratio = token.buys_24h / token.sells_24h
-            if ratio < 0.5:
-                warnings.append(f"卖盘压力大 (买卖比 {ratio:.2f})")
-        
-        # 新币检查
-        if token.pool_created_at:
-            age_hours = (datetime.now() - token.pool_created_at).total_seconds() / 3600
-            if age_hours < 24:
-                warnings.append("新币风险 (<24h)")
-            elif age_hours < 72:
-                warnings.append("新币 (<3天)")
-        
-        result.risk_warnings = warnings
+        result.risk_warnings = assess_token_risks(token)
     
     def _generate_signal(self, result: CryptoAnalysisResult):
         """生成交易信号"""
@@ -634,6 +764,33 @@ class CryptoTrendAnalyzer:
                 score -= 5
                 reasons.append("持有人减少")
         
+        # 巨鲸净流入/流出（至少一方有巨鲸成交）
+        if onchain.whale_buys_24h or onchain.whale_sells_24h:
+            if onchain.whale_net_flow > self.WHALE_THRESHOLD_USD:
+                score += 5
+                reasons.append("巨鲸净买入")
+            elif onchain.whale_net_flow < -self.WHALE_THRESHOLD_USD:
+                score -= 5
+                reasons.append("巨鲸净卖出")
+        
+        # === 永续合约评分（资金费率、基差反映杠杆拥挤程度）===
+        deriv = result.derivatives
+        if deriv.funding_rate is not None:
+            if deriv.funding_rate > self.FUNDING_RATE_HIGH:
+                score -= 5
+                reasons.append("资金费率过高")
+            elif deriv.funding_rate < self.FUNDING_RATE_LOW:
+                score += 5
+                reasons.append("负资金费率")
+        
+        if deriv.basis_pct is not None:
+            if deriv.basis_pct > self.BASIS_THRESHOLD:
+                score -= 3
+                reasons.append("合约溢价")
+            elif deriv.basis_pct < -self.BASIS_THRESHOLD:
+                score += 3
+                reasons.append("合约贴水")
+        
         # === 风险扣分 ===
         score -= len(result.risk_warnings) * 5
         
@@ -679,9 +836,57 @@ class CryptoTrendAnalyzer:
         """
         results = []
         
+        exchange_symbols = []
+        onchain_by_chain: Dict[str, List[str]] = {}
+        for identifier in identifiers:
+            try:
+                parsed = self.config.parse_crypto_identifier(identifier)
+            except Exception:
+                continue
+            if parsed['type'] == 'exchange':
+                exchange_symbols.append(parsed['symbol'])
+            else:
+                onchain_by_chain.setdefault(parsed['chain'], []).append(parsed['address'])
+        
+        # 永续合约数据一次批量获取，逐个分析时命中缓存
+        if self.derivatives is not None and exchange_symbols:
+            try:
+                self.derivatives.refresh(exchange_symbols)
+            except Exception as e:
+                logger.warning(f"批量获取永续合约数据失败: {e}")
+        
+        # 交易所代币：先获取全部 K 线，再一次向量化计算所有币种的技术指标
+        technicals: Dict[str, TechnicalIndicators] = {}
+        if exchange_symbols:
+            klines = {}
+            for symbol in dict.fromkeys(exchange_symbols):
+                try:
+                    kline = self.ccxt.get_kline(symbol, timeframe=self.config.default_timeframe, limit=100)
+                except Exception as e:
+                    logger.warning(f"获取 {symbol} K线失败: {e}")
+                    continue
+                if kline and kline.data is not None and len(kline.data) > 0:
+                    klines[symbol] = kline
+            batch = compute_batch([kline.data for kline in klines.values()])
+            for i, symbol in enumerate(klines):
+                technicals[symbol] = self._technical_from_batch(batch, i)
+        
+        # 链上代币信息按链批量获取（每次请求最多 30 个地址）
+        tokens: Dict[Tuple[str, str], TokenInfo] = {}
+        for chain, addresses in onchain_by_chain.items():
+            for address, token in self.gecko.get_tokens_info(chain, addresses).items():
+                tokens[(chain, address)] = token
+        
         for identifier in identifiers:
             try:
-                result = self.analyze(identifier)
+                token = None
+                technical = None
+                parsed = self.config.parse_crypto_identifier(identifier)
+                if parsed['type'] == 'exchange':
+                    technical = technicals.get(parsed['symbol'])
+                elif tokens:
+                    token = tokens.get((parsed['chain'], parsed['address']))
+                result = self.analyze(identifier, token=token, technical=technical)
                 if result:
                     results.append(result)
             except Exception as e:
@@ -21,7 +21,15 @@ import requests
 import pandas as pd
 
 from config import get_config
-from data_provider import CCXTFetcher, GeckoTerminalFetcher, CryptoRealtimeQuote, TokenInfo
+from data_provider import (
+    CCXTFetcher,
+    GeckoTerminalFetcher,
+    CryptoRealtimeQuote,
+    TokenInfo,
+    get_shared_fetcher,
+    get_shared_gecko_fetcher,
+)
+from data_provider.rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -144,18 +152,19 @@ class CryptoMarketAnalyzer:
         if ccxt_fetcher:
             self.ccxt = ccxt_fetcher
         else:
-            self.ccxt = CCXTFetcher(
+            self.ccxt = get_shared_fetcher(
                 exchange=self.config.default_exchange,
                 api_key=self.config.binance_api_key or '',
                 api_secret=self.config.binance_api_secret or '',
+                markets_cache_dir=self.config.markets_cache_dir,
+                markets_ttl=self.config.markets_cache_ttl,
+                coalesce_window=self.config.request_coalesce_window,
             )
         
         if gecko_fetcher:
             self.gecko = gecko_fetcher
         else:
-            self.gecko = GeckoTerminalFetcher(
-                api_key=self.config.geckoterminal_api_key or ''
-            )
+            self.gecko = get_shared_gecko_fetcher(self.config)
         
         self.session = requests.Session()
         self.session.headers.update({
@@ -198,6 +207,7 @@ class CryptoMarketAnalyzer:
             logger.info("[市场] 获取全球市场数据...")
             
             url = f"{self.COINGECKO_API}/global"
+            get_rate_limiter(url).acquire()
             response = self.session.get(url, timeout=30)
             
             if response.status_code == 200:
@@ -246,6 +256,7 @@ class CryptoMarketAnalyzer:
         try:
             logger.info("[市场] 获取恐慌贪婪指数...")
             
+            get_rate_limiter(self.FEAR_GREED_API).acquire()
             response = self.session.get(self.FEAR_GREED_API, timeout=30)
             
             if response.status_code == 200:
@@ -277,10 +288,15 @@ class CryptoMarketAnalyzer:
         try:
             logger.info("[市场] 获取涨跌榜...")
             
-            # 使用 CCXT 获取
-            gainers = self.ccxt.get_top_gainers(limit=10)
-            losers = self.ccxt.get_top_losers(limit=10)
-            volume = self.ccxt.get_top_volume(limit=10)
+            # 一次拉取全市场快照，三个榜单共用
+            snapshot = self.ccxt.get_ticker_snapshot('USDT')
+            if snapshot is None:
+                logger.warning("[市场] 无法获取全市场行情快照")
+                return
+            
+            gainers = snapshot.top_quotes('change_24h', 10)
+            losers = snapshot.top_quotes('change_24h', 10, ascending=True)
+            volume = snapshot.top_quotes('quote_volume_24h', 10)
             
             overview.top_gainers = [
                 {
@@ -309,9 +325,9 @@ class CryptoMarketAnalyzer:
                 for v in volume
             ]
             
-            # 统计涨跌家数
-            overview.gainers_count = len([g for g in gainers if g.change_24h > 0])
-            overview.losers_count = len([l for l in losers if l.change_24h < 0])
+            # 统计全市场涨跌家数
+            overview.gainers_count = snapshot.count_where('change_24h', '>', 0)
+            overview.losers_count = snapshot.count_where('change_24h', '<', 0)
             
             logger.info(f"[市场] 涨幅榜前3: {[g['symbol'] for g in overview.top_gainers[:3]]}")
             logger.info(f"[市场] 跌幅榜前3: {[l['symbol'] for l in overview.top_losers[:3]]}")
@@ -324,10 +340,9 @@ class CryptoMarketAnalyzer:
         try:
             logger.info("[市场] 获取链上热门代币...")
             
-            # 获取各链热门
-            for chain in self.config.preferred_chains[:3]:
-                tokens = self.gecko.get_trending_tokens(chain, limit=5)
-                
+            # 获取各链热门（各链并发请求，共享限速配额）
+            trending = self.gecko.get_multi_chain_trending(self.config.preferred_chains[:3], limit_per_chain=5)
+            for chain, tokens in trending.items():
                 for token in tokens:
                     overview.trending_tokens.append({
                         'chain': chain,
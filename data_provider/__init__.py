@@ -11,6 +11,7 @@
 
 === 加密货币数据源 ===
 1. CCXTFetcher - 交易所现货数据 (Binance, OKX 等)
+   AsyncCCXTFetcher - 同接口的 asyncio 版本
 2. GeckoTerminalFetcher - 链上 DEX 数据 (100+ 条链)
 
 === A股数据源 (保留兼容) ===
@@ -28,15 +29,49 @@ from .ccxt_fetcher import (
     CCXTFetcher,
     CryptoRealtimeQuote,
     CryptoKlineData,
+    TickerSnapshot,
+    get_shared_fetcher,
+    clear_shared_fetchers,
     create_binance_fetcher,
     create_okx_fetcher,
 )
+from .symbol_index import SymbolIndex
+from .quote_table import QuoteTable, QuoteMapping
+from .orderbook import OrderBook
+from .fetch_planner import KlineFetchPlanner
+from .derivatives import DerivativesFetcher, DerivativesSnapshot
+from .response_cache import ResponseCache, get_shared_response_cache
+from .crypto_manager import CryptoFetcherManager
+from .consolidated_quotes import (
+    ConsolidatedQuoteService,
+    ConsolidatedQuote,
+    VenueHealth,
+)
+from .ccxt_async_fetcher import (
+    AsyncCCXTFetcher,
+    create_async_okx_fetcher,
+)
 from .geckoterminal_fetcher import (
     GeckoTerminalFetcher,
     TokenInfo,
     PoolInfo,
     OnchainMetrics,
     create_geckoterminal_fetcher,
+    get_shared_gecko_fetcher,
+)
+from .pool_watcher import NewPoolWatcher, NewPoolEvent
+from .trade_flow import TradeFlowAggregator, TradeFlow
+from .indicators import (
+    BatchIndicators,
+    compute_batch,
+    rolling_mean,
+    ema,
+    rsi,
+    macd,
+    bollinger,
+    atr,
+    obv,
+    vwap,
 )
 
 # A股数据源 (保留兼容)
@@ -55,13 +90,46 @@ __all__ = [
     'CCXTFetcher',
     'CryptoRealtimeQuote',
     'CryptoKlineData',
+    'TickerSnapshot',
+    'SymbolIndex',
+    'QuoteTable',
+    'QuoteMapping',
+    'OrderBook',
+    'KlineFetchPlanner',
+    'DerivativesFetcher',
+    'DerivativesSnapshot',
+    'ResponseCache',
+    'get_shared_response_cache',
+    'CryptoFetcherManager',
+    'ConsolidatedQuoteService',
+    'ConsolidatedQuote',
+    'VenueHealth',
+    'get_shared_fetcher',
+    'clear_shared_fetchers',
     'create_binance_fetcher',
     'create_okx_fetcher',
+    'AsyncCCXTFetcher',
+    'create_async_okx_fetcher',
     'GeckoTerminalFetcher',
     'TokenInfo',
     'PoolInfo',
     'OnchainMetrics',
     'create_geckoterminal_fetcher',
+    'get_shared_gecko_fetcher',
+    'NewPoolWatcher',
+    'NewPoolEvent',
+    'TradeFlowAggregator',
+    'TradeFlow',
+    'BatchIndicators',
+    'compute_batch',
+    'rolling_mean',
+    'ema',
+    'rsi',
+    'macd',
+    'bollinger',
+    'atr',
+    'obv',
+    'vwap',
     
     # A股数据源
     'EfinanceFetcher',
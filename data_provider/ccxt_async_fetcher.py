@@ -0,0 +1,345 @@
+"""
+CCXT 异步数据获取模块 - 基于 ccxt.async_support
+
+与 CCXTFetcher 接口一致（get_kline, get_realtime_quote,
+get_multiple_quotes, get_orderbook），但全部为协程：
+- 单个事件循环内可同时发起数百个交易对的请求
+- 每个交易所一个信号量限制同时在途的请求数，请求速率与同步版本共用主机令牌桶
+- 适合 bot/ 等本身基于 asyncio 的调用方，无需再经过线程池
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple, Mapping
+
+from .ccxt_fetcher import (
+    CCXTParsingMixin,
+    CryptoRealtimeQuote,
+    CryptoKlineData,
+)
+from .quote_table import QuoteTable
+
+try:
+    import ccxt.async_support as ccxt_async
+    CCXT_ASYNC_AVAILABLE = True
+except ImportError:
+    CCXT_ASYNC_AVAILABLE = False
+    ccxt_async = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCCXTFetcher(CCXTParsingMixin):
+    """
+    CCXT 异步交易所数据获取器
+
+    使用示例：
+        async with AsyncCCXTFetcher(exchange='okx') as fetcher:
+            quote = await fetcher.get_realtime_quote('BTC/USDT')
+
+            # 并发获取多个交易对K线
+            klines = await asyncio.gather(*[
+                fetcher.get_kline(s, timeframe='4h') for s in symbols
+            ])
+    """
+
+    # 数据源名称
+    name: str = "AsyncCCXTFetcher"
+
+    # 每个交易所默认允许同时在途的请求数
+    DEFAULT_MAX_CONCURRENCY = 20
+
+    # 按 (交易所, 事件循环) 共享的信号量：同一交易所的所有实例共用并发额度
+    _semaphores: Dict[Tuple[str, int], asyncio.Semaphore] = {}
+
+    def __init__(
+        self,
+        exchange: str = 'binance',
+        api_key: str = '',
+        api_secret: str = '',
+        passphrase: str = '',  # OKX 需要
+        sandbox: bool = False,
+        timeout: int = 30000,
+        rate_limit: bool = True,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        markets_cache_dir: Optional[str] = None,
+        markets_ttl: int = 21600,
+    ):
+        """
+        初始化异步 CCXT Fetcher
+
+        Args:
+            exchange: 交易所名称 (binance, okx, bybit 等)
+            api_key: API Key（可选，公开数据不需要）
+            api_secret: API Secret
+            passphrase: API Passphrase (OKX需要)
+            sandbox: 是否使用沙盒/测试网
+            timeout: 请求超时时间 (ms)
+            rate_limit: 是否启用速率限制
+            max_concurrency: 该交易所同时在途的最大请求数
+            markets_cache_dir: 市场信息快照目录（可选，与 CCXTFetcher 共用）
+            markets_ttl: 市场信息快照有效期 (秒)
+        """
+        if not CCXT_ASYNC_AVAILABLE:
+            raise ImportError("ccxt 库未安装，请运行: pip install ccxt")
+
+        self.exchange_id = exchange.lower()
+        if self.exchange_id not in self.SUPPORTED_EXCHANGES:
+            logger.warning(f"交易所 {exchange} 可能不受完全支持")
+
+        exchange_class = getattr(ccxt_async, self.exchange_id, None)
+        if exchange_class is None:
+            raise ValueError(f"不支持的交易所: {exchange}")
+
+        config = self._build_exchange_config(
+            api_key, api_secret, passphrase, sandbox, timeout, rate_limit
+        )
+        self.exchange = exchange_class(config)
+        # 与同步 CCXTFetcher 共用同一主机的令牌桶
+        self._init_rate_limiter(rate_limit)
+
+        self.max_concurrency = max_concurrency
+
+        # 缓存市场信息
+        self._markets_loaded = False
+        self._markets_cache: Dict[str, Any] = {}
+        self._markets_lock: Optional[asyncio.Lock] = None
+        self.markets_cache_dir = markets_cache_dir
+        self.markets_ttl = markets_ttl
+
+        logger.info(f"AsyncCCXTFetcher 初始化完成: {self.exchange_id}")
+
+    async def __aenter__(self) -> 'AsyncCCXTFetcher':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """关闭底层 HTTP 会话（ccxt 异步实例必须显式关闭）"""
+        try:
+            await self.exchange.close()
+        except Exception as e:
+            logger.debug(f"关闭 {self.exchange_id} 连接失败: {e}")
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """获取当前事件循环下该交易所的并发信号量"""
+        key = (self.exchange_id, id(asyncio.get_running_loop()))
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[key] = semaphore
+        return semaphore
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        """在交易所信号量与共享令牌桶约束下调用 ccxt 异步方法"""
+        async with self._semaphore():
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(self._request_cost(method, args))
+            return await getattr(self.exchange, method)(*args, **kwargs)
+
+    async def _ensure_markets_loaded(self):
+        """确保市场信息已加载（协程安全，快照逻辑与 CCXTFetcher 一致）"""
+        if self._markets_loaded:
+            return
+
+        if self._markets_lock is None:
+            self._markets_lock = asyncio.Lock()
+
+        async with self._markets_lock:
+            if self._markets_loaded:
+                return
+
+            try:
+                if not self._load_markets_snapshot():
+                    await self._call('load_markets')
+                    self._save_markets_snapshot()
+                self._set_markets(self.exchange.markets)
+                self._markets_loaded = True
+                logger.info(f"已加载 {len(self._markets_cache)} 个交易对")
+            except Exception as e:
+                logger.error(f"加载市场信息失败: {e}")
+                raise
+
+    async def get_kline(
+        self,
+        symbol: str,
+        timeframe: str = '1d',
+        limit: int = 100,
+        since: Optional[datetime] = None,
+    ) -> Optional[CryptoKlineData]:
+        """
+        获取K线数据
+
+        Args:
+            symbol: 交易对 (BTC/USDT)
+            timeframe: 时间周期 (1m, 5m, 15m, 1h, 4h, 1d)
+            limit: 获取数量
+            since: 起始时间
+
+        Returns:
+            CryptoKlineData 或 None
+        """
+        try:
+            await self._ensure_markets_loaded()
+
+            symbol = self._normalize_symbol(symbol)
+
+            if symbol not in self._markets_cache:
+                logger.warning(f"交易对 {symbol} 不存在于 {self.exchange_id}")
+                return None
+
+            tf = self.TIMEFRAME_MAP.get(timeframe, timeframe)
+            since_ts = int(since.timestamp() * 1000) if since else None
+
+            ohlcv = await self._call('fetch_ohlcv', symbol, timeframe=tf, since=since_ts, limit=limit)
+            df = self._ohlcv_to_df(ohlcv)
+
+            if df is None or df.empty:
+                logger.warning(f"未获取到 {symbol} 的K线数据")
+                return None
+
+            kline_data = CryptoKlineData(
+                symbol=symbol,
+                exchange=self.exchange_id,
+                timeframe=timeframe,
+                data=df
+            )
+            self._calculate_indicators(kline_data)
+
+            logger.debug(f"获取 {symbol} K线数据成功: {len(df)} 条")
+            return kline_data
+
+        except Exception as e:
+            logger.error(f"获取K线数据失败 {symbol}: {e}")
+            return None
+
+    async def get_realtime_quote(self, symbol: str) -> Optional[CryptoRealtimeQuote]:
+        """
+        获取实时行情
+
+        Args:
+            symbol: 交易对 (BTC/USDT)
+
+        Returns:
+            CryptoRealtimeQuote 或 None
+        """
+        try:
+            await self._ensure_markets_loaded()
+
+            symbol = self._normalize_symbol(symbol)
+
+            if symbol not in self._markets_cache:
+                logger.warning(f"交易对 {symbol} 不存在于 {self.exchange_id}")
+                return None
+
+            ticker = await self._call('fetch_ticker', symbol)
+            if not ticker:
+                return None
+
+            return self._ticker_to_quote(symbol, ticker)
+
+        except Exception as e:
+            logger.error(f"获取实时行情失败 {symbol}: {e}")
+            return None
+
+    async def get_multiple_quotes(self, symbols: List[str]) -> Mapping[str, CryptoRealtimeQuote]:
+        """
+        批量获取多个交易对的行情
+
+        优先使用 fetch_tickers 一次拉取；不支持时并发逐个获取（受信号量限制）
+
+        Args:
+            symbols: 交易对列表
+
+        Returns:
+            {symbol: CryptoRealtimeQuote}；批量接口可用时为按需物化的只读映射
+        """
+        results = {}
+
+        try:
+            await self._ensure_markets_loaded()
+
+            normalized_symbols = [self._normalize_symbol(s) for s in symbols]
+
+            if self.exchange.has.get('fetchTickers', False):
+                try:
+                    tickers = await self._call('fetch_tickers', normalized_symbols)
+                    return QuoteTable.from_tickers(
+                        self.exchange_id, tickers, self._markets_cache
+                    ).as_mapping()
+                except Exception as e:
+                    logger.warning(f"批量获取行情失败，回退到并发单个获取: {e}")
+
+            quotes = await asyncio.gather(
+                *[self.get_realtime_quote(s) for s in normalized_symbols]
+            )
+            for symbol, quote in zip(normalized_symbols, quotes):
+                if quote:
+                    results[symbol] = quote
+
+        except Exception as e:
+            logger.error(f"批量获取行情失败: {e}")
+
+        return results
+
+    async def get_orderbook(
+        self,
+        symbol: str,
+        limit: int = 20
+    ) -> Optional[Dict[str, Any]]:
+        """
+        获取订单簿深度（返回结构与 CCXTFetcher.get_orderbook 一致）
+
+        Args:
+            symbol: 交易对
+            limit: 深度数量
+        """
+        try:
+            await self._ensure_markets_loaded()
+            symbol = self._normalize_symbol(symbol)
+
+            if symbol not in self._markets_cache:
+                logger.warning(f"交易对 {symbol} 不存在")
+                return None
+
+            orderbook = await self._call('fetch_order_book', symbol, limit)
+
+            return self._summarize_orderbook(symbol, orderbook)
+
+        except Exception as e:
+            logger.error(f"获取订单簿失败 {symbol}: {e}")
+            return None
+
+    async def get_klines_batch(
+        self,
+        symbols: List[str],
+        timeframe: str = '1d',
+        limit: int = 100,
+    ) -> Dict[str, CryptoKlineData]:
+        """
+        并发获取多个交易对的K线
+
+        Returns:
+            Dict[symbol, CryptoKlineData]（获取失败的交易对不包含在内）
+        """
+        klines = await asyncio.gather(
+            *[self.get_kline(s, timeframe=timeframe, limit=limit) for s in symbols]
+        )
+        return {k.symbol: k for k in klines if k is not None}
+
+
+# 便捷函数
+def create_async_okx_fetcher(
+    api_key: str = '',
+    api_secret: str = '',
+    passphrase: str = ''
+) -> AsyncCCXTFetcher:
+    """创建 OKX 异步数据获取器"""
+    return AsyncCCXTFetcher(
+        exchange='okx',
+        api_key=api_key,
+        api_secret=api_secret,
+        passphrase=passphrase
+    )
@@ -14,8 +14,13 @@ CCXT 数据获取模块 - 支持多交易所现货数据
 
 import logging
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Mapping
+import hashlib
+import json
+import threading
 import time
 
 import pandas as pd
@@ -28,6 +33,15 @@ except ImportError:
     CCXT_AVAILABLE = False
     ccxt = None
 
+from .resample import resample_ohlcv, pick_base_timeframe, bars_needed
+from .singleflight import SingleFlight
+from .rate_limiter import get_rate_limiter, host_of
+from .symbol_index import SymbolIndex
+from .quote_table import QuoteTable
+from .orderbook import OrderBook
+from .fetch_planner import KlineFetchPlanner
+from .indicators import rolling_mean, rsi
+
 # 注意：CCXTFetcher 不继承 BaseFetcher，因为它是为加密货币设计的，
 # 有完全不同的接口（get_kline, get_realtime_quote 等）
 
@@ -72,31 +86,25 @@ class CryptoKlineData:
     ma25: Optional[pd.Series] = None
     ma99: Optional[pd.Series] = None
     bias_7: Optional[float] = None   # 7日乖离率
+    rsi_14: Optional[float] = None   # RSI(14)
     trend_status: str = ""           # 趋势状态
 
 
-class CCXTFetcher:
+# 全市场 ticker 快照即列式行情表（保留旧名称兼容）
+TickerSnapshot = QuoteTable
+
+
+class CCXTParsingMixin:
     """
-    CCXT 统一交易所数据获取器
-    
-    支持功能：
-    1. 多交易所切换 (Binance, OKX 等)
-    2. K线数据获取
-    3. 实时行情获取
-    4. 订单簿深度
+    CCXT 数据解析公共逻辑
     
-    使用示例：
-        fetcher = CCXTFetcher(exchange='binance')
-        
-        # 获取K线
-        kline = fetcher.get_kline('BTC/USDT', timeframe='1h', limit=100)
-        
-        # 获取实时行情
-        quote = fetcher.get_realtime_quote('BTC/USDT')
+    同步 CCXTFetcher 与异步 AsyncCCXTFetcher 共用：
+    交易对标准化、OHLCV/ticker/订单簿解析、均线指标、市场信息快照。
+    使用方需提供 exchange、exchange_id、_markets_cache、markets_cache_dir、markets_ttl 属性。
     """
     
-    # 数据源名称
-    name: str = "CCXTFetcher"
+    # 交易对索引（市场信息加载后构建）
+    _symbol_index: Optional[SymbolIndex] = None
     
     # 支持的交易所
     SUPPORTED_EXCHANGES = ['binance', 'okx', 'bybit', 'gate', 'kucoin', 'huobi']
@@ -113,45 +121,32 @@ class CCXTFetcher:
         '1w': '1w',
     }
     
-    def __init__(
+    # 各接口的限速权重（默认 1）
+    REQUEST_COSTS = {
+        'fetch_tickers_all': 5.0,
+        'load_markets': 5.0,
+    }
+    
+    def _build_exchange_config(
         self,
-        exchange: str = 'binance',
-        api_key: str = '',
-        api_secret: str = '',
-        passphrase: str = '',  # OKX 需要
-        sandbox: bool = False,
-        timeout: int = 30000,
-        rate_limit: bool = True,
-    ):
+        api_key: str,
+        api_secret: str,
+        passphrase: str,
+        sandbox: bool,
+        timeout: int,
+        rate_limit: bool
+    ) -> Dict[str, Any]:
         """
-        初始化 CCXT Fetcher
+        构建 ccxt 交易所实例参数
         
-        Args:
-            exchange: 交易所名称 (binance, okx, bybit 等)
-            api_key: API Key（可选，公开数据不需要）
-            api_secret: API Secret
-            passphrase: API Passphrase (OKX需要)
-            sandbox: 是否使用沙盒/测试网
-            timeout: 请求超时时间 (ms)
-            rate_limit: 是否启用速率限制
+        ccxt 自带限速只对单个实例生效，这里关闭它，
+        统一由 rate_limiter 中按主机共享的令牌桶限速（见 _init_rate_limiter）
         """
-        if not CCXT_AVAILABLE:
-            raise ImportError("ccxt 库未安装，请运行: pip install ccxt")
-        
-        self.exchange_id = exchange.lower()
-        if self.exchange_id not in self.SUPPORTED_EXCHANGES:
-            logger.warning(f"交易所 {exchange} 可能不受完全支持")
-        
-        # 创建交易所实例
-        exchange_class = getattr(ccxt, self.exchange_id, None)
-        if exchange_class is None:
-            raise ValueError(f"不支持的交易所: {exchange}")
-        
         config = {
             'apiKey': api_key if api_key else None,
             'secret': api_secret if api_secret else None,
             'timeout': timeout,
-            'enableRateLimit': rate_limit,
+            'enableRateLimit': False,
             'options': {
                 'defaultType': 'spot',  # 默认现货
             }
@@ -165,25 +160,88 @@ class CCXTFetcher:
         if sandbox:
             config['sandbox'] = True
         
-        self.exchange = exchange_class(config)
+        return config
+    
+    def _exchange_host(self) -> str:
+        """交易所 REST 接口主机名（限速器注册键）"""
+        hostname = getattr(self.exchange, 'hostname', None)
+        if hostname:
+            return hostname
+        pending = [self.exchange.urls.get('api')]
+        while pending:
+            item = pending.pop(0)
+            if isinstance(item, str):
+                return host_of(self.exchange.implode_hostname(item))
+            if isinstance(item, dict):
+                pending.extend(item.values())
+        return self.exchange_id
+    
+    def _init_rate_limiter(self, rate_limit: bool):
+        """按交易所主机获取共享令牌桶；默认速率取自 ccxt 的 rateLimit (ms/请求)"""
+        self.rate_limiter = None
+        if not rate_limit:
+            return
+        interval_ms = self.exchange.rateLimit or 100
+        rate = 1000 / interval_ms
+        self.rate_limiter = get_rate_limiter(self._exchange_host(), rate=rate, burst=rate)
+    
+    def _request_cost(self, method: str, args: Tuple) -> float:
+        """请求权重：全市场 fetch_tickers 等重接口消耗更多令牌"""
+        if method == 'fetch_tickers' and not args:
+            return self.REQUEST_COSTS.get('fetch_tickers_all', 1.0)
+        return self.REQUEST_COSTS.get(method, 1.0)
+    
+    def _markets_snapshot_path(self) -> Optional[Path]:
+        """市场信息快照文件路径"""
+        if not self.markets_cache_dir:
+            return None
+        return Path(self.markets_cache_dir) / f"{self.exchange_id}.json"
+    
+    def _load_markets_snapshot(self) -> bool:
+        """从磁盘快照恢复市场信息，快照不存在或已过期时返回 False"""
+        path = self._markets_snapshot_path()
+        if path is None or not path.exists():
+            return False
         
-        # 缓存市场信息
-        self._markets_loaded = False
-        self._markets_cache: Dict[str, Any] = {}
+        age = time.time() - path.stat().st_mtime
+        if age > self.markets_ttl:
+            logger.debug(f"市场信息快照已过期 ({age:.0f}s): {path}")
+            return False
         
-        logger.info(f"CCXTFetcher 初始化完成: {self.exchange_id}")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.exchange.set_markets(snapshot['markets'], snapshot.get('currencies'))
+            logger.info(f"从快照恢复市场信息: {path}")
+            return True
+        except Exception as e:
+            logger.warning(f"读取市场信息快照失败，改为在线加载: {e}")
+            return False
     
-    def _ensure_markets_loaded(self):
-        """确保市场信息已加载"""
-        if not self._markets_loaded:
-            try:
-                self.exchange.load_markets()
-                self._markets_cache = self.exchange.markets
-                self._markets_loaded = True
-                logger.info(f"已加载 {len(self._markets_cache)} 个交易对")
-            except Exception as e:
-                logger.error(f"加载市场信息失败: {e}")
-                raise
+    def _save_markets_snapshot(self):
+        """将市场信息写入磁盘快照（先写临时文件再替换，避免并发读到半截文件）"""
+        path = self._markets_snapshot_path()
+        if path is None:
+            return
+        
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'markets': self.exchange.markets, 'currencies': self.exchange.currencies},
+                    f,
+                    default=str,
+                )
+            tmp_path.replace(path)
+            logger.debug(f"市场信息快照已保存: {path}")
+        except Exception as e:
+            logger.warning(f"保存市场信息快照失败: {e}")
+    
+    def _set_markets(self, markets: Dict[str, Any]):
+        """更新市场信息缓存并重建交易对索引"""
+        self._symbol_index = SymbolIndex(markets)
+        self._markets_cache = markets
     
     def _normalize_symbol(self, symbol: str) -> str:
         """
@@ -192,11 +250,20 @@ class CCXTFetcher:
         支持的格式：
         - BTC/USDT (标准格式)
         - BTCUSDT (无斜杠)
+        - BTC-USDT / BTC_USDT (交易所原生 id)
         - btc/usdt (小写)
+        - BTC (仅币种，默认 USDT 计价)
+        
+        市场信息已加载时通过交易对索引精确解析，否则按常见计价货币后缀猜测。
         
         Returns:
             标准化的交易对 (BTC/USDT)
         """
+        if self._symbol_index is not None:
+            resolved = self._symbol_index.resolve(symbol)
+            if resolved:
+                return resolved
+        
         symbol = symbol.upper().strip()
         
         # 如果已经是标准格式
@@ -216,85 +283,27 @@ class CCXTFetcher:
         # 默认添加 /USDT
         return f"{symbol}/USDT"
     
-    def get_kline(
-        self,
-        symbol: str,
-        timeframe: str = '1d',
-        limit: int = 100,
-        since: Optional[datetime] = None,
-    ) -> Optional[CryptoKlineData]:
-        """
-        获取K线数据
-        
-        Args:
-            symbol: 交易对 (BTC/USDT)
-            timeframe: 时间周期 (1m, 5m, 15m, 1h, 4h, 1d)
-            limit: 获取数量
-            since: 起始时间
-            
-        Returns:
-            CryptoKlineData 或 None
-        """
-        try:
-            self._ensure_markets_loaded()
-            
-            symbol = self._normalize_symbol(symbol)
-            
-            if symbol not in self._markets_cache:
-                logger.warning(f"交易对 {symbol} 不存在于 {self.exchange_id}")
-                return None
-            
-            # 转换时间周期
-            tf = self.TIMEFRAME_MAP.get(timeframe, timeframe)
-            
-            # 转换起始时间
-            since_ts = None
-            if since:
-                since_ts = int(since.timestamp() * 1000)
-            
-            # 获取OHLCV数据
-            ohlcv = self.exchange.fetch_ohlcv(
-                symbol,
-                timeframe=tf,
-                since=since_ts,
-                limit=limit
-            )
-            
-            if not ohlcv:
-                logger.warning(f"未获取到 {symbol} 的K线数据")
-                return None
-            
-            # 转换为DataFrame
-            df = pd.DataFrame(
-                ohlcv,
-                columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-            )
-            
-            # 转换时间戳
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            
-            # 确保数据类型
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # 创建结果对象
-            kline_data = CryptoKlineData(
-                symbol=symbol,
-                exchange=self.exchange_id,
-                timeframe=timeframe,
-                data=df
-            )
-            
-            # 计算技术指标
-            self._calculate_indicators(kline_data)
-            
-            logger.info(f"获取 {symbol} K线数据成功: {len(df)} 条")
-            return kline_data
-            
-        except Exception as e:
-            logger.error(f"获取K线数据失败 {symbol}: {e}")
+    @staticmethod
+    def _ohlcv_to_df(ohlcv: List[List[Any]]) -> Optional[pd.DataFrame]:
+        """将 ccxt OHLCV 列表转换为以 timestamp 为索引的 DataFrame"""
+        if not ohlcv:
             return None
+        
+        # 转换为DataFrame
+        df = pd.DataFrame(
+            ohlcv,
+            columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
+        )
+        
+        # 转换时间戳
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df.set_index('timestamp', inplace=True)
+        
+        # 确保数据类型
+        for col in ['open', 'high', 'low', 'close', 'volume']:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        
+        return df
     
     def _calculate_indicators(self, kline_data: CryptoKlineData):
         """计算技术指标"""
@@ -303,14 +312,20 @@ class CCXTFetcher:
         if len(df) < 7:
             return
         
-        # 计算均线
-        kline_data.ma7 = df['close'].rolling(window=7).mean()
+        # 计算均线（同一份收盘价数组上用累加和计算）
+        close = df['close'].to_numpy(dtype=np.float64)
+        kline_data.ma7 = pd.Series(rolling_mean(close, 7), index=df.index)
         
         if len(df) >= 25:
-            kline_data.ma25 = df['close'].rolling(window=25).mean()
+            kline_data.ma25 = pd.Series(rolling_mean(close, 25), index=df.index)
         
         if len(df) >= 99:
-            kline_data.ma99 = df['close'].rolling(window=99).mean()
+            kline_data.ma99 = pd.Series(rolling_mean(close, 99), index=df.index)
+        
+        # RSI(14)
+        last_rsi = rsi(close)[-1]
+        if not np.isnan(last_rsi):
+            kline_data.rsi_14 = float(last_rsi)
         
         # 计算7日乖离率
         if kline_data.ma7 is not None and len(kline_data.ma7) > 0:
@@ -350,118 +365,6 @@ class CCXTFetcher:
         else:
             return "数据不足"
     
-    def get_realtime_quote(self, symbol: str) -> Optional[CryptoRealtimeQuote]:
-        """
-        获取实时行情
-        
-        Args:
-            symbol: 交易对 (BTC/USDT)
-            
-        Returns:
-            CryptoRealtimeQuote 或 None
-        """
-        try:
-            self._ensure_markets_loaded()
-            
-            symbol = self._normalize_symbol(symbol)
-            
-            if symbol not in self._markets_cache:
-                logger.warning(f"交易对 {symbol} 不存在于 {self.exchange_id}")
-                return None
-            
-            # 获取行情
-            ticker = self.exchange.fetch_ticker(symbol)
-            
-            if not ticker:
-                return None
-            
-            # 解析货币对
-            market = self._markets_cache.get(symbol, {})
-            base = market.get('base', symbol.split('/')[0] if '/' in symbol else symbol)
-            quote = market.get('quote', symbol.split('/')[1] if '/' in symbol else 'USDT')
-            
-            # 计算价差
-            bid = ticker.get('bid', 0) or 0
-            ask = ticker.get('ask', 0) or 0
-            spread = 0
-            if bid > 0 and ask > 0:
-                spread = ((ask - bid) / bid) * 100
-            
-            # 计算24h涨跌幅
-            change_24h = ticker.get('percentage', 0) or 0
-            open_24h = ticker.get('open', 0) or 0
-            close = ticker.get('last', 0) or ticker.get('close', 0) or 0
-            change_amount = close - open_24h if open_24h else 0
-            
-            quote_data = CryptoRealtimeQuote(
-                symbol=symbol,
-                exchange=self.exchange_id,
-                price=close,
-                open_24h=open_24h,
-                high_24h=ticker.get('high', 0) or 0,
-                low_24h=ticker.get('low', 0) or 0,
-                close=close,
-                change_24h=change_24h,
-                change_amount_24h=change_amount,
-                volume_24h=ticker.get('baseVolume', 0) or 0,
-                quote_volume_24h=ticker.get('quoteVolume', 0) or 0,
-                bid=bid,
-                ask=ask,
-                spread=spread,
-                timestamp=datetime.now(),
-                base_currency=base,
-                quote_currency=quote,
-            )
-            
-            logger.debug(f"获取 {symbol} 实时行情成功: {close}")
-            return quote_data
-            
-        except Exception as e:
-            logger.error(f"获取实时行情失败 {symbol}: {e}")
-            return None
-    
-    def get_multiple_quotes(self, symbols: List[str]) -> Dict[str, CryptoRealtimeQuote]:
-        """
-        批量获取多个交易对的行情
-        
-        Args:
-            symbols: 交易对列表
-            
-        Returns:
-            Dict[symbol, CryptoRealtimeQuote]
-        """
-        results = {}
-        
-        try:
-            self._ensure_markets_loaded()
-            
-            # 标准化所有symbol
-            normalized_symbols = [self._normalize_symbol(s) for s in symbols]
-            
-            # 检查是否支持批量获取
-            if self.exchange.has.get('fetchTickers', False):
-                try:
-                    tickers = self.exchange.fetch_tickers(normalized_symbols)
-                    for symbol, ticker in tickers.items():
-                        quote = self._ticker_to_quote(symbol, ticker)
-                        if quote:
-                            results[symbol] = quote
-                    return results
-                except Exception as e:
-                    logger.warning(f"批量获取行情失败，回退到单个获取: {e}")
-            
-            # 逐个获取
-            for symbol in normalized_symbols:
-                quote = self.get_realtime_quote(symbol)
-                if quote:
-                    results[symbol] = quote
-                time.sleep(0.1)  # 速率限制
-                
-        except Exception as e:
-            logger.error(f"批量获取行情失败: {e}")
-        
-        return results
-    
     def _ticker_to_quote(self, symbol: str, ticker: Dict) -> Optional[CryptoRealtimeQuote]:
         """将 ticker 字典转换为 CryptoRealtimeQuote"""
         try:
@@ -501,60 +404,688 @@ class CCXTFetcher:
             logger.error(f"转换 ticker 失败 {symbol}: {e}")
             return None
     
-    def get_orderbook(
+    def _summarize_orderbook(
         self,
         symbol: str,
-        limit: int = 20
-    ) -> Optional[Dict[str, Any]]:
+        orderbook: Dict[str, Any],
+        book: Optional[OrderBook] = None,
+    ) -> Dict[str, Any]:
         """
-        获取订单簿深度
+        汇总订单簿：买卖盘总量、买卖比与流动性指标
         
         Args:
             symbol: 交易对
-            limit: 深度数量
-            
-        Returns:
-            {
-                'symbol': str,
-                'bids': [[price, amount], ...],
-                'asks': [[price, amount], ...],
-                'timestamp': datetime,
-                'bid_volume': float,  # 买盘总量
-                'ask_volume': float,  # 卖盘总量
-                'bid_ask_ratio': float,  # 买卖比
-            }
+            orderbook: ccxt fetch_order_book 返回结果
+            book: 本地订单簿（传入时用快照更新并复用，否则新建）
         """
-        try:
-            self._ensure_markets_loaded()
-            symbol = self._normalize_symbol(symbol)
+        bids = orderbook.get('bids', [])
+        asks = orderbook.get('asks', [])
+        
+        book = book or OrderBook(symbol, self.exchange_id)
+        book.apply_snapshot(bids, asks, nonce=orderbook.get('nonce'))
+        
+        bid_volume = float(book.bid_sizes.sum())
+        ask_volume = float(book.ask_sizes.sum())
+        bid_ask_ratio = bid_volume / ask_volume if ask_volume > 0 else 0
+        
+        return {
+            'symbol': symbol,
+            'bids': bids,
+            'asks': asks,
+            'timestamp': book.timestamp,
+            'bid_volume': bid_volume,
+            'ask_volume': ask_volume,
+            'bid_ask_ratio': bid_ask_ratio,
+            'liquidity': book.liquidity_metrics(),
+            'book': book,
+        }
+
+
+class CCXTFetcher(CCXTParsingMixin):
+    """
+    CCXT 统一交易所数据获取器
+    
+    支持功能：
+    1. 多交易所切换 (Binance, OKX 等)
+    2. K线数据获取
+    3. 实时行情获取
+    4. 订单簿深度
+    
+    使用示例：
+        fetcher = CCXTFetcher(exchange='binance')
+        
+        # 获取K线
+        kline = fetcher.get_kline('BTC/USDT', timeframe='1h', limit=100)
+        
+        # 获取实时行情
+        quote = fetcher.get_realtime_quote('BTC/USDT')
+    """
+    
+    # 数据源名称
+    name: str = "CCXTFetcher"
+    
+    # 单次 fetch_ohlcv 最大返回数量（分页回补时的页大小）
+    OHLCV_PAGE_LIMIT = {
+        'binance': 1000,
+        'okx': 100,       # OKX 历史 K 线接口单页 100 根
+        'bybit': 1000,
+        'gate': 1000,
+        'kucoin': 1500,
+        'huobi': 2000,
+    }
+    DEFAULT_OHLCV_PAGE_LIMIT = 500
+    # 不带 since 拉取最近 K 线时的单次上限（未列出的同 OHLCV_PAGE_LIMIT）
+    OHLCV_RECENT_LIMIT = {
+        'okx': 300,       # OKX 最新 K 线接口单次 300 根
+    }
+    
+    # 全市场 ticker 快照有效期 (秒)，同一轮排名内的多次调用共用一份快照
+    TICKER_SNAPSHOT_TTL = 30
+    # 交易所不支持 fetchTickers 时，逐个获取的交易对上限
+    FALLBACK_SNAPSHOT_LIMIT = 100
+    
+    def __init__(
+        self,
+        exchange: str = 'binance',
+        api_key: str = '',
+        api_secret: str = '',
+        passphrase: str = '',  # OKX 需要
+        sandbox: bool = False,
+        timeout: int = 30000,
+        rate_limit: bool = True,
+        candle_store: Optional[Any] = None,
+        markets_cache_dir: Optional[str] = None,
+        markets_ttl: int = 21600,
+        quote_stream: Optional[Any] = None,
+        coalesce_window: float = 1.0,
+        kline_partial_max_age: float = 60.0,
+    ):
+        """
+        初始化 CCXT Fetcher
+        
+        Args:
+            exchange: 交易所名称 (binance, okx, bybit 等)
+            api_key: API Key（可选，公开数据不需要）
+            api_secret: API Secret
+            passphrase: API Passphrase (OKX需要)
+            sandbox: 是否使用沙盒/测试网
+            timeout: 请求超时时间 (ms)
+            rate_limit: 是否启用速率限制
+            candle_store: 本地 K 线仓库（可选，如 storage.DatabaseManager），
+                          启用后 get_kline 只增量拉取新 K 线
+            markets_cache_dir: 市场信息快照目录（可选），冷启动时优先从磁盘读取
+            markets_ttl: 市场信息快照有效期 (秒)
+            quote_stream: WebSocket 行情流（可选，如 quote_stream.QuoteStream），
+                          挂载后行情与最新 K 线优先从内存缓存读取
+            coalesce_window: 相同请求结果的复用窗口 (秒)，并发的相同请求总是合并
+            kline_partial_max_age: 未收盘 K 线的最长复用时间 (秒)，期间同一根 K 线不重复请求
+        """
+        if not CCXT_AVAILABLE:
+            raise ImportError("ccxt 库未安装，请运行: pip install ccxt")
+        
+        self.exchange_id = exchange.lower()
+        if self.exchange_id not in self.SUPPORTED_EXCHANGES:
+            logger.warning(f"交易所 {exchange} 可能不受完全支持")
+        
+        # 创建交易所实例
+        exchange_class = getattr(ccxt, self.exchange_id, None)
+        if exchange_class is None:
+            raise ValueError(f"不支持的交易所: {exchange}")
+        
+        config = self._build_exchange_config(
+            api_key, api_secret, passphrase, sandbox, timeout, rate_limit
+        )
+        
+        self.exchange = exchange_class(config)
+        self.sandbox = sandbox
+        self._init_rate_limiter(rate_limit)
+        
+        # 相同请求合并（跨实例共享，同一交易所的公开行情只请求一次）
+        self.coalesce_window = coalesce_window
+        
+        # 缓存市场信息
+        self._markets_loaded = False
+        self._markets_cache: Dict[str, Any] = {}
+        self._markets_lock = threading.RLock()
+        self.markets_cache_dir = markets_cache_dir
+        self.markets_ttl = markets_ttl
+        
+        # 本地 K 线仓库（增量同步）
+        self.candle_store = candle_store
+        
+        # WebSocket 行情流（实时缓存，REST 兜底）
+        self.quote_stream = quote_stream
+        
+        # 全市场 ticker 快照（按计价货币缓存）
+        self._ticker_snapshots: Dict[str, TickerSnapshot] = {}
+        self._snapshot_lock = threading.Lock()
+        
+        # 本地订单簿（按交易对复用，每次拉取后用快照更新）
+        self._orderbooks: Dict[str, OrderBook] = {}
+        self._orderbooks_lock = threading.Lock()
+        
+        # K 线拉取计划（按收盘时间对齐，未收盘期间复用已拉取的数据）
+        self.fetch_planner = KlineFetchPlanner(self.exchange_id, partial_max_age=kline_partial_max_age)
+        self._kline_memo: Dict[Tuple[str, str], pd.DataFrame] = {}
+        
+        logger.info(f"CCXTFetcher 初始化完成: {self.exchange_id}")
+    
+    def _request(self, method: str, *args, **kwargs) -> Any:
+        """
+        调用 ccxt 公开行情接口（相同交易所、方法和参数的并发请求只发一次）
+        """
+        key = (self.exchange_id, self.sandbox, method, repr(args), repr(sorted(kwargs.items())))
+        
+        def call():
+            # 只有真正发出的请求才消耗令牌，被合并的请求不占配额
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(self._request_cost(method, args))
+            return getattr(self.exchange, method)(*args, **kwargs)
+        
+        return _request_flight.do(key, call, reuse_window=self.coalesce_window)
+    
+    def _ensure_markets_loaded(self):
+        """
+        确保市场信息已加载（线程安全）
+        
+        加载顺序：
+        1. 内存中已加载则直接返回
+        2. 磁盘快照未过期时从快照恢复，避免重复下载数 MB 的市场数据
+        3. 否则调用 load_markets() 并写回快照
+        """
+        if self._markets_loaded:
+            return
+        
+        with self._markets_lock:
+            if self._markets_loaded:
+                return
+            
+            try:
+                if not self._load_markets_snapshot():
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.acquire(self._request_cost('load_markets', ()))
+                    self.exchange.load_markets()
+                    self._save_markets_snapshot()
+                self._set_markets(self.exchange.markets)
+                self._markets_loaded = True
+                logger.info(f"已加载 {len(self._markets_cache)} 个交易对")
+            except Exception as e:
+                logger.error(f"加载市场信息失败: {e}")
+                raise
+    
+    def enable_quote_stream(
+        self,
+        ws_url: Optional[str] = None,
+        max_age: Optional[float] = None,
+    ):
+        """
+        启用 WebSocket 行情流（进程内按交易所共享）
+        
+        Args:
+            ws_url: 覆盖 WebSocket 地址（可选，用于本地回放测试）
+            max_age: 缓存有效期 (秒)
+        """
+        from .quote_stream import get_quote_stream, QuoteStream
+        
+        self._ensure_markets_loaded()
+        self.quote_stream = get_quote_stream(
+            self.exchange_id,
+            ws_url=ws_url or None,
+            markets=self.exchange.markets,
+            currencies=self.exchange.currencies,
+            max_age=max_age if max_age is not None else QuoteStream.DEFAULT_MAX_AGE,
+        )
+        return self.quote_stream
+    
+    def watch_symbols(self, symbols: List[str], timeframes: List[str] = ()):
+        """预先订阅交易对的行情（及 K 线周期），未启用行情流时忽略"""
+        if self.quote_stream is None:
+            return
+        try:
+            self._ensure_markets_loaded()
+            normalized = [self._normalize_symbol(s) for s in symbols]
+            normalized = [s for s in normalized if s in self._markets_cache]
+            tfs = [self.TIMEFRAME_MAP.get(tf, tf) for tf in timeframes]
+            self.quote_stream.subscribe(normalized, timeframes=tfs)
+        except Exception as e:
+            logger.warning(f"订阅行情流失败: {e}")
+    
+    def _stream_candles_df(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        """从行情流读取 K 线；尚未订阅时顺带订阅，供后续调用使用"""
+        stream = self.quote_stream
+        if stream is None:
+            return None
+        candles = stream.get_candles(symbol, timeframe)
+        if not candles:
+            if not stream.is_subscribed(symbol, timeframe):
+                stream.subscribe([symbol], timeframes=[timeframe], tickers=False)
+            return None
+        return self._ohlcv_to_df(candles)
+    
+    def get_kline(
+        self,
+        symbol: str,
+        timeframe: str = '1d',
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        raise_errors: bool = False,
+    ) -> Optional[CryptoKlineData]:
+        """
+        获取K线数据
+        
+        Args:
+            symbol: 交易对 (BTC/USDT)
+            timeframe: 时间周期 (1m, 5m, 15m, 1h, 4h, 1d)
+            limit: 获取数量
+            since: 起始时间
+            raise_errors: 网络、限速等错误直接抛出（交易对未上市仍返回 None），
+                          供多交易所管理器判断交易所健康状况
+            
+        Returns:
+            CryptoKlineData 或 None
+        """
+        try:
+            self._ensure_markets_loaded()
+            
+            symbol = self._normalize_symbol(symbol)
             
             if symbol not in self._markets_cache:
-                logger.warning(f"交易对 {symbol} 不存在")
+                logger.warning(f"交易对 {symbol} 不存在于 {self.exchange_id}")
+                return None
+            
+            # 转换时间周期
+            tf = self.TIMEFRAME_MAP.get(timeframe, timeframe)
+            
+            # 转换起始时间
+            since_ts = None
+            if since:
+                since_ts = int(since.timestamp() * 1000)
+            
+            if self.candle_store is not None and since_ts is None:
+                # 增量同步：只拉取本地最后一根 K 线之后的数据
+                df = self._sync_klines(symbol, tf, limit)
+            elif since_ts is None:
+                df = self._planned_klines(symbol, tf, limit)
+            else:
+                df = self._fetch_ohlcv_df(symbol, tf, since_ts, limit)
+            
+            if since_ts is None and df is not None and not df.empty:
+                # 用行情流中的最新 K 线覆盖（未收盘 K 线实时更新）
+                streamed = self._stream_candles_df(symbol, tf)
+                if streamed is not None:
+                    df = pd.concat([df, streamed[streamed.index >= df.index[-1]]])
+                    df = df[~df.index.duplicated(keep='last')].sort_index().tail(limit)
+            
+            if df is None or df.empty:
+                logger.warning(f"未获取到 {symbol} 的K线数据")
+                return None
+            
+            # 创建结果对象
+            kline_data = CryptoKlineData(
+                symbol=symbol,
+                exchange=self.exchange_id,
+                timeframe=timeframe,
+                data=df
+            )
+            
+            # 计算技术指标
+            self._calculate_indicators(kline_data)
+            
+            logger.info(f"获取 {symbol} K线数据成功: {len(df)} 条")
+            return kline_data
+            
+        except Exception as e:
+            logger.error(f"获取K线数据失败 {symbol}: {e}")
+            if raise_errors:
+                raise
+            return None
+    
+    def _fetch_ohlcv_df(
+        self,
+        symbol: str,
+        timeframe: str,
+        since_ts: Optional[int],
+        limit: int
+    ) -> Optional[pd.DataFrame]:
+        """
+        从交易所拉取 OHLCV 并转换为 DataFrame
+        
+        Returns:
+            以 timestamp 为索引的 OHLCV DataFrame，无数据时返回 None
+        """
+        ohlcv = self._request(
+            'fetch_ohlcv',
+            symbol,
+            timeframe=timeframe,
+            since=since_ts,
+            limit=limit
+        )
+        
+        return self._ohlcv_to_df(ohlcv)
+    
+    def _planned_klines(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int
+    ) -> Optional[pd.DataFrame]:
+        """
+        按收盘时间对齐拉取最近 limit 根 K 线（无本地仓库时）
+        
+        上次拉取的结果仍在同一根 K 线内且未过期时直接复用，
+        新 K 线开盘后才重新请求。
+        """
+        key = (symbol, timeframe)
+        memo = self._kline_memo.get(key)
+        if memo is not None and len(memo) >= limit:
+            last_ts = int(memo.index[-1].value // 10**6)
+            if not self.fetch_planner.needs_fetch(key, timeframe, last_ts):
+                return memo.tail(limit)
+        
+        df = self._fetch_ohlcv_df(symbol, timeframe, None, limit)
+        if df is not None and not df.empty:
+            self._kline_memo[key] = df
+            self.fetch_planner.record_fetch(key)
+        return df
+    
+    def _sync_klines(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int
+    ) -> Optional[pd.DataFrame]:
+        """
+        增量同步 K 线到本地仓库，并返回最近 limit 根
+        
+        策略：
+        1. 读取本地最近 limit 根 K 线
+        2. 本地窗口完整、最后一根仍是当前 K 线且刚同步过时，直接返回本地数据
+        3. 本地窗口完整时，从最后一根（可能未收盘）开始只拉取缺失部分
+        4. 本地无数据或缺口超过窗口时，全量拉取 limit 根
+        5. 行情流已覆盖缺口时直接使用推送的 K 线，不发 REST 请求
+        6. 新数据写回仓库，与本地窗口合并后返回
+        """
+        store = self.candle_store
+        planner = self.fetch_planner
+        key = (symbol, timeframe)
+        cached = store.get_klines(self.exchange_id, symbol, timeframe, limit=limit)
+        
+        since_ts = None
+        fetch_limit = limit
+        if not cached.empty:
+            last_ts = int(cached.index[-1].value // 10**6)
+            if len(cached) >= limit and not planner.needs_fetch(key, timeframe, last_ts):
+                return cached
+            
+            if planner.supports(timeframe):
+                missing = planner.missing_bars(timeframe, last_ts)
+            else:
+                tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+                missing = int((self.exchange.milliseconds() - last_ts) // tf_ms) + 1
+            if missing < limit and len(cached) + missing > limit:
+                since_ts = last_ts
+                fetch_limit = missing + 1
+        
+        fresh = None
+        if since_ts is not None:
+            # 行情流覆盖了本地最后一根之后的全部 K 线时，无需 REST 请求
+            streamed = self._stream_candles_df(symbol, timeframe)
+            if streamed is not None and streamed.index[0] <= cached.index[-1]:
+                fresh = streamed[streamed.index >= cached.index[-1]]
+        
+        if fresh is None:
+            fresh = self._fetch_ohlcv_df(symbol, timeframe, since_ts, fetch_limit)
+        
+        if fresh is None or fresh.empty:
+            return cached if not cached.empty else None
+        
+        store.save_klines(fresh, self.exchange_id, symbol, timeframe)
+        planner.record_fetch(key)
+        
+        if since_ts is None:
+            return fresh.tail(limit)
+        
+        logger.debug(f"{symbol} {timeframe} 增量同步 {len(fresh)} 根K线")
+        df = pd.concat([cached, fresh])
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        return df.tail(limit)
+    
+    def get_realtime_quote(self, symbol: str, raise_errors: bool = False) -> Optional[CryptoRealtimeQuote]:
+        """
+        获取实时行情
+        
+        Args:
+            symbol: 交易对 (BTC/USDT)
+            raise_errors: 网络、限速等错误直接抛出（交易对未上市仍返回 None）
+            
+        Returns:
+            CryptoRealtimeQuote 或 None
+        """
+        try:
+            self._ensure_markets_loaded()
+            
+            symbol = self._normalize_symbol(symbol)
+            
+            if symbol not in self._markets_cache:
+                logger.warning(f"交易对 {symbol} 不存在于 {self.exchange_id}")
+                return None
+            
+            # 优先读取行情流缓存；未命中时订阅该交易对并回退到 REST
+            if self.quote_stream is not None:
+                ticker = self.quote_stream.get_ticker(symbol)
+                if ticker:
+                    return self._ticker_to_quote(symbol, ticker)
+                if not self.quote_stream.is_subscribed(symbol):
+                    self.quote_stream.subscribe([symbol])
+            
+            # 获取行情
+            ticker = self._request('fetch_ticker', symbol)
+            
+            if not ticker:
                 return None
             
-            orderbook = self.exchange.fetch_order_book(symbol, limit)
+            quote_data = self._ticker_to_quote(symbol, ticker)
+            if not quote_data:
+                return None
             
-            bids = orderbook.get('bids', [])
-            asks = orderbook.get('asks', [])
+            logger.debug(f"获取 {symbol} 实时行情成功: {quote_data.price}")
+            return quote_data
             
-            bid_volume = sum(b[1] for b in bids) if bids else 0
-            ask_volume = sum(a[1] for a in asks) if asks else 0
-            bid_ask_ratio = bid_volume / ask_volume if ask_volume > 0 else 0
+        except Exception as e:
+            logger.error(f"获取实时行情失败 {symbol}: {e}")
+            if raise_errors:
+                raise
+            return None
+    
+    def get_multiple_quotes(self, symbols: List[str]) -> Mapping[str, CryptoRealtimeQuote]:
+        """
+        批量获取多个交易对的行情
+        
+        Args:
+            symbols: 交易对列表
+            
+        Returns:
+            {symbol: CryptoRealtimeQuote}；批量接口可用时为按需物化的只读映射
+        """
+        results = {}
+        
+        try:
+            self._ensure_markets_loaded()
+            
+            # 标准化所有symbol
+            normalized_symbols = [self._normalize_symbol(s) for s in symbols]
+            
+            # 检查是否支持批量获取
+            if self.exchange.has.get('fetchTickers', False):
+                try:
+                    tickers = self._request('fetch_tickers', normalized_symbols)
+                    return QuoteTable.from_tickers(
+                        self.exchange_id, tickers, self._markets_cache
+                    ).as_mapping()
+                except Exception as e:
+                    logger.warning(f"批量获取行情失败，回退到单个获取: {e}")
+            
+            # 逐个获取
+            for symbol in normalized_symbols:
+                quote = self.get_realtime_quote(symbol)
+                if quote:
+                    results[symbol] = quote
+                
+        except Exception as e:
+            logger.error(f"批量获取行情失败: {e}")
+
+        return results
+
+    def fetch_quote_table(self, symbols: List[str]) -> QuoteTable:
+        """
+        批量获取行情并返回列式行情表
+
+        与 get_multiple_quotes 不同，网络、限速、地区封锁等错误直接抛出，
+        便于调用方（如跨交易所聚合）判断交易所健康状况。
+        该交易所不存在的交易对会被跳过。
+
+        Args:
+            symbols: 交易对列表（任意写法）
+        """
+        self._ensure_markets_loaded()
+
+        normalized = [self._normalize_symbol(s) for s in symbols]
+        normalized = list(dict.fromkeys(s for s in normalized if s in self._markets_cache))
+        if not normalized:
+            return QuoteTable.from_tickers(self.exchange_id, {}, self._markets_cache)
+
+        if self.exchange.has.get('fetchTickers', False):
+            tickers = self._request('fetch_tickers', normalized)
+        else:
+            tickers = {s: self._request('fetch_ticker', s) for s in normalized}
+
+        return QuoteTable.from_tickers(self.exchange_id, tickers, self._markets_cache)
+
+    def get_orderbook(
+        self,
+        symbol: str,
+        limit: int = 20,
+        raise_errors: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        获取订单簿深度
+        
+        Args:
+            symbol: 交易对
+            limit: 深度数量
+            raise_errors: 网络、限速等错误直接抛出（交易对未上市仍返回 None）
             
-            return {
-                'symbol': symbol,
-                'bids': bids,
-                'asks': asks,
-                'timestamp': datetime.now(),
-                'bid_volume': bid_volume,
-                'ask_volume': ask_volume,
-                'bid_ask_ratio': bid_ask_ratio,
+        Returns:
+            {
+                'symbol': str,
+                'bids': [[price, amount], ...],
+                'asks': [[price, amount], ...],
+                'timestamp': datetime,
+                'bid_volume': float,  # 买盘总量
+                'ask_volume': float,  # 卖盘总量
+                'bid_ask_ratio': float,  # 买卖比
+                'liquidity': {...},  # 深度、滑点、失衡、大单墙（见 OrderBook.liquidity_metrics）
+                'book': OrderBook,  # 本地订单簿，可继续 apply_diff
             }
+        """
+        try:
+            self._ensure_markets_loaded()
+            symbol = self._normalize_symbol(symbol)
+            
+            if symbol not in self._markets_cache:
+                logger.warning(f"交易对 {symbol} 不存在")
+                return None
+            
+            orderbook = self._request('fetch_order_book', symbol, limit)
+            
+            with self._orderbooks_lock:
+                book = self._orderbooks.get(symbol)
+                if book is None:
+                    book = self._orderbooks[symbol] = OrderBook(symbol, self.exchange_id)
+                return self._summarize_orderbook(symbol, orderbook, book)
             
         except Exception as e:
             logger.error(f"获取订单簿失败 {symbol}: {e}")
+            if raise_errors:
+                raise
             return None
     
+    def get_multi_timeframe_klines(
+        self,
+        symbol: str,
+        timeframes: List[str],
+        limit: int = 100,
+        raise_errors: bool = False,
+    ) -> Dict[str, CryptoKlineData]:
+        """
+        获取多个周期的K线，只请求最细的一个周期，其余在本地重采样
+        
+        分桶与交易所原生 K 线对齐（见 resample.py）；
+        周期之间无法整除对齐，或合成所需的基础 K 线超过单次请求上限时，
+        回退为逐个周期请求（每个周期一次请求，避免分页回补）。
+        
+        Args:
+            symbol: 交易对
+            timeframes: 周期列表 (如 ['4h', '1d'])
+            limit: 每个周期返回的K线数量
+            raise_errors: 网络、限速等错误直接抛出（交易对未上市仍返回空字典）
+            
+        Returns:
+            Dict[timeframe, CryptoKlineData]（获取失败的周期不包含在内）
+        """
+        timeframes = list(dict.fromkeys(timeframes))
+        base_tf = pick_base_timeframe(timeframes, self.exchange_id)
+        if base_tf is not None:
+            needed = max(bars_needed(base_tf, tf, limit) for tf in timeframes)
+            if needed > self._recent_limit():
+                base_tf = None
+        
+        if base_tf is None or len(timeframes) == 1:
+            results = {}
+            for tf in timeframes:
+                kline = self.get_kline(symbol, timeframe=tf, limit=limit, raise_errors=raise_errors)
+                if kline is not None:
+                    results[tf] = kline
+            return results
+        
+        try:
+            self._ensure_markets_loaded()
+            symbol = self._normalize_symbol(symbol)
+            
+            if symbol not in self._markets_cache:
+                logger.warning(f"交易对 {symbol} 不存在于 {self.exchange_id}")
+                return {}
+            
+            kline = self.get_kline(symbol, timeframe=base_tf, limit=needed, raise_errors=raise_errors)
+            base_df = kline.data if kline is not None else None
+            
+            if base_df is None or base_df.empty:
+                logger.warning(f"未获取到 {symbol} 的 {base_tf} K线数据")
+                return {}
+            
+            results = {}
+            for tf in timeframes:
+                df = resample_ohlcv(base_df, base_tf, tf, exchange=self.exchange_id)
+                if df is None or df.empty:
+                    continue
+                kline_data = CryptoKlineData(
+                    symbol=symbol,
+                    exchange=self.exchange_id,
+                    timeframe=tf,
+                    data=df.tail(limit)
+                )
+                self._calculate_indicators(kline_data)
+                results[tf] = kline_data
+            
+            logger.debug(f"{symbol} 由 {base_tf} ({len(base_df)} 根) 合成 {list(results)}")
+            return results
+            
+        except Exception as e:
+            logger.error(f"获取多周期K线失败 {symbol}: {e}")
+            if raise_errors:
+                raise
+            return {}
+    
     def get_historical_data(
         self,
         symbol: str,
@@ -564,6 +1095,8 @@ class CCXTFetcher:
         """
         获取历史数据（带标准列名，兼容原有分析器）
         
+        超过单页上限时自动走分页回补（fetch_ohlcv_range），不再截断到 1000 根
+        
         Args:
             symbol: 交易对
             days: 天数
@@ -573,26 +1106,23 @@ class CCXTFetcher:
             DataFrame with columns: date, open, high, low, close, volume
         """
         try:
-            # 计算需要的K线数量
-            timeframe_hours = {
-                '1m': 1/60,
-                '5m': 5/60,
-                '15m': 0.25,
-                '1h': 1,
-                '4h': 4,
-                '1d': 24,
-            }
+            tf = self.TIMEFRAME_MAP.get(timeframe, timeframe)
             
-            hours_per_bar = timeframe_hours.get(timeframe, 24)
-            limit = int((days * 24) / hours_per_bar) + 10  # 多取一些
-            limit = min(limit, 1000)  # CCXT 限制
+            # 计算需要的K线数量
+            tf_ms = self.exchange.parse_timeframe(tf) * 1000
+            limit = int(days * 86400 * 1000 // tf_ms) + 10  # 多取一些
             
-            kline = self.get_kline(symbol, timeframe=timeframe, limit=limit)
+            if limit <= self._recent_limit():
+                kline = self.get_kline(symbol, timeframe=timeframe, limit=limit)
+                df = kline.data if kline is not None else None
+            else:
+                start = datetime.now(timezone.utc) - timedelta(days=days)
+                df = self.fetch_ohlcv_range(symbol, timeframe=timeframe, start=start)
             
-            if kline is None or kline.data.empty:
+            if df is None or df.empty:
                 return None
             
-            df = kline.data.copy()
+            df = df.copy()
             df.reset_index(inplace=True)
             df.rename(columns={'timestamp': 'date'}, inplace=True)
             
@@ -602,12 +1132,163 @@ class CCXTFetcher:
             logger.error(f"获取历史数据失败 {symbol}: {e}")
             return None
     
+    def _page_limit(self) -> int:
+        """单次 fetch_ohlcv 可返回的最大 K 线数"""
+        return self.OHLCV_PAGE_LIMIT.get(self.exchange_id, self.DEFAULT_OHLCV_PAGE_LIMIT)
+    
+    def _recent_limit(self) -> int:
+        """不带 since 单次请求最近 K 线可返回的最大数量"""
+        return self.OHLCV_RECENT_LIMIT.get(self.exchange_id, self._page_limit())
+    
+    def fetch_ohlcv_range(
+        self,
+        symbol: str,
+        timeframe: str = '1h',
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        max_workers: int = 4,
+        raise_errors: bool = False,
+    ) -> Optional[pd.DataFrame]:
+        """
+        分页并发回补任意时间范围的 K 线
+        
+        流程：
+        1. 按单页上限把 [start, end] 切分成多个 since 分页
+        2. 线程池并发拉取，请求速率由交易所主机共享的令牌桶约束
+        3. 按时间戳去重、排序后拼接为连续的 DataFrame
+        4. 启用本地仓库时，只回补仓库未覆盖的头尾区间及内部缺口
+        
+        Args:
+            symbol: 交易对
+            timeframe: 时间周期
+            start: 开始时间（UTC，默认 30 天前）
+            end: 结束时间（UTC，默认当前）
+            max_workers: 并发线程数
+            raise_errors: 网络、限速等错误直接抛出（交易对未上市仍返回 None）
+            
+        Returns:
+            以 timestamp 为索引的 OHLCV DataFrame，或 None
+        """
+        try:
+            self._ensure_markets_loaded()
+            symbol = self._normalize_symbol(symbol)
+            
+            if symbol not in self._markets_cache:
+                logger.warning(f"交易对 {symbol} 不存在于 {self.exchange_id}")
+                return None
+            
+            tf = self.TIMEFRAME_MAP.get(timeframe, timeframe)
+            tf_ms = self.exchange.parse_timeframe(tf) * 1000
+            
+            end_ms = int(pd.Timestamp(end).value // 10**6) if end else self.exchange.milliseconds()
+            start_ms = int(pd.Timestamp(start).value // 10**6) if start else end_ms - 30 * 86400 * 1000
+            start_ms = start_ms // tf_ms * tf_ms
+            
+            # 需要回补的区间（启用仓库时跳过已覆盖的部分）
+            ranges = [(start_ms, end_ms)]
+            cached = None
+            if self.candle_store is not None:
+                cached = self.candle_store.get_klines(
+                    self.exchange_id, symbol, tf,
+                    start=pd.Timestamp(start_ms, unit='ms').to_pydatetime(),
+                    end=pd.Timestamp(end_ms, unit='ms').to_pydatetime(),
+                )
+                if not cached.empty:
+                    ranges = self._missing_ranges(cached.index, start_ms, end_ms, tf_ms)
+            
+            page_limit = self._page_limit()
+            page_span = page_limit * tf_ms
+            pages = [
+                (since, min(since + page_span, range_end + tf_ms))
+                for range_start, range_end in ranges
+                for since in range(range_start, range_end + 1, page_span)
+            ]
+            
+            frames = []
+            if pages:
+                logger.info(f"{symbol} {tf} 分页回补: {len(pages)} 页")
+                with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pages)))) as executor:
+                    futures = [
+                        executor.submit(self._fetch_ohlcv_page, symbol, tf, since, until, page_limit)
+                        for since, until in pages
+                    ]
+                    for future in futures:
+                        page_df = future.result()
+                        if page_df is not None and not page_df.empty:
+                            frames.append(page_df)
+            
+            fresh = pd.concat(frames) if frames else None
+            if fresh is not None:
+                fresh = fresh[~fresh.index.duplicated(keep='last')].sort_index()
+                if self.candle_store is not None:
+                    self.candle_store.save_klines(fresh, self.exchange_id, symbol, tf)
+            
+            parts = [df for df in (cached, fresh) if df is not None and not df.empty]
+            if not parts:
+                logger.warning(f"未获取到 {symbol} 的历史K线数据")
+                return None
+            
+            df = pd.concat(parts)
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+            df = df[
+                (df.index >= pd.Timestamp(start_ms, unit='ms')) &
+                (df.index <= pd.Timestamp(end_ms, unit='ms'))
+            ]
+            
+            logger.info(f"获取 {symbol} {tf} 历史K线成功: {len(df)} 条")
+            return df
+            
+        except Exception as e:
+            logger.error(f"分页回补K线失败 {symbol}: {e}")
+            if raise_errors:
+                raise
+            return None
+    
+    @staticmethod
+    def _missing_ranges(
+        index: pd.DatetimeIndex,
+        start_ms: int,
+        end_ms: int,
+        tf_ms: int
+    ) -> List[Tuple[int, int]]:
+        """
+        本地 K 线未覆盖的区间 [(起, 止)]（毫秒，闭区间）
+        
+        包括开头、结尾（从最后一根开始，刷新可能未收盘的 K 线）以及内部缺口：
+        暂停超过 limit 根后 _sync_klines 只全量拉取最近 limit 根，会在仓库中留下空洞。
+        """
+        ts = np.asarray(index, dtype='datetime64[ms]').astype(np.int64)
+        ranges = []
+        if ts[0] > start_ms:
+            ranges.append((start_ms, int(ts[0]) - tf_ms))
+        gaps = np.flatnonzero(np.diff(ts) > tf_ms)
+        ranges.extend((int(ts[i]) + tf_ms, int(ts[i + 1]) - tf_ms) for i in gaps)
+        ranges.append((int(ts[-1]), end_ms))
+        return ranges
+    
+    def _fetch_ohlcv_page(
+        self,
+        symbol: str,
+        timeframe: str,
+        since: int,
+        until: int,
+        limit: int
+    ) -> Optional[pd.DataFrame]:
+        """拉取单页 K 线，只保留 [since, until) 区间内的数据，避免与相邻分页重叠"""
+        df = self._fetch_ohlcv_df(symbol, timeframe, since, limit)
+        if df is None:
+            return None
+        return df[
+            (df.index >= pd.Timestamp(since, unit='ms')) &
+            (df.index < pd.Timestamp(until, unit='ms'))
+        ]
+    
     def search_symbols(self, keyword: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
-        搜索交易对
+        搜索交易对（前缀匹配，结果按活跃、现货、常用计价货币优先排序）
         
         Args:
-            keyword: 关键词 (如 "BTC", "SOL")
+            keyword: 关键词 (如 "BTC", "SOL", "btc-us")
             limit: 返回数量
             
         Returns:
@@ -616,21 +1297,16 @@ class CCXTFetcher:
         try:
             self._ensure_markets_loaded()
             
-            keyword = keyword.upper()
             results = []
-            
-            for symbol, market in self._markets_cache.items():
-                if keyword in symbol:
-                    results.append({
-                        'symbol': symbol,
-                        'base': market.get('base', ''),
-                        'quote': market.get('quote', ''),
-                        'active': market.get('active', True),
-                        'type': market.get('type', 'spot'),
-                    })
-                    
-                    if len(results) >= limit:
-                        break
+            for symbol in self._symbol_index.search(keyword, limit):
+                market = self._markets_cache.get(symbol, {})
+                results.append({
+                    'symbol': symbol,
+                    'base': market.get('base', ''),
+                    'quote': market.get('quote', ''),
+                    'active': market.get('active', True),
+                    'type': market.get('type', 'spot'),
+                })
             
             return results
             
@@ -638,6 +1314,68 @@ class CCXTFetcher:
             logger.error(f"搜索交易对失败: {e}")
             return []
     
+    def _active_quote_symbols(self, quote: str) -> List[str]:
+        """获取指定计价货币的所有活跃现货交易对"""
+        return [
+            s for s in self._symbol_index.symbols_for_quote(quote)
+            if ':' not in s and self._markets_cache[s].get('active', True)
+        ]
+    
+    def get_ticker_snapshot(
+        self,
+        quote: str = 'USDT',
+        max_age: Optional[float] = None,
+    ) -> Optional[TickerSnapshot]:
+        """
+        获取全市场 ticker 快照
+        
+        一次 fetch_tickers 拉取全部活跃交易对，max_age 秒内重复调用直接复用；
+        并发调用方会等待同一次请求完成，不会重复下载。
+        
+        Args:
+            quote: 计价货币
+            max_age: 快照最大允许年龄 (秒)，默认 TICKER_SNAPSHOT_TTL
+            
+        Returns:
+            TickerSnapshot 或 None
+        """
+        max_age = self.TICKER_SNAPSHOT_TTL if max_age is None else max_age
+        
+        with self._snapshot_lock:
+            cached = self._ticker_snapshots.get(quote)
+            if cached is not None and (datetime.now() - cached.fetched_at).total_seconds() < max_age:
+                return cached
+            
+            try:
+                self._ensure_markets_loaded()
+                symbols = self._active_quote_symbols(quote)
+                
+                if self.exchange.has.get('fetchTickers', False):
+                    all_tickers = self._request('fetch_tickers')
+                    tickers = {s: all_tickers[s] for s in symbols if s in all_tickers}
+                else:
+                    logger.warning(
+                        f"{self.exchange_id} 不支持 fetchTickers，"
+                        f"仅获取前 {self.FALLBACK_SNAPSHOT_LIMIT} 个交易对"
+                    )
+                    tickers = {}
+                    for symbol in symbols[:self.FALLBACK_SNAPSHOT_LIMIT]:
+                        try:
+                            tickers[symbol] = self._request('fetch_ticker', symbol)
+                        except Exception as e:
+                            logger.debug(f"获取 {symbol} 行情失败: {e}")
+                
+                snapshot = TickerSnapshot.from_tickers(
+                    self.exchange_id, tickers, self._markets_cache
+                )
+                self._ticker_snapshots[quote] = snapshot
+                logger.debug(f"全市场快照 {quote}: {len(snapshot)} 个交易对")
+                return snapshot
+                
+            except Exception as e:
+                logger.error(f"获取全市场行情快照失败: {e}")
+                return None
+    
     def get_top_gainers(self, quote: str = 'USDT', limit: int = 10) -> List[CryptoRealtimeQuote]:
         """
         获取涨幅榜
@@ -649,86 +1387,87 @@ class CCXTFetcher:
         Returns:
             按涨幅排序的行情列表
         """
-        try:
-            self._ensure_markets_loaded()
-            
-            # 获取所有 USDT 交易对
-            usdt_symbols = [
-                s for s in self._markets_cache.keys()
-                if s.endswith(f'/{quote}') and self._markets_cache[s].get('active', True)
-            ]
-            
-            # 限制数量避免请求过多
-            usdt_symbols = usdt_symbols[:100]
-            
-            quotes = self.get_multiple_quotes(usdt_symbols)
-            
-            # 按涨幅排序
-            sorted_quotes = sorted(
-                quotes.values(),
-                key=lambda x: x.change_24h,
-                reverse=True
-            )
-            
-            return sorted_quotes[:limit]
-            
-        except Exception as e:
-            logger.error(f"获取涨幅榜失败: {e}")
+        snapshot = self.get_ticker_snapshot(quote)
+        if snapshot is None:
+            logger.error("获取涨幅榜失败: 无行情快照")
             return []
+        return snapshot.top_quotes('change_24h', limit)
     
     def get_top_losers(self, quote: str = 'USDT', limit: int = 10) -> List[CryptoRealtimeQuote]:
         """
         获取跌幅榜
         """
-        try:
-            self._ensure_markets_loaded()
-            
-            usdt_symbols = [
-                s for s in self._markets_cache.keys()
-                if s.endswith(f'/{quote}') and self._markets_cache[s].get('active', True)
-            ]
-            
-            usdt_symbols = usdt_symbols[:100]
-            quotes = self.get_multiple_quotes(usdt_symbols)
-            
-            sorted_quotes = sorted(
-                quotes.values(),
-                key=lambda x: x.change_24h,
-                reverse=False
-            )
-            
-            return sorted_quotes[:limit]
-            
-        except Exception as e:
-            logger.error(f"获取跌幅榜失败: {e}")
+        snapshot = self.get_ticker_snapshot(quote)
+        if snapshot is None:
+            logger.error("获取跌幅榜失败: 无行情快照")
             return []
+        return snapshot.top_quotes('change_24h', limit, ascending=True)
     
     def get_top_volume(self, quote: str = 'USDT', limit: int = 10) -> List[CryptoRealtimeQuote]:
         """
         获取成交额榜
         """
-        try:
-            self._ensure_markets_loaded()
-            
-            usdt_symbols = [
-                s for s in self._markets_cache.keys()
-                if s.endswith(f'/{quote}') and self._markets_cache[s].get('active', True)
-            ]
-            
-            usdt_symbols = usdt_symbols[:100]
-            quotes = self.get_multiple_quotes(usdt_symbols)
-            
-            sorted_quotes = sorted(
-                quotes.values(),
-                key=lambda x: x.quote_volume_24h,
-                reverse=True
-            )
-            
-            return sorted_quotes[:limit]
-            
-        except Exception as e:
-            logger.error(f"获取成交额榜失败: {e}")
+        snapshot = self.get_ticker_snapshot(quote)
+        if snapshot is None:
+            logger.error("获取成交额榜失败: 无行情快照")
             return []
+        return snapshot.top_quotes('quote_volume_24h', limit)
+
+
+# 进程级请求合并：所有 CCXTFetcher 实例共用
+_request_flight = SingleFlight()
+
+
+# 进程级共享 Fetcher 注册表
+_shared_fetchers: Dict[Tuple[str, str, str], CCXTFetcher] = {}
+_shared_fetchers_lock = threading.Lock()
+
+
+def get_shared_fetcher(
+    exchange: str = 'binance',
+    api_key: str = '',
+    api_secret: str = '',
+    passphrase: str = '',
+    **kwargs,
+) -> CCXTFetcher:
+    """
+    获取进程内共享的 CCXTFetcher（按交易所 + 凭证区分）
+    
+    同一交易所的所有调用方共用一个实例，市场信息只加载一次。
+    首次创建时使用 kwargs 中的参数；后续调用如传入 candle_store
+    而共享实例尚未配置，则补充挂载。
+    
+    Args:
+        exchange: 交易所名称
+        api_key: API Key
+        api_secret: API Secret
+        passphrase: API Passphrase (OKX需要)
+        **kwargs: 其余 CCXTFetcher 构造参数
+    """
+    secret_digest = hashlib.sha256(f"{api_secret}:{passphrase}".encode()).hexdigest()
+    key = (exchange.lower(), api_key or '', secret_digest)
+    
+    with _shared_fetchers_lock:
+        fetcher = _shared_fetchers.get(key)
+        if fetcher is None:
+            fetcher = CCXTFetcher(
+                exchange=exchange,
+                api_key=api_key,
+                api_secret=api_secret,
+                passphrase=passphrase,
+                **kwargs,
+            )
+            _shared_fetchers[key] = fetcher
+        elif fetcher.candle_store is None and kwargs.get('candle_store') is not None:
+            fetcher.candle_store = kwargs['candle_store']
+        
+        return fetcher
+
+
+def clear_shared_fetchers() -> None:
+    """清空共享 Fetcher 注册表（主要用于测试）"""
+    with _shared_fetchers_lock:
+        _shared_fetchers.clear()
 
 
 # 便捷函数
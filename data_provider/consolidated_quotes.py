@@ -0,0 +1,384 @@
+"""
+跨交易所聚合行情
+
+同一组交易对并发向多个交易所请求行情，汇总为：
+- 最优买卖价（best bid / best ask）及所在交易所
+- 按 24h 成交量加权的价格（VWAP）
+- 各交易所买卖价差
+- 跨交易所价格离散度（极差与标准差，相对 VWAP 的百分比）
+
+每个交易所有独立的超时，超时或报错的交易所进入冷却期（地区封锁冷却更久），
+冷却期内直接跳过，单个不稳定的交易所不会拖住整轮分析。
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+
+from .ccxt_fetcher import CCXTFetcher, CryptoRealtimeQuote, get_shared_fetcher
+
+logger = logging.getLogger(__name__)
+
+
+# 地区封锁 / 权限类错误：HTTP 状态码（如 Binance 对受限地区返回 451）与响应中的提示语
+GEO_BLOCK_STATUS = (403, 451)
+GEO_BLOCK_PHRASES = ('restricted location', 'not available in your', 'unavailable for legal reasons')
+
+# ccxt HTTP 错误消息格式：'{交易所} {方法} {URL} {状态码} {原因} {响应体}'
+_CCXT_HTTP_ERROR = re.compile(r'^\S+ (?:GET|POST|PUT|DELETE|PATCH) \S+ (\d{3})\b')
+_URL = re.compile(r'\S+://\S+')
+_STATUS_TOKEN = re.compile(r'\b(403|451)\b')
+
+
+class VenueHealth:
+    """
+    单个交易所的健康状况
+
+    记录最近的延迟样本与连续失败次数；失败后按指数退避进入冷却期，
+    地区封锁直接冷却 GEO_BLOCK_COOLDOWN 秒。
+    """
+
+    BASE_COOLDOWN = 30.0
+    MAX_COOLDOWN = 600.0
+    GEO_BLOCK_COOLDOWN = 3600.0
+    LATENCY_SAMPLES = 50
+
+    def __init__(self, exchange: str):
+        self.exchange = exchange
+        self.consecutive_failures = 0
+        self.total_success = 0
+        self.total_failures = 0
+        self.last_error = ''
+        self.cooldown_until = 0.0
+        self.latencies: deque = deque(maxlen=self.LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        """是否不在冷却期"""
+        return time.monotonic() >= self.cooldown_until
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.total_success += 1
+            self.cooldown_until = 0.0
+            self.latencies.append(latency)
+
+    def record_failure(self, error: Any, latency: Optional[float] = None):
+        """
+        记录一次失败并设置冷却期
+
+        Args:
+            error: 异常或描述（超时传入字符串）
+            latency: 失败前已耗时，超时按该值计入延迟样本以拉高分位数
+        """
+        message = str(error)
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self.last_error = message[:200]
+            if latency is not None:
+                self.latencies.append(latency)
+
+            if is_geo_blocked(error):
+                cooldown = self.GEO_BLOCK_COOLDOWN
+            else:
+                cooldown = min(self.BASE_COOLDOWN * 2 ** (self.consecutive_failures - 1), self.MAX_COOLDOWN)
+            self.cooldown_until = time.monotonic() + cooldown
+
+        logger.warning(f"[{self.exchange}] 请求失败（连续 {self.consecutive_failures} 次），冷却 {cooldown:.0f} 秒: {message[:120]}")
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """延迟分位数 (秒)，无样本时返回 None"""
+        with self._lock:
+            if not self.latencies:
+                return None
+            return float(np.percentile(np.fromiter(self.latencies, dtype=np.float64), percentile))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'available': self.is_available(),
+            'success': self.total_success,
+            'failures': self.total_failures,
+            'consecutive_failures': self.consecutive_failures,
+            'p50_latency': self.latency_percentile(50),
+            'p90_latency': self.latency_percentile(90),
+            'last_error': self.last_error,
+        }
+
+
+def _http_status(error: Any) -> Optional[int]:
+    """错误对应的 HTTP 状态码（无法确定时返回 None）"""
+    response = getattr(error, 'response', None)
+    for status in (getattr(response, 'status_code', None), getattr(error, 'status', None)):
+        if isinstance(status, int):
+            return status
+    match = _CCXT_HTTP_ERROR.match(str(error))
+    return int(match.group(1)) if match else None
+
+
+def is_geo_blocked(error: Any) -> bool:
+    """
+    判断错误是否为地区封锁 / 访问被拒
+
+    依次依据：ccxt 异常类型（权限类为封锁，超时、限速不是）、HTTP 状态码、
+    响应中的提示语。ccxt 错误消息包含 URL 与响应体（常带毫秒时间戳），
+    状态码只取消息中的状态码字段或去掉 URL 后的完整数字，不做子串匹配。
+    """
+    try:
+        import ccxt
+        if isinstance(error, (ccxt.PermissionDenied, ccxt.AccountSuspended)):
+            return True
+        if isinstance(error, (ccxt.RequestTimeout, ccxt.RateLimitExceeded)):
+            return False
+    except ImportError:
+        pass
+
+    message = str(error).lower()
+    if any(phrase in message for phrase in GEO_BLOCK_PHRASES):
+        return True
+
+    status = _http_status(error)
+    if status is not None:
+        return status in GEO_BLOCK_STATUS
+    return _STATUS_TOKEN.search(_URL.sub(' ', message)) is not None
+
+
+@dataclass
+class ConsolidatedQuote:
+    """跨交易所聚合行情"""
+    symbol: str
+    venues: Dict[str, CryptoRealtimeQuote]          # 交易所 -> 行情
+
+    best_bid: float = 0.0
+    best_bid_venue: str = ''
+    best_ask: float = 0.0
+    best_ask_venue: str = ''
+    vwap: float = 0.0                               # 24h 成交量加权价格
+    total_volume_24h: float = 0.0                   # 各交易所 24h 成交量合计（基础货币）
+    venue_spreads: Dict[str, float] = field(default_factory=dict)  # 交易所 -> 买卖价差 (%)
+    dispersion_pct: float = 0.0                     # 跨交易所价格极差 / VWAP (%)
+    dispersion_std_pct: float = 0.0                 # 跨交易所价格标准差 / VWAP (%)
+    failed_venues: List[str] = field(default_factory=list)
+    timestamp: datetime = field(default_factory=datetime.now)
+
+    @property
+    def crossed(self) -> bool:
+        """最优买价高于最优卖价（跨交易所存在价差套利空间）"""
+        return self.best_bid > 0 and self.best_ask > 0 and self.best_bid > self.best_ask
+
+    @property
+    def consolidated_spread(self) -> float:
+        """聚合后的买卖价差 (%)"""
+        if self.best_bid > 0 and self.best_ask > 0:
+            return (self.best_ask - self.best_bid) / self.best_bid * 100
+        return 0.0
+
+    @classmethod
+    def from_venues(
+        cls,
+        symbol: str,
+        venues: Dict[str, CryptoRealtimeQuote],
+        failed_venues: Optional[List[str]] = None,
+    ) -> 'ConsolidatedQuote':
+        """由各交易所行情计算聚合指标"""
+        result = cls(symbol=symbol, venues=venues, failed_venues=list(failed_venues or []))
+        if not venues:
+            return result
+
+        names = list(venues)
+        price = np.array([venues[v].price for v in names], dtype=np.float64)
+        volume = np.array([venues[v].volume_24h for v in names], dtype=np.float64)
+        bid = np.array([venues[v].bid for v in names], dtype=np.float64)
+        ask = np.array([venues[v].ask for v in names], dtype=np.float64)
+
+        valid_bid = np.where(bid > 0, bid, -np.inf)
+        valid_ask = np.where(ask > 0, ask, np.inf)
+        if np.isfinite(valid_bid).any():
+            i = int(np.argmax(valid_bid))
+            result.best_bid, result.best_bid_venue = float(bid[i]), names[i]
+        if np.isfinite(valid_ask).any():
+            i = int(np.argmin(valid_ask))
+            result.best_ask, result.best_ask_venue = float(ask[i]), names[i]
+
+        priced = price > 0
+        if priced.any():
+            p, w = price[priced], volume[priced]
+            result.total_volume_24h = float(w.sum())
+            result.vwap = float(np.average(p, weights=w)) if w.sum() > 0 else float(p.mean())
+            if p.size > 1 and result.vwap > 0:
+                result.dispersion_pct = float((p.max() - p.min()) / result.vwap * 100)
+                result.dispersion_std_pct = float(p.std() / result.vwap * 100)
+
+        result.venue_spreads = {v: venues[v].spread for v in names if venues[v].spread > 0}
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为分析上下文使用的字典"""
+        return {
+            'venues': {
+                v: {'price': q.price, 'bid': q.bid, 'ask': q.ask, 'volume_24h': q.volume_24h}
+                for v, q in self.venues.items()
+            },
+            'best_bid': self.best_bid,
+            'best_bid_venue': self.best_bid_venue,
+            'best_ask': self.best_ask,
+            'best_ask_venue': self.best_ask_venue,
+            'vwap': self.vwap,
+            'venue_spreads': self.venue_spreads,
+            'dispersion_pct': self.dispersion_pct,
+            'dispersion_std_pct': self.dispersion_std_pct,
+            'crossed': self.crossed,
+            'failed_venues': self.failed_venues,
+        }
+
+
+class ConsolidatedQuoteService:
+    """
+    跨交易所聚合行情服务
+
+    使用示例：
+        service = ConsolidatedQuoteService(['okx', 'binance', 'bybit'], timeout=5)
+        quotes = service.get_quotes(['BTC/USDT', 'ETH/USDT'])
+        btc = quotes['BTC/USDT']
+        print(btc.best_bid_venue, btc.best_ask_venue, btc.vwap, btc.dispersion_pct)
+    """
+
+    def __init__(
+        self,
+        exchanges: List[str],
+        timeout: float = 5.0,
+        fetchers: Optional[Dict[str, CCXTFetcher]] = None,
+        **fetcher_kwargs,
+    ):
+        """
+        Args:
+            exchanges: 参与聚合的交易所
+            timeout: 单个交易所的超时 (秒)，超时的交易所本轮视为失败
+            fetchers: 预先创建的 Fetcher（未提供的交易所使用 get_shared_fetcher）
+            **fetcher_kwargs: 创建共享 Fetcher 时的参数
+        """
+        self.exchanges = [e.lower() for e in dict.fromkeys(exchanges)]
+        self.timeout = timeout
+        self._fetchers: Dict[str, CCXTFetcher] = dict(fetchers or {})
+        self._fetcher_kwargs = fetcher_kwargs
+        self._fetchers_lock = threading.Lock()
+        self.health: Dict[str, VenueHealth] = {e: VenueHealth(e) for e in self.exchanges}
+
+        # 超时的请求仍在后台线程中运行，线程数留出余量
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(2 * len(self.exchanges), 2),
+            thread_name_prefix='consolidated-quote',
+        )
+
+        logger.info(f"跨交易所聚合行情: {', '.join(self.exchanges)} (超时 {timeout}s)")
+
+    def _fetcher(self, exchange: str) -> CCXTFetcher:
+        with self._fetchers_lock:
+            fetcher = self._fetchers.get(exchange)
+            if fetcher is None:
+                fetcher = get_shared_fetcher(exchange=exchange, **self._fetcher_kwargs)
+                self._fetchers[exchange] = fetcher
+            return fetcher
+
+    def available_venues(self) -> List[str]:
+        """当前不在冷却期的交易所"""
+        return [e for e in self.exchanges if self.health[e].is_available()]
+
+    def _fetch_venue(self, exchange: str, symbols: List[str]) -> Tuple[Dict[str, CryptoRealtimeQuote], float]:
+        """请求单个交易所，返回 (行情, 耗时秒数)"""
+        started = time.monotonic()
+        table = self._fetcher(exchange).fetch_quote_table(symbols)
+        return dict(table.as_mapping()), time.monotonic() - started
+
+    def get_quotes(self, symbols: List[str]) -> Dict[str, ConsolidatedQuote]:
+        """
+        并发获取各交易所行情并按交易对聚合
+
+        Args:
+            symbols: 标准交易对列表 (如 ['BTC/USDT', 'ETH/USDT'])
+
+        Returns:
+            {symbol: ConsolidatedQuote}；所有交易所都失败的交易对不在结果中
+        """
+        venues = self.available_venues()
+        skipped = [e for e in self.exchanges if e not in venues]
+        if not venues:
+            logger.warning("所有交易所均处于冷却期，跳过聚合行情")
+            return {}
+
+        started = time.monotonic()
+        futures = {self._executor.submit(self._fetch_venue, e, symbols): e for e in venues}
+        done, pending = wait(futures, timeout=self.timeout)
+
+        per_venue: Dict[str, Dict[str, CryptoRealtimeQuote]] = {}
+        failed = list(skipped)
+        for future, exchange in futures.items():
+            if future in pending:
+                self.health[exchange].record_failure(f"超时 ({self.timeout}s)", latency=self.timeout)
+                failed.append(exchange)
+                continue
+            try:
+                per_venue[exchange], elapsed = future.result()
+                self.health[exchange].record_success(elapsed)
+            except Exception as e:
+                self.health[exchange].record_failure(e, latency=time.monotonic() - started)
+                failed.append(exchange)
+
+        results = {}
+        for symbol in symbols:
+            venue_quotes = {e: q[symbol] for e, q in per_venue.items() if symbol in q}
+            if venue_quotes:
+                results[symbol] = ConsolidatedQuote.from_venues(symbol, venue_quotes, failed)
+
+        logger.debug(
+            f"聚合行情完成: {len(results)}/{len(symbols)} 个交易对, "
+            f"成功 {list(per_venue)}, 失败 {failed}, 耗时 {time.monotonic() - started:.2f}s"
+        )
+        return results
+
+    def get_quote(self, symbol: str) -> Optional[ConsolidatedQuote]:
+        """获取单个交易对的聚合行情"""
+        return self.get_quotes([symbol]).get(symbol)
+
+    def health_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各交易所健康状况"""
+        return {e: h.stats() for e, h in self.health.items()}
+
+    def close(self):
+        """关闭线程池（不等待仍在运行的超时请求）"""
+        self._executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    # 自检：地区封锁判定只看异常类型、状态码与提示语，URL / 响应体中的时间戳不误判
+    import ccxt
+
+    url = 'https://www.okx.com/api/v5/market/candles?instId=BTC-USDT&bar=4H&after=1717004510000'
+    assert not is_geo_blocked(ccxt.RequestTimeout(f'okx GET {url} request timed out (10000 ms)'))
+    assert not is_geo_blocked(ccxt.RateLimitExceeded(
+        'binance {"code":-1003,"msg":"Too many requests; IP banned until 1717000403000."}'))
+    assert not is_geo_blocked(ccxt.ExchangeNotAvailable(
+        f'okx GET {url} 503 Service Unavailable {{"ts":"1717000451000"}}'))
+    assert not is_geo_blocked(ConnectionError(f'HTTPSConnectionPool: Max retries exceeded with url: {url}'))
+    assert not is_geo_blocked('超时 (15.0s)')
+
+    assert is_geo_blocked(ccxt.ExchangeNotAvailable(
+        'binance GET https://api.binance.com/api/v3/exchangeInfo 451 Unavailable For Legal Reasons '
+        '{"code":0,"msg":"Service unavailable from a restricted location"}'))
+    assert is_geo_blocked(ccxt.ExchangeNotAvailable('bybit GET https://api.bybit.com/v5/market/tickers 403 Forbidden '))
+    assert is_geo_blocked(ccxt.PermissionDenied('okx {"code":"50119"}'))
+    assert is_geo_blocked(RuntimeError('HTTP 451 from upstream'))
+
+    health = VenueHealth('okx')
+    health.record_failure(ccxt.RequestTimeout(f'okx GET {url} request timed out'))
+    assert health.cooldown_until - time.monotonic() <= VenueHealth.BASE_COOLDOWN
+    print("OK: 地区封锁判定")
@@ -0,0 +1,368 @@
+"""
+加密货币数据源管理器（多交易所故障切换 + 对冲请求）
+
+与 A 股的 DataFetcherManager 对应：管理多个 ccxt 交易所，
+按观测到的延迟与健康状况排序，并对慢请求发起对冲：
+
+1. 先向排名第一的交易所发起请求
+2. 若超过该交易所历史延迟的分位数（默认 P90）仍未返回，
+   再向下一个交易所发起同样的请求
+3. 任意一个交易所先返回有效结果即采用；出错或返回空结果时立即切换下一个
+
+各 Fetcher 以 raise_errors=True 调用：网络、限速、地区封锁等错误计入交易所健康状况，
+交易对未上市（返回空结果）只切换、不计失败。
+
+慢请求不必等满 ccxt 的 30 秒超时，抓取阶段的尾延迟因此大幅下降。
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, List, Dict, Any, Tuple, Callable
+
+from .base import DataFetchError
+from .ccxt_fetcher import CCXTFetcher, CryptoRealtimeQuote, CryptoKlineData, get_shared_fetcher
+from .consolidated_quotes import VenueHealth
+
+logger = logging.getLogger(__name__)
+
+
+class CryptoFetcherManager:
+    """
+    多交易所数据源管理器
+
+    使用示例：
+        manager = CryptoFetcherManager(['okx', 'bybit', 'binance'])
+        quote, venue = manager.get_realtime_quote('BTC/USDT')
+        klines, venue = manager.get_multi_timeframe_klines('BTC/USDT', ['1d', '4h'])
+    """
+
+    # 延迟样本不足时的对冲等待 (秒)
+    DEFAULT_HEDGE_DELAY = 1.0
+    # 判定延迟分位数所需的最少样本数
+    MIN_LATENCY_SAMPLES = 5
+
+    def __init__(
+        self,
+        exchanges: List[str],
+        fetchers: Optional[Dict[str, CCXTFetcher]] = None,
+        hedge_percentile: float = 90.0,
+        min_hedge_delay: float = 0.2,
+        max_hedge_delay: float = 5.0,
+        timeout: float = 15.0,
+        **fetcher_kwargs,
+    ):
+        """
+        Args:
+            exchanges: 交易所列表（顺序即初始优先级，第一个为主交易所）
+            fetchers: 预先创建的 Fetcher（未提供的交易所使用 get_shared_fetcher）
+            hedge_percentile: 超过主交易所该延迟分位数后发起对冲请求
+            min_hedge_delay / max_hedge_delay: 对冲等待时间的上下限 (秒)
+            timeout: 单次调用的总超时 (秒)
+            **fetcher_kwargs: 创建共享 Fetcher 时的参数
+        """
+        self.exchanges = [e.lower() for e in dict.fromkeys(exchanges)]
+        if not self.exchanges:
+            raise ValueError("至少需要一个交易所")
+
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.timeout = timeout
+
+        self._fetchers: Dict[str, CCXTFetcher] = dict(fetchers or {})
+        self._fetcher_kwargs = fetcher_kwargs
+        self._fetchers_lock = threading.Lock()
+        self.health: Dict[str, VenueHealth] = {e: VenueHealth(e) for e in self.exchanges}
+
+        # 统计
+        self.hedged = 0
+        self.hedge_wins = 0
+
+        # 被对冲淘汰的请求仍在后台运行，线程数留出余量
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(4 * len(self.exchanges), 4),
+            thread_name_prefix='crypto-hedge',
+        )
+
+        logger.info(f"加密货币数据源: {', '.join(self.exchanges)} (P{hedge_percentile:g} 对冲)")
+
+    @property
+    def primary(self) -> CCXTFetcher:
+        """主交易所的 Fetcher"""
+        return self.fetcher(self.exchanges[0])
+
+    def fetcher(self, exchange: str) -> CCXTFetcher:
+        """获取交易所对应的 Fetcher（首次使用时创建）"""
+        with self._fetchers_lock:
+            fetcher = self._fetchers.get(exchange)
+            if fetcher is None:
+                fetcher = get_shared_fetcher(exchange=exchange, **self._fetcher_kwargs)
+                self._fetchers[exchange] = fetcher
+            return fetcher
+
+    def ranked_venues(self) -> List[str]:
+        """
+        按健康状况与延迟排序的交易所
+
+        排序依据：不在冷却期 > 连续失败少 > 中位延迟低 > 配置顺序。
+        样本不足的交易所按配置顺序排在有样本的交易所之间，不会因为没测过而被冷落。
+        冷却期内的交易所排在最后，作为兜底。
+        """
+        def key(item: Tuple[int, str]):
+            order, exchange = item
+            health = self.health[exchange]
+            p50 = health.latency_percentile(50)
+            return (
+                not health.is_available(),
+                health.consecutive_failures,
+                p50 if p50 is not None else 0.0,
+                order,
+            )
+
+        return [e for _, e in sorted(enumerate(self.exchanges), key=key)]
+
+    def _hedge_delay(self, exchange: str) -> float:
+        """等待该交易所多久后发起对冲"""
+        health = self.health[exchange]
+        if len(health.latencies) < self.MIN_LATENCY_SAMPLES:
+            delay = self.DEFAULT_HEDGE_DELAY
+        else:
+            delay = health.latency_percentile(self.hedge_percentile)
+        return min(max(delay, self.min_hedge_delay), self.max_hedge_delay)
+
+    def _run(self, exchange: str, fn: Callable[[CCXTFetcher], Any], is_valid: Callable[[Any], bool]) -> Any:
+        """
+        在交易所上执行一次请求并记录健康状况
+
+        空结果抛出 DataFetchError 以触发切换，但不计入失败次数：
+        交易对在该交易所未上市也会返回空结果，不应让交易所进入冷却。
+        """
+        started = time.monotonic()
+        try:
+            result = fn(self.fetcher(exchange))
+        except Exception as e:
+            self.health[exchange].record_failure(e, latency=time.monotonic() - started)
+            raise
+        if not is_valid(result):
+            raise DataFetchError("返回空结果")
+        self.health[exchange].record_success(time.monotonic() - started)
+        return result
+
+    def call(
+        self,
+        description: str,
+        fn: Callable[[CCXTFetcher], Any],
+        is_valid: Callable[[Any], bool] = lambda r: r is not None,
+    ) -> Tuple[Any, str]:
+        """
+        以对冲方式在多个交易所上执行同一请求
+
+        Args:
+            description: 请求描述（日志用）
+            fn: 接收 CCXTFetcher、返回结果的函数
+            is_valid: 结果是否有效（无效视为失败并立即切换）
+
+        Returns:
+            Tuple[结果, 交易所名称]
+
+        Raises:
+            DataFetchError: 所有交易所都失败或超时
+        """
+        venues = self.ranked_venues()
+        deadline = time.monotonic() + self.timeout
+        pending: Dict[Future, str] = {}
+        errors: List[str] = []
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            exchange = venues[next_index]
+            next_index += 1
+            pending[self._executor.submit(self._run, exchange, fn, is_valid)] = exchange
+            return exchange
+
+        launch()
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            can_hedge = next_index < len(venues)
+            if can_hedge:
+                # 对冲等待按最近一次发起的交易所计算
+                wait_for = min(self._hedge_delay(venues[next_index - 1]), remaining)
+            else:
+                wait_for = remaining
+
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            if not done:
+                if can_hedge:
+                    hedge = launch()
+                    self.hedged += 1
+                    logger.info(f"[对冲] {description}: {venues[next_index - 2]} 超过 {wait_for:.2f}s，追加请求 {hedge}")
+                continue
+
+            for future in done:
+                exchange = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"[{exchange}] {e}")
+                    continue
+                if exchange != venues[0]:
+                    self.hedge_wins += 1
+                    logger.info(f"[对冲] {description}: 采用 {exchange} 的结果")
+                return result, exchange
+
+            # 已完成的请求都失败：不等对冲延迟，立即切换到下一个交易所
+            if next_index < len(venues):
+                launch()
+
+        for future, exchange in pending.items():
+            errors.append(f"[{exchange}] 超时 ({self.timeout}s)")
+
+        error_summary = f"所有交易所获取 {description} 失败: " + "; ".join(errors)
+        logger.error(error_summary)
+        raise DataFetchError(error_summary)
+
+    def get_realtime_quote(self, symbol: str) -> Tuple[CryptoRealtimeQuote, str]:
+        """获取实时行情，返回 (行情, 交易所)"""
+        return self.call(
+            f"{symbol} 行情",
+            lambda f: f.get_realtime_quote(symbol, raise_errors=True),
+        )
+
+    def get_kline(self, symbol: str, timeframe: str = '1d', limit: int = 100) -> Tuple[CryptoKlineData, str]:
+        """获取 K 线，返回 (K 线, 交易所)"""
+        return self.call(
+            f"{symbol} {timeframe} K线",
+            lambda f: f.get_kline(symbol, timeframe=timeframe, limit=limit, raise_errors=True),
+            is_valid=lambda k: k is not None and not k.data.empty,
+        )
+
+    def get_multi_timeframe_klines(
+        self,
+        symbol: str,
+        timeframes: List[str],
+        limit: int = 100,
+    ) -> Tuple[Dict[str, CryptoKlineData], str]:
+        """获取多周期 K 线（同一交易所），返回 ({周期: K 线}, 交易所)"""
+        return self.call(
+            f"{symbol} {'/'.join(timeframes)} K线",
+            lambda f: f.get_multi_timeframe_klines(symbol, timeframes, limit=limit, raise_errors=True),
+            is_valid=lambda ks: bool(ks) and all(
+                ks.get(tf) is not None and not ks[tf].data.empty for tf in timeframes
+            ),
+        )
+
+    def get_orderbook(self, symbol: str, limit: int = 20) -> Tuple[Dict[str, Any], str]:
+        """获取订单簿，返回 (订单簿, 交易所)"""
+        return self.call(
+            f"{symbol} 订单簿",
+            lambda f: f.get_orderbook(symbol, limit=limit, raise_errors=True),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """各交易所健康状况与对冲统计"""
+        return {
+            'ranking': self.ranked_venues(),
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'venues': {e: h.stats() for e, h in self.health.items()},
+        }
+
+    def close(self):
+        """关闭线程池（不等待仍在运行的请求）"""
+        self._executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    # 自检：主交易所偶发 3 秒慢请求，对冲后整体尾延迟应接近备用交易所的延迟
+    import random
+
+    class _FakeFetcher:
+        def __init__(self, name: str, latency: float, slow_rate: float):
+            self.name = name
+            self.latency = latency
+            self.slow_rate = slow_rate
+
+        def get_realtime_quote(self, symbol: str, raise_errors: bool = False):
+            time.sleep(3.0 if random.random() < self.slow_rate else self.latency)
+            return f"{self.name}:{symbol}"
+
+    random.seed(1)
+    manager = CryptoFetcherManager(
+        ['okx', 'bybit'],
+        fetchers={'okx': _FakeFetcher('okx', 0.05, 0.15), 'bybit': _FakeFetcher('bybit', 0.08, 0.0)},
+    )
+
+    durations = []
+    for i in range(40):
+        t0 = time.monotonic()
+        quote, venue = manager.get_realtime_quote('BTC/USDT')
+        durations.append(time.monotonic() - t0)
+
+    durations.sort()
+    assert durations[-1] < 1.5, durations[-1]
+    print(f"OK: 中位 {durations[len(durations) // 2] * 1000:.0f} ms, 最慢 {durations[-1] * 1000:.0f} ms, "
+          f"对冲 {manager.hedged} 次, 备用胜出 {manager.hedge_wins} 次")
+    manager.close()
+
+    # 自检：主交易所不可用（fetch_ticker 抛错）时计入失败并进入冷却，之后排名靠后；
+    # 交易对未上市（返回 None）只切换，不计失败
+    from data_provider.ccxt_fetcher import CCXTFetcher as _CCXTFetcher
+
+    class _DownExchange:
+        id = 'okx'
+        has = {}
+
+        def fetch_ticker(self, symbol):
+            raise ConnectionError('okx GET /market/ticker 503 ExchangeNotAvailable')
+
+    class _UpFetcher:
+        def get_realtime_quote(self, symbol: str, raise_errors: bool = False):
+            return None if symbol == 'NEW/USDT' else f"bybit:{symbol}"
+
+    down = _CCXTFetcher.__new__(_CCXTFetcher)
+    down.exchange_id = 'okx'
+    down.exchange = _DownExchange()
+    down.quote_stream = None
+    down._markets_loaded = True
+    down._markets_cache = {'BTC/USDT': {}, 'NEW/USDT': {}}
+    down._normalize_symbol = lambda s: s
+    down._request = lambda method, *args, **kwargs: getattr(down.exchange, method)(*args, **kwargs)
+
+    manager = CryptoFetcherManager(['okx', 'bybit'], fetchers={'okx': down, 'bybit': _UpFetcher()})
+    for _ in range(5):
+        quote, venue = manager.get_realtime_quote('BTC/USDT')
+        assert venue == 'bybit'
+    okx = manager.stats()['venues']['okx']
+    assert okx['failures'] == 1 and not okx['available'], okx
+    assert manager.ranked_venues() == ['bybit', 'okx']
+
+    try:
+        manager.get_realtime_quote('NEW/USDT')
+    except DataFetchError:
+        pass
+    assert manager.health['bybit'].consecutive_failures == 0
+    print(f"OK: 主交易所不可用后排名 {manager.ranked_venues()}, okx {okx}")
+    manager.close()
+
+    # 自检：URL 中带时间戳（含 451 / 403 子串）的超时按普通退避冷却，不按地区封锁冷却一小时
+    import ccxt
+
+    class _TimeoutFetcher:
+        def get_realtime_quote(self, symbol: str, raise_errors: bool = False):
+            raise ccxt.RequestTimeout(
+                'okx GET https://www.okx.com/api/v5/market/ticker?instId=BTC-USDT&ts=1717000451403 '
+                'request timed out (10000 ms)'
+            )
+
+    manager = CryptoFetcherManager(['okx', 'bybit'], fetchers={'okx': _TimeoutFetcher(), 'bybit': _UpFetcher()})
+    quote, venue = manager.get_realtime_quote('BTC/USDT')
+    cooldown = manager.health['okx'].cooldown_until - time.monotonic()
+    assert venue == 'bybit' and 0 < cooldown <= VenueHealth.BASE_COOLDOWN, cooldown
+    print(f"OK: 超时冷却 {cooldown:.0f}s")
+    manager.close()
@@ -0,0 +1,329 @@
+"""
+永续合约数据（资金费率、持仓量、标记/指数价格）
+
+与 CCXTFetcher 配合使用：现货交易对自动映射到同交易所的 U 本位永续合约，
+批量获取衍生品数据供趋势分析与 AI 提示词使用。
+
+获取策略：
+1. 交易所支持批量接口（fetch_funding_rates / fetch_open_interests / fetch_mark_prices）时一次请求全部合约
+2. 否则按合约并发单独请求（并发数有上限，请求仍经过 CCXTFetcher 的限速与合并）
+3. 资金费率在一个结算周期内不变，缓存到下次结算；持仓量与标记价格按 ttl 缓存
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Optional, List, Dict, Any, Iterable
+
+import pandas as pd
+
+from .ccxt_fetcher import CCXTFetcher
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DerivativesSnapshot:
+    """单个永续合约的衍生品数据"""
+    symbol: str                                  # 现货交易对 (BTC/USDT)
+    contract: str                                # 永续合约 (BTC/USDT:USDT)
+    exchange: str
+    funding_rate: Optional[float] = None         # 当期资金费率（小数，0.0001 = 0.01%）
+    funding_time: Optional[int] = None           # 下次结算时间 (毫秒)
+    funding_interval_hours: Optional[float] = None
+    mark_price: Optional[float] = None
+    index_price: Optional[float] = None
+    open_interest: Optional[float] = None        # 持仓量（标的数量）
+    open_interest_value: Optional[float] = None  # 持仓价值（计价货币）
+    timestamp: Optional[int] = None              # 最近一次更新 (毫秒)
+
+    @property
+    def basis_pct(self) -> Optional[float]:
+        """基差 (标记价格 - 指数价格) / 指数价格 %"""
+        if not self.mark_price or not self.index_price:
+            return None
+        return (self.mark_price - self.index_price) / self.index_price * 100
+
+    @property
+    def funding_rate_annualized(self) -> Optional[float]:
+        """年化资金费率 %"""
+        if self.funding_rate is None:
+            return None
+        interval = self.funding_interval_hours or 8.0
+        return self.funding_rate * (24 / interval) * 365 * 100
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['basis_pct'] = self.basis_pct
+        data['funding_rate_annualized'] = self.funding_rate_annualized
+        return data
+
+
+class DerivativesFetcher:
+    """
+    永续合约数据获取器
+
+    使用示例：
+        derivatives = DerivativesFetcher(ccxt_fetcher)
+        df = derivatives.get_derivatives(['BTC/USDT', 'ETH/USDT'])   # 每个交易对一行
+        snap = derivatives.get('BTC/USDT')                           # 命中缓存
+    """
+
+    # get_derivatives 返回的列
+    COLUMNS = [
+        'contract', 'funding_rate', 'funding_rate_annualized', 'funding_time',
+        'mark_price', 'index_price', 'basis_pct', 'open_interest', 'open_interest_value',
+    ]
+
+    # 交易所未返回结算时间时的默认资金费率周期 (小时)
+    DEFAULT_FUNDING_INTERVAL_HOURS = 8.0
+
+    def __init__(self, fetcher: CCXTFetcher, max_workers: int = 4, ttl: float = 300.0):
+        """
+        Args:
+            fetcher: 现货 CCXTFetcher（共享其市场信息、限速与请求合并）
+            max_workers: 无批量接口时单独请求的最大并发数
+            ttl: 持仓量与标记/指数价格的缓存时间 (秒)，资金费率缓存到下次结算
+        """
+        self.fetcher = fetcher
+        self.exchange_id = fetcher.exchange_id
+        self.max_workers = max_workers
+        self.ttl = ttl
+
+        self._snapshots: Dict[str, DerivativesSnapshot] = {}
+        self._funding_expiry: Dict[str, float] = {}
+        self._market_expiry: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self._contracts: Dict[str, Optional[str]] = {}
+        self._contracts_markets_id: Optional[int] = None
+
+        # 统计
+        self.requests = 0
+
+    # === 合约映射 ===
+
+    def contract_for(self, symbol: str) -> Optional[str]:
+        """现货交易对对应的 U 本位永续合约，无合约时返回 None"""
+        self.fetcher._ensure_markets_loaded()
+        markets = self.fetcher._markets_cache
+        if self._contracts_markets_id != id(markets):
+            # 市场信息更新后重建映射
+            contracts = {}
+            for market in markets.values():
+                if market.get('swap') and market.get('linear') and market.get('active') is not False \
+                        and market.get('settle') == market.get('quote'):
+                    contracts.setdefault(f"{market['base']}/{market['quote']}", market['symbol'])
+            self._contracts = contracts
+            self._contracts_markets_id = id(markets)
+
+        spot = self.fetcher._normalize_symbol(symbol)
+        return self._contracts.get(spot.split(':')[0])
+
+    # === 数据获取 ===
+
+    def _has(self, feature: str) -> bool:
+        return bool(self.fetcher.exchange.has.get(feature))
+
+    def _request(self, method: str, *args, **kwargs) -> Any:
+        with self._lock:
+            self.requests += 1
+        return self.fetcher._request(method, *args, **kwargs)
+
+    def _fetch_each(self, method: str, contracts: List[str]) -> Dict[str, Dict[str, Any]]:
+        """按合约并发单独请求（失败的合约跳过）"""
+        def fetch_one(contract: str):
+            try:
+                return contract, self._request(method, contract)
+            except Exception as e:
+                logger.debug(f"{self.exchange_id} {method} {contract} 失败: {e}")
+                return contract, None
+
+        workers = min(self.max_workers, len(contracts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='derivatives') as executor:
+            return {c: r for c, r in executor.map(fetch_one, contracts) if r}
+
+    def _fetch_bulk_or_each(
+        self,
+        bulk_method: str,
+        bulk_feature: str,
+        single_method: str,
+        single_feature: str,
+        contracts: List[str],
+    ) -> Dict[str, Dict[str, Any]]:
+        """优先批量接口，不支持或失败时退化为单独请求"""
+        if self._has(bulk_feature):
+            try:
+                result = self._request(bulk_method, contracts)
+                # 部分交易所忽略 symbols 参数返回全部合约
+                wanted = set(contracts)
+                return {k: v for k, v in (result or {}).items() if k in wanted}
+            except Exception as e:
+                logger.debug(f"{self.exchange_id} {bulk_method} 批量请求失败，改为逐个请求: {e}")
+        if self._has(single_feature):
+            return self._fetch_each(single_method, contracts)
+        return {}
+
+    def _apply_funding(self, contracts: List[str], now: float) -> List[str]:
+        """更新资金费率，返回同时带回了标记价格的合约"""
+        with_mark = []
+        rates = self._fetch_bulk_or_each(
+            'fetch_funding_rates', 'fetchFundingRates',
+            'fetch_funding_rate', 'fetchFundingRate',
+            contracts,
+        )
+        with self._lock:
+            for contract in contracts:
+                rate = rates.get(contract)
+                if not rate:
+                    # 不支持或失败：一个 ttl 后再试
+                    self._funding_expiry[contract] = now + self.ttl
+                    continue
+                snap = self._snapshots[contract]
+                snap.funding_rate = rate.get('fundingRate')
+                snap.funding_time = rate.get('fundingTimestamp') or rate.get('nextFundingTimestamp')
+                interval = rate.get('interval')
+                if isinstance(interval, str) and interval.endswith('h'):
+                    snap.funding_interval_hours = float(interval[:-1])
+                if rate.get('markPrice'):
+                    snap.mark_price = rate['markPrice']
+                    snap.index_price = rate.get('indexPrice') or snap.index_price
+                    with_mark.append(contract)
+                snap.timestamp = int(now * 1000)
+
+                if snap.funding_time and snap.funding_time / 1000 > now:
+                    self._funding_expiry[contract] = snap.funding_time / 1000
+                else:
+                    hours = snap.funding_interval_hours or self.DEFAULT_FUNDING_INTERVAL_HOURS
+                    self._funding_expiry[contract] = now + hours * 3600
+        return with_mark
+
+    def _apply_market(self, contracts: List[str], now: float, fresh_marks: Iterable[str] = ()):
+        interests = self._fetch_bulk_or_each(
+            'fetch_open_interests', 'fetchOpenInterests',
+            'fetch_open_interest', 'fetchOpenInterest',
+            contracts,
+        )
+
+        # 本轮资金费率接口未带回标记价格的合约单独批量获取
+        fresh_marks = set(fresh_marks)
+        missing_mark = [c for c in contracts if c not in fresh_marks]
+        marks = {}
+        if missing_mark and self._has('fetchMarkPrices'):
+            try:
+                marks = self._request('fetch_mark_prices', missing_mark) or {}
+            except Exception as e:
+                logger.debug(f"{self.exchange_id} fetch_mark_prices 失败: {e}")
+
+        with self._lock:
+            for contract in contracts:
+                snap = self._snapshots[contract]
+                mark = marks.get(contract)
+                if mark:
+                    snap.mark_price = mark.get('markPrice') or snap.mark_price
+                    snap.index_price = mark.get('indexPrice') or snap.index_price
+
+                oi = interests.get(contract)
+                if oi:
+                    snap.open_interest = oi.get('openInterestAmount')
+                    snap.open_interest_value = oi.get('openInterestValue')
+                    if snap.open_interest_value is None and snap.open_interest and snap.mark_price:
+                        contract_size = self.fetcher._markets_cache.get(contract, {}).get('contractSize') or 1
+                        snap.open_interest_value = snap.open_interest * contract_size * snap.mark_price
+                snap.timestamp = int(now * 1000)
+                self._market_expiry[contract] = now + self.ttl
+
+    def refresh(self, symbols: Iterable[str], force: bool = False) -> Dict[str, DerivativesSnapshot]:
+        """
+        批量更新衍生品数据（只请求缓存过期的部分）
+
+        Returns:
+            {现货交易对: DerivativesSnapshot}，无永续合约的交易对不包含在内
+        """
+        now = time.time()
+        mapping: Dict[str, str] = {}
+        for symbol in symbols:
+            try:
+                contract = self.contract_for(symbol)
+            except Exception as e:
+                logger.debug(f"{symbol} 合约映射失败: {e}")
+                continue
+            if contract:
+                mapping[self.fetcher._normalize_symbol(symbol)] = contract
+
+        with self._lock:
+            for symbol, contract in mapping.items():
+                if contract not in self._snapshots:
+                    self._snapshots[contract] = DerivativesSnapshot(symbol, contract, self.exchange_id)
+            contracts = list(dict.fromkeys(mapping.values()))
+            stale_funding = [c for c in contracts if force or self._funding_expiry.get(c, 0) <= now]
+            stale_market = [c for c in contracts if force or self._market_expiry.get(c, 0) <= now]
+
+        fresh_marks = self._apply_funding(stale_funding, now) if stale_funding else []
+        if stale_market:
+            self._apply_market(stale_market, now, fresh_marks)
+
+        with self._lock:
+            return {symbol: self._snapshots[contract] for symbol, contract in mapping.items()}
+
+    def get(self, symbol: str) -> Optional[DerivativesSnapshot]:
+        """单个交易对的衍生品数据（缓存有效时不发请求）"""
+        return self.refresh([symbol]).get(self.fetcher._normalize_symbol(symbol))
+
+    def get_derivatives(self, symbols: Iterable[str]) -> pd.DataFrame:
+        """
+        批量获取衍生品数据
+
+        Returns:
+            以现货交易对为索引、COLUMNS 为列的 DataFrame
+        """
+        snapshots = self.refresh(symbols)
+        rows = {symbol: snap.to_dict() for symbol, snap in snapshots.items()}
+        return pd.DataFrame.from_dict(rows, orient='index', columns=self.COLUMNS)
+
+
+if __name__ == "__main__":
+    # 自检：模拟只有批量资金费率、没有批量持仓量的交易所
+    class _FakeExchange:
+        has = {'fetchFundingRates': True, 'fetchOpenInterest': True}
+
+    class _FakeFetcher:
+        exchange_id = 'fake'
+        exchange = _FakeExchange()
+        _markets_cache = {
+            f"{b}/USDT:USDT": {'symbol': f"{b}/USDT:USDT", 'base': b, 'quote': 'USDT', 'settle': 'USDT',
+                               'swap': True, 'linear': True, 'contractSize': 1}
+            for b in ['BTC', 'ETH', 'SOL']
+        }
+        calls: List[str] = []
+
+        def _ensure_markets_loaded(self):
+            pass
+
+        def _normalize_symbol(self, symbol):
+            return symbol
+
+        def _request(self, method, *args, **kwargs):
+            self.calls.append(method)
+            next_funding = int(time.time() * 1000) + 3600_000
+            if method == 'fetch_funding_rates':
+                return {c: {'fundingRate': 0.0001, 'fundingTimestamp': next_funding,
+                            'markPrice': 100.5, 'indexPrice': 100.0} for c in self._markets_cache}
+            if method == 'fetch_open_interest':
+                return {'openInterestAmount': 1000.0}
+            raise AssertionError(method)
+
+    fake = _FakeFetcher()
+    derivatives = DerivativesFetcher(fake, ttl=60)
+    df = derivatives.get_derivatives(['BTC/USDT', 'ETH/USDT', 'DOGE/USDT'])
+    assert list(df.index) == ['BTC/USDT', 'ETH/USDT']
+    assert abs(df.loc['BTC/USDT', 'basis_pct'] - 0.5) < 1e-9
+    assert df.loc['ETH/USDT', 'open_interest_value'] == 100500.0
+    assert fake.calls.count('fetch_funding_rates') == 1 and fake.calls.count('fetch_open_interest') == 2
+
+    derivatives.get('BTC/USDT')
+    assert len(fake.calls) == 3, fake.calls  # 缓存命中，不再请求
+    print(df[['funding_rate_annualized', 'basis_pct', 'open_interest_value']])
+    print("OK")
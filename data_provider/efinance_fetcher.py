@@ -36,6 +36,7 @@ from tenacity import (
 )
 
 from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .rate_limiter import get_rate_limiter, EASTMONEY_HOST
 
 
 @dataclass
@@ -151,7 +152,14 @@ class EfinanceFetcher(BaseFetcher):
         """
         self.sleep_min = sleep_min
         self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
+        
+        # efinance 与 akshare 的数据均来自东方财富，共用同一个令牌桶
+        self.rate_limiter = get_rate_limiter(
+            EASTMONEY_HOST,
+            rate=1 / sleep_min,
+            burst=1,
+            jitter=max(sleep_max - sleep_min, 0),
+        )
     
     def _set_random_user_agent(self) -> None:
         """
@@ -171,21 +179,10 @@ class EfinanceFetcher(BaseFetcher):
         强制执行速率限制
         
         策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠
+        1. 从东方财富主机的共享令牌桶获取配额（跨线程、跨数据源实例协调）
+        2. 每次请求间隔在 [sleep_min, sleep_max] 之间随机抖动，模拟人工访问节奏
         """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
-                time.sleep(additional_sleep)
-        
-        # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
+        self.rate_limiter.acquire()
     
     @retry(
         stop=stop_after_attempt(3),  # 最多重试3次
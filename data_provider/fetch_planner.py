@@ -0,0 +1,164 @@
+"""
+K 线拉取计划（按收盘时间对齐）
+
+K 线只在收盘时产生新数据，盘中反复请求只会重复拿到同一根未收盘 K 线。
+规划器知道每个周期的分桶边界（与 resample 模块一致，OKX 6H 以上按 UTC+8），据此：
+- 本地最后一根 K 线仍是当前这一根、且刚拉取过时，跳过请求
+- 有新 K 线开盘时，只拉取缺失的部分
+- 计算下一次收盘后的刷新时间，供定时任务对齐使用
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, Hashable
+
+from .resample import timeframe_to_ms, bucket_origin_ms
+
+logger = logging.getLogger(__name__)
+
+
+def bar_open_ms(timeframe: str, ts_ms: int, exchange: str = '') -> int:
+    """ts_ms 所在 K 线的开盘时间 (毫秒)"""
+    tf_ms = timeframe_to_ms(timeframe)
+    origin = bucket_origin_ms(timeframe, exchange)
+    return (ts_ms - origin) // tf_ms * tf_ms + origin
+
+
+def next_bar_close_ms(timeframe: str, ts_ms: int, exchange: str = '') -> int:
+    """ts_ms 所在 K 线的收盘时间，即下一根 K 线的开盘时间 (毫秒)"""
+    return bar_open_ms(timeframe, ts_ms, exchange) + timeframe_to_ms(timeframe)
+
+
+class KlineFetchPlanner:
+    """
+    K 线拉取规划器（线程安全）
+
+    使用示例：
+        planner = KlineFetchPlanner('okx', partial_max_age=60)
+        if planner.needs_fetch(key, '4h', last_bar_ms):
+            ...  # 拉取
+            planner.record_fetch(key)
+        planner.next_refresh_at('4h')   # 下一根 4h K 线收盘后的刷新时间
+    """
+
+    def __init__(self, exchange: str = '', partial_max_age: float = 60.0, grace_seconds: float = 3.0):
+        """
+        Args:
+            exchange: 交易所名称，决定分桶对齐方式
+            partial_max_age: 未收盘 K 线的最长复用时间 (秒)，超过后重新拉取以更新盘中数据
+            grace_seconds: 收盘后等待交易所生成新 K 线的时间 (秒)
+        """
+        self.exchange = exchange
+        self.partial_max_age = partial_max_age
+        self.grace_seconds = grace_seconds
+        self._fetched_at: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+        # 统计
+        self.skipped = 0
+        self.fetched = 0
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
+
+    @staticmethod
+    def supports(timeframe: str) -> bool:
+        """是否为固定长度周期（月线等无法按收盘时间规划，总是拉取）"""
+        try:
+            timeframe_to_ms(timeframe)
+        except ValueError:
+            return False
+        return True
+
+    def current_bar_open_ms(self, timeframe: str, now_ms: Optional[int] = None) -> int:
+        """当前（未收盘）K 线的开盘时间 (毫秒)"""
+        return bar_open_ms(timeframe, now_ms if now_ms is not None else self._now_ms(), self.exchange)
+
+    def missing_bars(self, timeframe: str, last_bar_ms: int, now_ms: Optional[int] = None) -> int:
+        """从本地最后一根（含，可能未收盘）到当前 K 线需要拉取的根数"""
+        current = self.current_bar_open_ms(timeframe, now_ms)
+        return max((current - last_bar_ms) // timeframe_to_ms(timeframe), 0) + 1
+
+    def needs_fetch(
+        self,
+        key: Hashable,
+        timeframe: str,
+        last_bar_ms: Optional[int],
+        now_ms: Optional[int] = None,
+    ) -> bool:
+        """
+        是否需要请求交易所
+
+        Args:
+            key: 数据标识（如 (symbol, timeframe)）
+            timeframe: 周期
+            last_bar_ms: 本地最后一根 K 线的开盘时间，无本地数据时为 None
+        """
+        now_ms = now_ms if now_ms is not None else self._now_ms()
+        if last_bar_ms is None or not self.supports(timeframe):
+            return True
+
+        # 本地最后一根之后已有新 K 线开盘
+        if last_bar_ms < self.current_bar_open_ms(timeframe, now_ms):
+            return True
+
+        # 仍在同一根 K 线内：上次拉取过久则刷新盘中数据，否则跳过
+        with self._lock:
+            fetched_at = self._fetched_at.get(key)
+        if fetched_at is None or now_ms - fetched_at > self.partial_max_age * 1000:
+            return True
+
+        with self._lock:
+            self.skipped += 1
+        return False
+
+    def record_fetch(self, key: Hashable, now_ms: Optional[int] = None):
+        """记录一次实际拉取"""
+        with self._lock:
+            self._fetched_at[key] = now_ms if now_ms is not None else self._now_ms()
+            self.fetched += 1
+
+    def next_refresh_ms(self, timeframe: str, now_ms: Optional[int] = None) -> int:
+        """下一根 K 线收盘后（加等待时间）的刷新时间 (毫秒)"""
+        now_ms = now_ms if now_ms is not None else self._now_ms()
+        return next_bar_close_ms(timeframe, now_ms, self.exchange) + int(self.grace_seconds * 1000)
+
+    def next_refresh_at(self, timeframe: str, now: Optional[datetime] = None) -> datetime:
+        """下一根 K 线收盘后的刷新时间（本地时间）"""
+        now_ms = int(now.timestamp() * 1000) if now else None
+        return datetime.fromtimestamp(self.next_refresh_ms(timeframe, now_ms) / 1000)
+
+    def seconds_until_refresh(self, timeframe: str, now_ms: Optional[int] = None) -> float:
+        """距离下一次收盘刷新的秒数"""
+        now_ms = now_ms if now_ms is not None else self._now_ms()
+        return (self.next_refresh_ms(timeframe, now_ms) - now_ms) / 1000
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'fetched': self.fetched, 'skipped': self.skipped}
+
+
+if __name__ == "__main__":
+    # 自检：OKX 日线在 UTC 16:00 收盘，Binance 在 UTC 0:00 收盘
+    t_utc = 1704105000000  # 2024-01-01 10:30 UTC
+
+    okx = KlineFetchPlanner('okx', partial_max_age=60)
+    binance = KlineFetchPlanner('binance', partial_max_age=60)
+    assert okx.current_bar_open_ms('1d', t_utc) == 1704038400000  # 12-31 16:00 UTC
+    assert binance.current_bar_open_ms('1d', t_utc) == 1704067200000  # 01-01 00:00 UTC
+    assert okx.seconds_until_refresh('1d', t_utc) == 5.5 * 3600 + okx.grace_seconds
+    assert binance.seconds_until_refresh('4h', t_utc) == 1.5 * 3600 + binance.grace_seconds
+
+    key = ('BTC/USDT', '4h')
+    last_bar = binance.current_bar_open_ms('4h', t_utc)
+    assert binance.needs_fetch(key, '4h', None, t_utc)
+    binance.record_fetch(key, t_utc)
+    assert not binance.needs_fetch(key, '4h', last_bar, t_utc + 30_000)        # 同一根 K 线内，30 秒前刚拉过
+    assert binance.needs_fetch(key, '4h', last_bar, t_utc + 120_000)           # 未收盘 K 线过旧
+    assert binance.needs_fetch(key, '4h', last_bar, t_utc + 2 * 3600 * 1000)   # 新 K 线已开盘
+    assert binance.missing_bars('4h', last_bar, t_utc + 9 * 3600 * 1000) == 3
+    assert binance.needs_fetch(('BTC/USDT', '1M'), '1M', last_bar, t_utc)       # 月线不做规划
+    print(f"OK: {binance.stats()}")
@@ -17,14 +17,29 @@ GeckoTerminal 数据获取模块 - 链上 DEX 代币数据
 """
 
 import logging
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple, TypeVar
+import threading
 import time
 
 import requests
 import pandas as pd
 
+from .singleflight import SingleFlight
+from .rate_limiter import get_rate_limiter
+from .response_cache import ResponseCache, get_shared_response_cache
+from .fetch_planner import KlineFetchPlanner
+
+# 进程级请求合并：所有 GeckoTerminalFetcher 实例共用（同一 API，限速按 IP 计）
+_request_flight = SingleFlight()
+
+T = TypeVar('T')
+
 # 注意：GeckoTerminalFetcher 不继承 BaseFetcher，因为它是为链上 DEX 数据设计的，
 # 有完全不同的接口（get_token_info, get_trending_tokens 等）
 
@@ -85,6 +100,9 @@ class PoolInfo:
     # 流动性
     reserve_usd: float = 0.0
     liquidity_usd: float = 0.0
+    
+    # 时间信息
+    pool_created_at: Optional[datetime] = None
 
 
 @dataclass
@@ -163,6 +181,40 @@ class GeckoTerminalFetcher:
         'ton': 'ton',
     }
     
+    # 响应缓存 TTL（秒），按接口路径匹配，先匹配先用；元数据长、行情短
+    CACHE_TTL_RULES = [
+        (re.compile(r'^/networks$'), 86400),                       # 链列表
+        (re.compile(r'^/networks/[^/]+/dexes$'), 86400),           # DEX 列表
+        (re.compile(r'^/networks/[^/]+/tokens/[^/]+/info$'), 86400),  # 代币元数据
+        (re.compile(r'^/networks/[^/]+/tokens/[^/]+/pools$'), 300),   # 代币交易池列表
+        (re.compile(r'^/search/'), 300),                           # 搜索
+        (re.compile(r'/ohlcv/'), 60),                              # K 线
+        (re.compile(r'/new_pools$'), 30),                          # 新池
+        (re.compile(r'/trending_pools$'), 60),                     # 热门池
+        (re.compile(r'/trades$'), 15),                             # 池成交
+    ]
+    # 未匹配接口（价格等）的默认 TTL（秒）
+    DEFAULT_CACHE_TTL = 30
+    
+    # OHLCV 接口单页最大根数（更早的数据用 before_timestamp 向前翻页）
+    OHLCV_PAGE_LIMIT = 1000
+    # 单次深度历史请求最多翻页数（每页消耗一次请求额度）
+    OHLCV_MAX_PAGES = 10
+    # OHLCV 周期单位 -> 本地 K 线仓库周期后缀
+    OHLCV_UNITS = {'minute': 'm', 'hour': 'h', 'day': 'd'}
+    
+    # trades 接口单次返回的最大成交数（无分页参数）
+    TRADES_PAGE_LIMIT = 300
+    
+    # multi 接口单次最多查询的代币数
+    MULTI_TOKEN_BATCH_SIZE = 30
+    
+    # 限流/网关错误的重试：最多重试次数，指数退避基数与上限（秒）
+    RETRY_STATUS = (429, 502, 503, 504)
+    MAX_RETRIES = 4
+    BACKOFF_BASE = 2.0
+    BACKOFF_MAX = 60.0
+    
     # 热门 DEX
     POPULAR_DEXES = {
         'solana': ['raydium', 'orca', 'meteora', 'pump-fun'],
@@ -176,7 +228,15 @@ class GeckoTerminalFetcher:
         self,
         api_key: str = '',
         timeout: int = 30,
-        rate_limit_delay: float = 0.5,  # 请求间隔(秒)
+        rate_limit_delay: float = 0.5,  # 默认请求间隔(秒)
+        coalesce_window: float = 1.0,
+        response_cache: Optional[ResponseCache] = None,
+        cache_enabled: bool = True,
+        max_concurrency: int = 4,
+        pool_index: Optional[Any] = None,
+        pool_index_ttl: float = 86400,
+        candle_store: Optional[Any] = None,
+        kline_partial_max_age: float = 60.0,
     ):
         """
         初始化 GeckoTerminal Fetcher
@@ -184,12 +244,43 @@ class GeckoTerminalFetcher:
         Args:
             api_key: API Key (可选，免费版足够日常使用)
             timeout: 请求超时(秒)
-            rate_limit_delay: 请求间隔(秒)，避免触发限速
+            rate_limit_delay: 默认请求间隔(秒)，仅在 RATE_LIMITS 与内置配额
+                              都未配置该主机时生效
+            coalesce_window: 相同请求结果的复用窗口 (秒)，并发的相同请求总是合并
+            response_cache: 响应缓存（默认使用进程内共享缓存）
+            cache_enabled: 是否启用响应缓存
+            max_concurrency: 并发请求的最大线程数（请求仍共享同一限速配额）
+            pool_index: 代币交易池索引（可选，如 storage.DatabaseManager），
+                        启用后重复分析时跳过交易池发现
+            pool_index_ttl: 交易池索引有效期 (秒)，过期后重新发现
+            candle_store: 本地 K 线仓库（可选，如 storage.DatabaseManager），
+                          启用后交易池 K 线增量同步，以 geckoterminal:{network} 作为交易所 ID
+            kline_partial_max_age: 未收盘 K 线的最长复用时间 (秒)
         """
         self.api_key = api_key
         self.timeout = timeout
         self.rate_limit_delay = rate_limit_delay
-        self._last_request_time = 0
+        self.coalesce_window = coalesce_window
+        self.response_cache = (response_cache or get_shared_response_cache()) if cache_enabled else None
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        
+        # 代币交易池索引（主池很少变化）
+        self.pool_index = pool_index
+        self.pool_index_ttl = pool_index_ttl
+        
+        # 交易池 K 线仓库：GeckoTerminal 按 UTC 对齐分桶
+        self.candle_store = candle_store
+        self.fetch_planner = KlineFetchPlanner('', partial_max_age=kline_partial_max_age)
+        self._history_exhausted: set = set()  # 已翻到最早数据的 (exchange, pool, timeframe)
+        
+        # 所有实例共用 api.geckoterminal.com 的令牌桶
+        self.rate_limiter = get_rate_limiter(
+            self.BASE_URL,
+            rate=1 / rate_limit_delay if rate_limit_delay > 0 else None,
+            burst=1,
+        )
         
         self.session = requests.Session()
         self.session.headers.update({
@@ -208,41 +299,130 @@ class GeckoTerminalFetcher:
         return self.CHAIN_MAP.get(chain, chain)
     
     def _rate_limit(self):
-        """速率限制"""
-        now = time.time()
-        elapsed = now - self._last_request_time
-        if elapsed < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - elapsed)
-        self._last_request_time = time.time()
+        """速率限制（跨线程、跨实例共享）"""
+        self.rate_limiter.acquire()
+    
+    def map_concurrent(self, fn: Callable[[Any], T], items: Iterable[Any]) -> List[T]:
+        """
+        有界并发执行 fn(item)，按输入顺序返回结果
+        
+        线程数不超过 max_concurrency，实际发请求的节奏仍由共享令牌桶控制，
+        并发只是让等待限速与网络往返重叠。
+        """
+        items = list(items)
+        if len(items) <= 1 or self.max_concurrency == 1:
+            return [fn(item) for item in items]
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix='gecko',
+                )
+        return list(self._executor.map(fn, items))
+    
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """
+        重试等待时间（秒）
+        
+        优先使用 Retry-After（秒数或 HTTP 日期），否则指数退避并加随机抖动，
+        避免多个调用方同时醒来再次触发限流。
+        """
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.BACKOFF_MAX)
+        
+        backoff = min(self.BACKOFF_BASE * 2 ** attempt, self.BACKOFF_MAX)
+        return random.uniform(backoff / 2, backoff)
+    
+    def _cache_ttl(self, endpoint: str) -> float:
+        """接口对应的缓存 TTL（秒）"""
+        for pattern, ttl in self.CACHE_TTL_RULES:
+            if pattern.search(endpoint):
+                return ttl
+        return self.DEFAULT_CACHE_TTL
     
     def _request(
+        self,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        use_cache: bool = True
+    ) -> Optional[Dict]:
+        """
+        发送请求
+        
+        1. 响应缓存未过期时直接返回，不消耗 API 额度（use_cache=False 时跳过读取）
+        2. 相同 endpoint 和参数的并发请求只发一次，结果共享
+        3. 成功的响应按接口 TTL 写入缓存
+        """
+        cache = self.response_cache
+        cache_key = ResponseCache.make_key(self.BASE_URL, endpoint, params or {})
+        if cache is not None and use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        def fetch():
+            data = self._send_request(endpoint, params)
+            if cache is not None and data is not None:
+                cache.set(cache_key, data, self._cache_ttl(endpoint), endpoint=endpoint)
+            return data
+        
+        return _request_flight.do(cache_key, fetch, reuse_window=self.coalesce_window)
+    
+    def _send_request(
         self,
         endpoint: str,
         params: Optional[Dict] = None
     ) -> Optional[Dict]:
-        """发送请求"""
-        self._rate_limit()
+        """
+        实际发送 HTTP 请求
         
+        429 / 5xx 网关错误最多重试 MAX_RETRIES 次：
+        - 429 时暂停共享令牌桶，所有调用方一起按 Retry-After（或退避时间）等待
+        - 5xx 时仅当前请求退避
+        """
         url = f"{self.BASE_URL}{endpoint}"
         
-        try:
-            response = self.session.get(
-                url,
-                params=params,
-                timeout=self.timeout
-            )
-            
-            if response.status_code == 429:
-                logger.warning("触发速率限制，等待后重试...")
-                time.sleep(5)
-                return self._request(endpoint, params)
-            
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"请求失败 {url}: {e}")
-            return None
+        for attempt in range(self.MAX_RETRIES + 1):
+            self._rate_limit()
+            
+            try:
+                response = self.session.get(
+                    url,
+                    params=params,
+                    timeout=self.timeout
+                )
+                
+                if response.status_code in self.RETRY_STATUS:
+                    if attempt >= self.MAX_RETRIES:
+                        logger.error(f"请求失败 {url}: HTTP {response.status_code}，已重试 {attempt} 次")
+                        return None
+                    
+                    delay = self._retry_delay(response, attempt)
+                    if response.status_code == 429:
+                        logger.warning(f"触发速率限制，所有请求暂停 {delay:.1f} 秒后重试 ({attempt + 1}/{self.MAX_RETRIES})")
+                        self.rate_limiter.penalize(delay)
+                    else:
+                        logger.warning(f"HTTP {response.status_code}，{delay:.1f} 秒后重试 ({attempt + 1}/{self.MAX_RETRIES})")
+                        time.sleep(delay)
+                    continue
+                
+                response.raise_for_status()
+                return response.json()
+                
+            except requests.exceptions.RequestException as e:
+                logger.error(f"请求失败 {url}: {e}")
+                return None
+        
+        return None
     
     def get_networks(self) -> List[Dict[str, Any]]:
         """获取支持的链列表"""
@@ -279,27 +459,83 @@ class GeckoTerminalFetcher:
             if not data or 'data' not in data:
                 return None
             
-            token_data = data['data']
-            attrs = token_data.get('attributes', {})
-            
-            return TokenInfo(
-                address=token_address,
-                symbol=attrs.get('symbol', ''),
-                name=attrs.get('name', ''),
-                chain=chain,
-                decimals=attrs.get('decimals', 18),
-                price_usd=float(attrs.get('price_usd', 0) or 0),
-                price_change_24h=float(attrs.get('price_change_percentage', {}).get('h24', 0) or 0),
-                price_change_1h=float(attrs.get('price_change_percentage', {}).get('h1', 0) or 0),
-                volume_24h=float(attrs.get('volume_usd', {}).get('h24', 0) or 0),
-                market_cap=float(attrs.get('market_cap_usd', 0) or 0) if attrs.get('market_cap_usd') else None,
-                fdv=float(attrs.get('fdv_usd', 0) or 0) if attrs.get('fdv_usd') else None,
-            )
+            return self._parse_token(data['data'], chain, token_address)
             
         except Exception as e:
             logger.error(f"获取代币信息失败 {chain}:{token_address}: {e}")
             return None
     
+    def get_tokens_info(
+        self,
+        chain: str,
+        token_addresses: List[str]
+    ) -> Dict[str, TokenInfo]:
+        """
+        批量获取代币信息（multi 接口，每次最多 MULTI_TOKEN_BATCH_SIZE 个地址）
+        
+        每个代币的结果同时写入单代币接口的缓存，之后的 get_token_info 直接命中。
+        
+        Args:
+            chain: 链名称
+            token_addresses: 代币合约地址列表
+            
+        Returns:
+            {地址: TokenInfo}，未找到的地址不包含在内
+        """
+        network = self._normalize_chain(chain)
+        addresses = list(dict.fromkeys(a for a in token_addresses if a))
+        results: Dict[str, TokenInfo] = {}
+        
+        for i in range(0, len(addresses), self.MULTI_TOKEN_BATCH_SIZE):
+            chunk = addresses[i:i + self.MULTI_TOKEN_BATCH_SIZE]
+            # EVM 地址大小写不敏感，按小写匹配返回结果
+            wanted = {a.lower(): a for a in chunk}
+            try:
+                data = self._request(f"/networks/{network}/tokens/multi/{','.join(chunk)}")
+            except Exception as e:
+                logger.error(f"批量获取代币信息失败 {chain}: {e}")
+                continue
+            
+            if not data or 'data' not in data:
+                continue
+            
+            for token_data in data['data']:
+                returned = token_data.get('attributes', {}).get('address', '')
+                address = wanted.get(returned.lower())
+                if address is None:
+                    continue
+                results[address] = self._parse_token(token_data, chain, address)
+                self._prime_cache(f"/networks/{network}/tokens/{address}", {'data': token_data})
+        
+        logger.info(f"批量获取 {chain} 代币信息: {len(results)}/{len(addresses)} 个，"
+                    f"{-(-len(addresses) // self.MULTI_TOKEN_BATCH_SIZE)} 次请求")
+        return results
+    
+    def _prime_cache(self, endpoint: str, data: Dict, params: Optional[Dict] = None):
+        """把批量接口拆出的单条结果写入对应单条接口的缓存"""
+        if self.response_cache is None:
+            return
+        key = ResponseCache.make_key(self.BASE_URL, endpoint, params or {})
+        self.response_cache.set(key, data, self._cache_ttl(endpoint), endpoint=endpoint)
+    
+    def _parse_token(self, token_data: Dict, chain: str, token_address: str) -> TokenInfo:
+        """解析代币数据（单代币与 multi 接口格式相同）"""
+        attrs = token_data.get('attributes', {})
+        
+        return TokenInfo(
+            address=token_address,
+            symbol=attrs.get('symbol', ''),
+            name=attrs.get('name', ''),
+            chain=chain,
+            decimals=attrs.get('decimals', 18),
+            price_usd=float(attrs.get('price_usd', 0) or 0),
+            price_change_24h=float(attrs.get('price_change_percentage', {}).get('h24', 0) or 0),
+            price_change_1h=float(attrs.get('price_change_percentage', {}).get('h1', 0) or 0),
+            volume_24h=float(attrs.get('volume_usd', {}).get('h24', 0) or 0),
+            market_cap=float(attrs.get('market_cap_usd', 0) or 0) if attrs.get('market_cap_usd') else None,
+            fdv=float(attrs.get('fdv_usd', 0) or 0) if attrs.get('fdv_usd') else None,
+        )
+    
     def get_token_pools(
         self,
         chain: str,
@@ -338,6 +574,77 @@ class GeckoTerminalFetcher:
             logger.error(f"获取代币池失败: {e}")
             return []
     
+    def get_indexed_pools(
+        self,
+        chain: str,
+        token_address: str,
+        limit: int = 5,
+        refresh: bool = False,
+    ) -> Tuple[List[PoolInfo], bool]:
+        """
+        通过交易池索引获取代币的交易池（按流动性降序）
+        
+        索引未过期时不发请求；否则调用 get_token_pools 并写回索引。
+        未配置 pool_index 时等同于 get_token_pools。
+        
+        Args:
+            chain: 链名称
+            token_address: 代币地址
+            limit: 返回数量
+            refresh: 忽略索引强制重新发现（如主池已失效）
+            
+        Returns:
+            (PoolInfo 列表, 是否来自索引)
+        """
+        network = self._normalize_chain(chain)
+        if self.pool_index is not None and not refresh:
+            try:
+                entry = self.pool_index.get_pool_index(network, token_address)
+            except Exception as e:
+                logger.debug(f"读取交易池索引失败 {chain}:{token_address}: {e}")
+                entry = None
+            if entry and entry['pools'] and \
+                    (datetime.now() - entry['updated_at']).total_seconds() < self.pool_index_ttl:
+                return [self._pool_from_index(p, chain) for p in entry['pools'][:limit]], True
+        
+        pools = sorted(
+            self.get_token_pools(chain, token_address, limit=limit),
+            key=lambda p: p.liquidity_usd,
+            reverse=True,
+        )
+        if self.pool_index is not None and pools:
+            try:
+                self.pool_index.save_pool_index(network, token_address, [self._pool_to_index(p) for p in pools])
+            except Exception as e:
+                logger.debug(f"保存交易池索引失败 {chain}:{token_address}: {e}")
+        return pools, False
+    
+    @staticmethod
+    def _pool_to_index(pool: PoolInfo) -> Dict[str, Any]:
+        """交易池的索引记录（只保留定位交易池所需字段）"""
+        return {
+            'address': pool.address,
+            'dex': pool.dex,
+            'base_address': pool.base_token.address,
+            'base_symbol': pool.base_token.symbol,
+            'quote_address': pool.quote_token.address,
+            'quote_symbol': pool.quote_token.symbol,
+            'liquidity_usd': pool.liquidity_usd,
+        }
+    
+    @staticmethod
+    def _pool_from_index(entry: Dict[str, Any], chain: str) -> PoolInfo:
+        """由索引记录还原 PoolInfo（价格、成交量等行情字段为空）"""
+        return PoolInfo(
+            address=entry['address'],
+            chain=chain,
+            dex=entry.get('dex', ''),
+            base_token=TokenInfo(address=entry.get('base_address', ''), symbol=entry.get('base_symbol', ''), name='', chain=chain),
+            quote_token=TokenInfo(address=entry.get('quote_address', ''), symbol=entry.get('quote_symbol', ''), name='', chain=chain),
+            reserve_usd=entry.get('liquidity_usd', 0.0),
+            liquidity_usd=entry.get('liquidity_usd', 0.0),
+        )
+    
     def _parse_pool(self, pool_data: Dict, chain: str) -> Optional[PoolInfo]:
         """解析交易池数据"""
         try:
@@ -362,6 +669,13 @@ class GeckoTerminalFetcher:
                 chain=chain,
             )
             
+            pool_created_at = None
+            if attrs.get('pool_created_at'):
+                try:
+                    pool_created_at = datetime.fromisoformat(attrs['pool_created_at'].replace('Z', '+00:00'))
+                except ValueError:
+                    pass
+            
             return PoolInfo(
                 address=attrs.get('address', ''),
                 chain=chain,
@@ -376,6 +690,7 @@ class GeckoTerminalFetcher:
                          int(attrs.get('transactions', {}).get('h24', {}).get('sells', 0) or 0),
                 reserve_usd=float(attrs.get('reserve_in_usd', 0) or 0),
                 liquidity_usd=float(attrs.get('reserve_in_usd', 0) or 0),
+                pool_created_at=pool_created_at,
             )
             
         except Exception as e:
@@ -389,9 +704,10 @@ class GeckoTerminalFetcher:
         timeframe: str = 'day',
         limit: int = 100,
         aggregate: int = 1,
+        before_timestamp: Optional[int] = None,
     ) -> Optional[pd.DataFrame]:
         """
-        获取交易池 OHLCV 数据
+        获取交易池 OHLCV 数据（单页，最多 OHLCV_PAGE_LIMIT 根）
         
         Args:
             chain: 链名称
@@ -399,6 +715,7 @@ class GeckoTerminalFetcher:
             timeframe: 时间周期 (minute, hour, day)
             limit: 数据条数
             aggregate: 聚合周期 (如 timeframe=minute, aggregate=5 表示5分钟)
+            before_timestamp: 只返回该时间（Unix 秒）之前的 K 线，用于向前翻页
             
         Returns:
             DataFrame with columns: timestamp, open, high, low, close, volume
@@ -411,6 +728,8 @@ class GeckoTerminalFetcher:
                 'limit': limit,
                 'aggregate': aggregate,
             }
+            if before_timestamp is not None:
+                params['before_timestamp'] = int(before_timestamp)
             
             data = self._request(endpoint, params)
             
@@ -442,6 +761,227 @@ class GeckoTerminalFetcher:
             logger.error(f"获取 OHLCV 失败: {e}")
             return None
     
+    def iter_pool_ohlcv(
+        self,
+        chain: str,
+        pool_address: str,
+        timeframe: str = 'hour',
+        aggregate: int = 1,
+        before_timestamp: Optional[int] = None,
+        page_limit: Optional[int] = None,
+        max_pages: Optional[int] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        按 before_timestamp 向前翻页获取交易池 OHLCV
+        
+        每页按时间升序，页与页由新到旧；某页不足 page_limit 根说明已到交易池最早的数据。
+        每页都经过共享令牌桶和响应缓存，翻页不会超出速率配额。
+        
+        Args:
+            before_timestamp: 从该时间（Unix 秒）之前开始，None 表示从最新开始
+            page_limit: 每页根数，默认 OHLCV_PAGE_LIMIT
+            max_pages: 最多翻页数，默认 OHLCV_MAX_PAGES
+        """
+        page_limit = min(page_limit or self.OHLCV_PAGE_LIMIT, self.OHLCV_PAGE_LIMIT)
+        before = before_timestamp
+        for _ in range(max_pages or self.OHLCV_MAX_PAGES):
+            df = self.get_pool_ohlcv(
+                chain,
+                pool_address,
+                timeframe=timeframe,
+                limit=page_limit,
+                aggregate=aggregate,
+                before_timestamp=before,
+            )
+            if df is None or df.empty:
+                return
+            
+            yield df
+            
+            if len(df) < page_limit:
+                return
+            before = int(df.index[0].value // 10**9)
+    
+    def _fetch_pool_bars(
+        self,
+        chain: str,
+        pool_address: str,
+        timeframe: str,
+        aggregate: int,
+        bars: int,
+        before_timestamp: Optional[int] = None,
+        stop_at: Optional[pd.Timestamp] = None,
+    ) -> Tuple[Optional[pd.DataFrame], bool]:
+        """
+        翻页获取 before_timestamp 之前最近 bars 根 K 线
+        
+        Args:
+            stop_at: 翻到该时间（含）即停止，用于只补齐本地最后一根之后的数据
+            
+        Returns:
+            (DataFrame 或 None, 是否已到交易池最早的数据)
+        """
+        page_limit = min(bars, self.OHLCV_PAGE_LIMIT)
+        max_pages = min(-(-bars // page_limit), self.OHLCV_MAX_PAGES)
+        pages = []
+        total = 0
+        exhausted = False
+        for df in self.iter_pool_ohlcv(
+            chain, pool_address, timeframe, aggregate,
+            before_timestamp=before_timestamp, page_limit=page_limit, max_pages=max_pages,
+        ):
+            pages.append(df)
+            total += len(df)
+            if len(df) < page_limit:
+                exhausted = True
+            if stop_at is not None and df.index[0] <= stop_at:
+                break
+            if total >= bars:
+                break
+        else:
+            exhausted = exhausted or not pages
+        
+        if not pages:
+            return None, exhausted
+        df = pd.concat(pages[::-1])
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        return df.tail(bars), exhausted
+    
+    def pool_kline_timeframe(self, timeframe: str, aggregate: int = 1) -> str:
+        """GeckoTerminal 周期 + 聚合数 -> 本地 K 线仓库周期（如 hour, 4 -> 4h）"""
+        return f"{aggregate}{self.OHLCV_UNITS[timeframe]}"
+    
+    def get_pool_history(
+        self,
+        chain: str,
+        pool_address: str,
+        timeframe: str = 'hour',
+        aggregate: int = 1,
+        bars: int = 100,
+    ) -> Optional[pd.DataFrame]:
+        """
+        获取交易池最近 bars 根 K 线（超过单页时按 before_timestamp 翻页）
+        
+        配置了 candle_store 时增量同步到本地 K 线仓库（交易所 ID 为 geckoterminal:{network}，
+        交易对为池地址），之后只拉取缺失的 K 线。
+        
+        Returns:
+            以 timestamp 为索引的 OHLCV DataFrame（按时间升序）
+        """
+        try:
+            if self.candle_store is not None:
+                return self._sync_pool_klines(chain, pool_address, timeframe, aggregate, bars)
+            df, _ = self._fetch_pool_bars(chain, pool_address, timeframe, aggregate, bars)
+            return df
+        except Exception as e:
+            logger.error(f"获取交易池历史 K 线失败 {chain}:{pool_address}: {e}")
+            return None
+    
+    def _sync_pool_klines(
+        self,
+        chain: str,
+        pool_address: str,
+        timeframe: str,
+        aggregate: int,
+        bars: int,
+    ) -> Optional[pd.DataFrame]:
+        """
+        增量同步交易池 K 线到本地仓库，并返回最近 bars 根
+        
+        1. 本地窗口完整（或已到交易池最早数据）且最后一根仍是当前 K 线、刚同步过时，直接返回
+        2. 从最新向前翻页，直到覆盖本地最后一根（可能未收盘，会被覆盖）
+        3. 本地不足 bars 根时，从本地最早一根继续向前翻页补齐
+        """
+        store = self.candle_store
+        exchange = f"geckoterminal:{self._normalize_chain(chain)}"
+        tf = self.pool_kline_timeframe(timeframe, aggregate)
+        key = (exchange, pool_address, tf)
+        planner = self.fetch_planner
+        
+        cached = store.get_klines(exchange, pool_address, tf, limit=bars)
+        frames = []
+        
+        if cached.empty:
+            fresh, exhausted = self._fetch_pool_bars(chain, pool_address, timeframe, aggregate, bars)
+            frames.append(fresh)
+        else:
+            last_ts = cached.index[-1]
+            filled = len(cached) >= bars or key in self._history_exhausted
+            if filled and not planner.needs_fetch(key, tf, int(last_ts.value // 10**6)):
+                return cached
+            
+            missing = planner.missing_bars(tf, int(last_ts.value // 10**6))
+            newer, _ = self._fetch_pool_bars(
+                chain, pool_address, timeframe, aggregate, min(missing + 1, bars), stop_at=last_ts
+            )
+            frames.append(newer)
+            
+            exhausted = False
+            if not filled:
+                older, exhausted = self._fetch_pool_bars(
+                    chain, pool_address, timeframe, aggregate, bars - len(cached),
+                    before_timestamp=int(cached.index[0].value // 10**9),
+                )
+                frames.append(older)
+        
+        if exhausted:
+            self._history_exhausted.add(key)
+        
+        frames = [f for f in frames if f is not None and not f.empty]
+        if not frames:
+            return cached if not cached.empty else None
+        
+        for fresh in frames:
+            store.save_klines(fresh, exchange, pool_address, tf)
+        planner.record_fetch(key)
+        logger.debug(f"{pool_address} {tf} 同步 {sum(len(f) for f in frames)} 根K线")
+        return store.get_klines(exchange, pool_address, tf, limit=bars)
+    
+    def get_pool_trades(
+        self,
+        chain: str,
+        pool_address: str,
+        min_volume_usd: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        获取交易池最近成交（接口返回最近 24 小时内最多 TRADES_PAGE_LIMIT 笔，按时间倒序）
+        
+        Args:
+            chain: 链名称
+            pool_address: 交易池地址
+            min_volume_usd: 只返回成交额大于该值的成交（0 表示不过滤）
+            
+        Returns:
+            成交列表: tx_hash, kind (buy/sell), volume_usd, timestamp (毫秒), from_address
+        """
+        try:
+            network = self._normalize_chain(chain)
+            endpoint = f"/networks/{network}/pools/{pool_address}/trades"
+            params = {'trade_volume_in_usd_greater_than': min_volume_usd} if min_volume_usd > 0 else None
+            
+            data = self._request(endpoint, params)
+            if not data or 'data' not in data:
+                return []
+            
+            trades = []
+            for item in data['data']:
+                attrs = item.get('attributes', {})
+                block_ts = attrs.get('block_timestamp')
+                if not block_ts:
+                    continue
+                trades.append({
+                    'tx_hash': attrs.get('tx_hash') or item.get('id', ''),
+                    'kind': attrs.get('kind', ''),
+                    'volume_usd': float(attrs.get('volume_in_usd', 0) or 0),
+                    'timestamp': int(datetime.fromisoformat(block_ts.replace('Z', '+00:00')).timestamp() * 1000),
+                    'from_address': attrs.get('tx_from_address', ''),
+                })
+            return trades
+            
+        except Exception as e:
+            logger.error(f"获取交易池成交失败: {e}")
+            return []
+    
     def search_tokens(
         self,
         query: str,
@@ -635,6 +1175,60 @@ class GeckoTerminalFetcher:
             logger.error(f"获取新代币失败: {e}")
             return []
     
+    def get_pool_feed(
+        self,
+        chain: str,
+        feed: str = 'new_pools',
+        fresh: bool = False
+    ) -> List[PoolInfo]:
+        """
+        获取新池/热门池列表（第一页）
+        
+        与 get_new_tokens 不同，按池返回且不按符号去重，base_token 附带池级
+        行情、交易和市值数据，可直接用于风险检查。
+        
+        Args:
+            chain: 链名称
+            feed: 'new_pools' 或 'trending_pools'
+            fresh: 跳过响应缓存读取（轮询时使用，结果仍写入缓存）
+            
+        Returns:
+            PoolInfo 列表（按接口顺序，新池为创建时间倒序）
+        """
+        try:
+            network = self._normalize_chain(chain)
+            data = self._request(f"/networks/{network}/{feed}", use_cache=not fresh)
+            if not data or 'data' not in data:
+                return []
+            
+            pools = []
+            for pool_data in data['data']:
+                pool = self._parse_pool(pool_data, chain)
+                if pool is None or not pool.address:
+                    continue
+                
+                attrs = pool_data.get('attributes', {})
+                txns = attrs.get('transactions', {}).get('h24', {})
+                base = pool.base_token
+                base.price_usd = pool.price_usd
+                base.price_change_24h = pool.price_change_24h
+                base.price_change_1h = float(attrs.get('price_change_percentage', {}).get('h1', 0) or 0)
+                base.volume_24h = pool.volume_24h
+                base.txns_24h = pool.txns_24h
+                base.buys_24h = int(txns.get('buys', 0) or 0)
+                base.sells_24h = int(txns.get('sells', 0) or 0)
+                base.market_cap = float(attrs['market_cap_usd']) if attrs.get('market_cap_usd') else None
+                base.fdv = float(attrs['fdv_usd']) if attrs.get('fdv_usd') else None
+                base.liquidity_usd = pool.liquidity_usd
+                base.pool_created_at = pool.pool_created_at
+                pools.append(pool)
+            
+            return pools
+            
+        except Exception as e:
+            logger.error(f"获取{feed}失败: {e}")
+            return []
+    
     def get_top_gainers(
         self,
         chain: str,
@@ -682,25 +1276,42 @@ class GeckoTerminalFetcher:
     def get_token_with_pools(
         self,
         chain: str,
-        token_address: str
+        token_address: str,
+        token: Optional[TokenInfo] = None,
+        refresh_pools: bool = False,
     ) -> Optional[Dict[str, Any]]:
         """
         获取代币完整信息（包含交易池）
         
+        Args:
+            chain: 链名称
+            token_address: 代币地址
+            token: 已获取的代币信息（可选，如 get_tokens_info 的批量结果）
+            refresh_pools: 忽略交易池索引，重新发现交易池
+        
         Returns:
             {
                 'token': TokenInfo,
                 'pools': List[PoolInfo],
                 'main_pool': PoolInfo,  # 流动性最大的池
+                'pools_from_index': bool,  # 交易池是否来自索引（未请求 API）
             }
         """
         try:
-            token = self.get_token_info(chain, token_address)
+            def fetch_pools():
+                return self.get_indexed_pools(chain, token_address, limit=5, refresh=refresh_pools)
+            
+            if token is None:
+                # 代币信息与交易池列表并发获取
+                token, (pools, from_index) = self.map_concurrent(
+                    lambda fetch: fetch(),
+                    [lambda: self.get_token_info(chain, token_address), fetch_pools],
+                )
+            else:
+                pools, from_index = fetch_pools()
             if not token:
                 return None
             
-            pools = self.get_token_pools(chain, token_address, limit=5)
-            
             # 找到主要交易池（流动性最大）
             main_pool = None
             if pools:
@@ -710,6 +1321,7 @@ class GeckoTerminalFetcher:
                 'token': token,
                 'pools': pools,
                 'main_pool': main_pool,
+                'pools_from_index': from_index,
             }
             
         except Exception as e:
@@ -726,7 +1338,7 @@ class GeckoTerminalFetcher:
         """
         获取代币历史数据
         
-        先找到主要交易池，再获取 OHLCV
+        先找到主要交易池，再获取 OHLCV（天数按周期换算为 K 线根数，超过单页时翻页）
         
         Args:
             chain: 链名称
@@ -748,15 +1360,16 @@ class GeckoTerminalFetcher:
             main_pool = pools[0]
             
             # 获取 OHLCV
-            df = self.get_pool_ohlcv(
+            bars_per_day = {'minute': 1440, 'hour': 24, 'day': 1}[timeframe]
+            df = self.get_pool_history(
                 chain,
                 main_pool.address,
                 timeframe=timeframe,
-                limit=days
+                bars=days * bars_per_day
             )
             
             if df is not None:
-                df.reset_index(inplace=True)
+                df = df.reset_index()
                 df.rename(columns={'timestamp': 'date'}, inplace=True)
             
             return df
@@ -813,16 +1426,58 @@ class GeckoTerminalFetcher:
         if chains is None:
             chains = ['sol', 'eth', 'bsc']
         
-        results = {}
-        
-        for chain in chains:
-            tokens = self.get_trending_tokens(chain, limit=limit_per_chain)
-            results[chain] = tokens
-        
-        return results
+        # 各链并发获取（共享限速配额）
+        tokens = self.map_concurrent(
+            lambda chain: self.get_trending_tokens(chain, limit=limit_per_chain),
+            chains,
+        )
+        return dict(zip(chains, tokens))
 
 
 # 便捷函数
 def create_geckoterminal_fetcher(api_key: str = '') -> GeckoTerminalFetcher:
     """创建 GeckoTerminal 数据获取器"""
     return GeckoTerminalFetcher(api_key=api_key)
+
+
+# 进程级共享 Fetcher（按 API Key 区分），与 ccxt_fetcher.get_shared_fetcher 对应
+_shared_gecko_fetchers: Dict[str, GeckoTerminalFetcher] = {}
+_shared_gecko_lock = threading.Lock()
+
+
+def get_shared_gecko_fetcher(config: Optional[Any] = None) -> GeckoTerminalFetcher:
+    """
+    获取按配置构建、进程内共享的 GeckoTerminalFetcher
+
+    所有调用方（流水线、趋势分析器、市场分析器、新池监控）共用同一实例，
+    响应缓存、交易池索引与 K 线仓库的配置只在这里组装一次。
+
+    Args:
+        config: 配置（默认 get_config()）
+    """
+    from config import get_config
+    from storage import get_db
+
+    config = config or get_config()
+    api_key = config.geckoterminal_api_key or ''
+
+    with _shared_gecko_lock:
+        fetcher = _shared_gecko_fetchers.get(api_key)
+        if fetcher is None:
+            fetcher = GeckoTerminalFetcher(
+                api_key=api_key,
+                rate_limit_delay=config.geckoterminal_request_delay,
+                coalesce_window=config.request_coalesce_window,
+                response_cache=get_shared_response_cache(  # 按接口 TTL 缓存，持久化后重启仍命中
+                    max_bytes=config.gecko_cache_max_mb * 1024 * 1024,
+                    backend=get_db() if config.gecko_cache_persist else None,
+                ) if config.gecko_cache_enabled else None,
+                cache_enabled=config.gecko_cache_enabled,
+                max_concurrency=config.gecko_max_concurrency,
+                pool_index=get_db() if config.pool_index_ttl > 0 else None,  # 代币主池索引
+                pool_index_ttl=config.pool_index_ttl,
+                candle_store=get_db() if config.kline_cache_enabled else None,  # 与交易所 K 线共用本地仓库
+                kline_partial_max_age=config.kline_partial_max_age,
+            )
+            _shared_gecko_fetchers[api_key] = fetcher
+        return fetcher
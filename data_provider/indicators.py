@@ -0,0 +1,571 @@
+"""
+向量化技术指标
+
+1. 单序列指标：SMA、EMA、RSI (Wilder)、MACD、布林带、ATR、OBV、VWAP，
+   输入输出均为 NumPy 数组，不做逐行 Python 循环（递推类指标按块用闭式解计算）
+2. 多币种批量计算：把 N 个币种最近的收盘价、成交量、最高/最低价按最后一根 K 线对齐，
+   堆叠成 (N, L) 的二维数组，用累加和一次算出所有币种的 MA7/25/99、乖离率、
+   成交量变化、支撑阻力位，代替逐币种、逐均线的 pandas rolling
+"""
+
+import logging
+import warnings
+from dataclasses import dataclass
+from typing import Optional, Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 均线周期
+MA_WINDOWS = (7, 25, 99)
+# 支撑阻力位回看根数
+SR_WINDOW = 20
+# RSI 周期
+RSI_PERIOD = 14
+
+
+def stack_last(
+    series_list: Sequence[Optional[np.ndarray]],
+    width: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把多条序列的最后 width 个值右对齐堆叠成 (N, width) 数组
+
+    较短的序列左侧补 NaN。
+
+    Returns:
+        (二维数组, 每条序列的有效长度)
+    """
+    matrix = np.full((len(series_list), width), np.nan)
+    lengths = np.zeros(len(series_list), dtype=np.int64)
+    for i, values in enumerate(series_list):
+        if values is None or len(values) == 0:
+            continue
+        tail = np.asarray(values, dtype=np.float64)[-width:]
+        matrix[i, width - len(tail):] = tail
+        lengths[i] = len(tail)
+    return matrix, lengths
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    沿最后一维的滚动均值（累加和实现，支持一维或二维）
+
+    前 window - 1 个位置及窗口内含 NaN 的位置为 NaN，与 pandas rolling(window).mean() 一致。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    n = values.shape[-1]
+    if window <= 0 or n < window:
+        return out
+
+    nan_mask = np.isnan(values)
+    pad = [(0, 0)] * (values.ndim - 1) + [(1, 0)]
+    sums = np.pad(np.cumsum(np.where(nan_mask, 0.0, values), axis=-1), pad)
+    nans = np.pad(np.cumsum(nan_mask, axis=-1), pad)
+
+    window_sum = sums[..., window:] - sums[..., :-window]
+    window_nan = nans[..., window:] - nans[..., :-window]
+    out[..., window - 1:] = np.where(window_nan > 0, np.nan, window_sum / window)
+    return out
+
+
+def _ewma(values: np.ndarray, alpha: float, initial) -> np.ndarray:
+    """
+    沿最后一维的一阶递推 y[t] = alpha * x[t] + (1 - alpha) * y[t-1]，y[-1] = initial
+
+    按块计算闭式解：块内 y[j] = d^(j+1) * y0 + alpha * d^j * cumsum(x[k] * d^(-k))，
+    d = 1 - alpha；块长保证 d^(-k) 不溢出，循环次数为块数而非行数。
+    initial 为标量或与 values 去掉最后一维同形状的数组。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(values)
+    n_total = values.shape[-1]
+    decay = 1.0 - alpha
+    if decay <= 0.0 or n_total == 0:
+        out[...] = values
+        return out
+
+    block = max(1, min(n_total, int(500.0 / -np.log(decay))))
+    powers = decay ** np.arange(block + 1)
+    inverse = decay ** -np.arange(block)
+    prev = np.asarray(initial, dtype=np.float64)[..., None]
+    for start in range(0, n_total, block):
+        chunk = values[..., start:start + block]
+        n = chunk.shape[-1]
+        acc = np.cumsum(chunk * inverse[:n], axis=-1) * powers[:n]
+        out[..., start:start + n] = powers[1:n + 1] * prev + alpha * acc
+        prev = out[..., start + n - 1:start + n]
+    return out
+
+
+def _first_valid(values: np.ndarray) -> int:
+    """最后一维上第一个所有行都非 NaN 的位置，没有时返回长度"""
+    n = values.shape[-1]
+    valid = np.flatnonzero(~np.isnan(values.reshape(-1, n)).any(axis=0))
+    return int(valid[0]) if len(valid) else n
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    指数移动平均（alpha = 2 / (span + 1)，以第一个有效值为初值，沿最后一维）
+
+    与 pandas ewm(span=span, adjust=False).mean() 一致；开头的 NaN 保留为 NaN。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    first = _first_valid(values)
+    if first >= values.shape[-1]:
+        return out
+    out[..., first] = values[..., first]
+    out[..., first + 1:] = _ewma(values[..., first + 1:], 2.0 / (span + 1), values[..., first])
+    return out
+
+
+def wilder_smooth(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder 平滑：前 period 个有效值的均值为初值，之后按 alpha = 1 / period 递推（沿最后一维）
+
+    RSI、ATR 使用；初值之前为 NaN。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    first = _first_valid(values)
+    seed_at = first + period - 1
+    if seed_at >= values.shape[-1]:
+        return out
+    out[..., seed_at] = values[..., first:seed_at + 1].mean(axis=-1)
+    out[..., seed_at + 1:] = _ewma(values[..., seed_at + 1:], 1.0 / period, out[..., seed_at])
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    相对强弱指数（Wilder，沿最后一维，二维输入时各行需等长）
+
+    前 period 根为 NaN；区间内无下跌时为 100，价格完全不变时为 50。
+    """
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.diff(close, axis=-1, prepend=np.nan)
+    gain = wilder_smooth(np.clip(delta, 0.0, None), period)   # clip 保留第一根的 NaN
+    loss = wilder_smooth(np.clip(-delta, 0.0, None), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + gain / loss)
+    out = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), out)
+    return np.where(np.isnan(gain), np.nan, out)
+
+
+def macd(
+    close: np.ndarray,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD
+
+    Returns:
+        (DIF = EMA(fast) - EMA(slow), DEA = EMA(DIF, signal), 柱 = DIF - DEA)
+    """
+    dif = ema(close, fast) - ema(close, slow)
+    dea = ema(dif, signal)
+    return dif, dea, dif - dea
+
+
+def bollinger(
+    close: np.ndarray,
+    period: int = 20,
+    num_std: float = 2.0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    布林带（总体标准差 ddof=0）
+
+    Returns:
+        (上轨, 中轨 = SMA(period), 下轨)，前 period - 1 根为 NaN
+    """
+    close = np.asarray(close, dtype=np.float64)
+    mid = rolling_mean(close, period)
+    # 先减去整体均值再用 E[x^2] - E[x]^2，减小大数相消的精度损失
+    shifted = close - np.nanmean(close) if close.size else close
+    variance = rolling_mean(shifted * shifted, period) - rolling_mean(shifted, period) ** 2
+    std = np.sqrt(np.clip(variance, 0.0, None))
+    return mid + num_std * std, mid, mid - num_std * std
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """真实波幅，第一根为 high - low"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    prev_close = np.concatenate([[np.nan], np.asarray(close, dtype=np.float64)[:-1]])
+    ranges = np.vstack([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    return np.nanmax(ranges, axis=0)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """平均真实波幅（Wilder 平滑），前 period - 1 根为 NaN"""
+    return wilder_smooth(true_range(high, low, close), period)
+
+
+def obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """能量潮：收涨加成交量、收跌减成交量，第一根为 0"""
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    direction = np.sign(np.diff(close, prepend=close[:1]))
+    return np.cumsum(direction * volume)
+
+
+def vwap(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    window: Optional[int] = None,
+) -> np.ndarray:
+    """
+    成交量加权平均价（典型价 (H + L + C) / 3 加权）
+
+    Args:
+        window: 滚动窗口根数，None 表示从第一根开始累计（加密货币无交易时段）
+    """
+    volume = np.asarray(volume, dtype=np.float64)
+    typical = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64)
+               + np.asarray(close, dtype=np.float64)) / 3
+    pv = np.cumsum(typical * volume)
+    vol = np.cumsum(volume)
+    if window is not None and window < len(volume):
+        pv[window:] = pv[window:] - pv[:-window]
+        vol[window:] = vol[window:] - vol[:-window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(vol > 0, pv / vol, np.nan)
+
+
+def _last_window_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """(N, L) 数组每行最后 window 个值的均值（累加和差分，窗口内含 NaN 时为 NaN）"""
+    if values.shape[1] < window:
+        return np.full(values.shape[0], np.nan)
+    nan_mask = np.isnan(values)
+    sums = np.cumsum(np.where(nan_mask, 0.0, values), axis=1)
+    nans = np.cumsum(nan_mask, axis=1)
+    if values.shape[1] == window:
+        window_sum, window_nan = sums[:, -1], nans[:, -1]
+    else:
+        window_sum = sums[:, -1] - sums[:, -window - 1]
+        window_nan = nans[:, -1] - nans[:, -window - 1]
+    return np.where(window_nan > 0, np.nan, window_sum / window)
+
+
+@dataclass
+class BatchIndicators:
+    """N 个币种最后一根 K 线的指标（每个字段为长度 N 的数组，数据不足处为 NaN）"""
+    lengths: np.ndarray
+    close: np.ndarray
+    ma7: np.ndarray
+    ma25: np.ndarray
+    ma99: np.ndarray
+    bias_7: np.ndarray
+    bias_25: np.ndarray
+    volume_change: np.ndarray
+    support: np.ndarray
+    resistance: np.ndarray
+    rsi_14: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def row(self, i: int) -> Dict[str, Optional[float]]:
+        """第 i 个币种的指标（NaN 转为 None）"""
+        return {
+            name: (None if np.isnan(value) else float(value))
+            for name, value in (
+                ('close', self.close[i]),
+                ('ma7', self.ma7[i]),
+                ('ma25', self.ma25[i]),
+                ('ma99', self.ma99[i]),
+                ('bias_7', self.bias_7[i]),
+                ('bias_25', self.bias_25[i]),
+                ('volume_change', self.volume_change[i]),
+                ('support', self.support[i]),
+                ('resistance', self.resistance[i]),
+                ('rsi_14', self.rsi_14[i]),
+            )
+        }
+
+
+def _bias(close: np.ndarray, ma: np.ndarray) -> np.ndarray:
+    """乖离率 (%)，均线 <= 0 或缺失时为 NaN"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ma > 0, (close - ma) / ma * 100, np.nan)
+
+
+def compute_stacked(
+    closes: np.ndarray,
+    volumes: np.ndarray,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    lengths: np.ndarray,
+) -> BatchIndicators:
+    """
+    在已对齐堆叠的 (N, L) 数组上一次计算全部币种的指标
+
+    各数组按最后一根 K 线右对齐，closes 宽度不小于 max(MA_WINDOWS)，
+    volumes 至少 2 列，highs/lows 至少 SR_WINDOW 列；lengths 为各币种的 K 线根数。
+    RSI 在这 L 根 K 线上计算（Wilder 平滑的初值取窗口内前 14 根），
+    需与单序列 rsi() 一致时 L 应覆盖完整序列（compute_batch 即如此堆叠）。
+    """
+    close = closes[:, -1]
+    mas = {}
+    for window in MA_WINDOWS:
+        ma = _last_window_mean(closes, window)
+        mas[window] = np.where(lengths >= window, ma, np.nan)
+
+    prev_volume = volumes[:, -2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_change = np.where(
+            (lengths >= 2) & (prev_volume > 0),
+            (volumes[:, -1] - prev_volume) / prev_volume * 100,
+            np.nan,
+        )
+
+    has_sr = lengths >= SR_WINDOW
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # 整行为 NaN 时 nanmin/nanmax 告警
+        support = np.where(has_sr, np.nanmin(lows[:, -SR_WINDOW:], axis=1), np.nan)
+        resistance = np.where(has_sr, np.nanmax(highs[:, -SR_WINDOW:], axis=1), np.nan)
+
+    # RSI：按有效长度分组，每组按行一次向量化（K 线填满窗口的币种为同一组）
+    rsi_last = np.full(len(lengths), np.nan)
+    width = closes.shape[1]
+    effective = np.minimum(lengths, width)
+    for size in np.unique(effective[effective > RSI_PERIOD]):
+        rows = effective == size
+        rsi_last[rows] = rsi(closes[rows, width - size:], RSI_PERIOD)[:, -1]
+
+    return BatchIndicators(
+        lengths=lengths,
+        close=close,
+        ma7=mas[7],
+        ma25=mas[25],
+        ma99=mas[99],
+        bias_7=_bias(close, mas[7]),
+        bias_25=_bias(close, mas[25]),
+        volume_change=volume_change,
+        support=support,
+        resistance=resistance,
+        rsi_14=rsi_last,
+    )
+
+
+_OHLCV_COLUMNS = ['close', 'volume', 'high', 'low']
+
+
+def _ohlcv_tail(df: pd.DataFrame, width: int) -> np.ndarray:
+    """DataFrame 最后 width 行的 close/volume/high/low，形状 (k, 4)"""
+    columns = list(df.columns)
+    try:
+        values = df.to_numpy(np.float64)[-width:]
+        return values[:, [columns.index(name) for name in _OHLCV_COLUMNS]]
+    except (TypeError, ValueError):
+        # 含非数值列时逐列转换
+        return np.column_stack([
+            pd.to_numeric(df[name].iloc[-width:], errors='coerce').to_numpy(np.float64)
+            for name in _OHLCV_COLUMNS
+        ])
+
+
+def compute_batch(frames: Sequence[Optional[pd.DataFrame]]) -> BatchIndicators:
+    """
+    一次向量化计算多个币种最后一根 K 线的指标
+
+    规则与逐币种计算一致：K 线数不足均线周期时该均线为 NaN，不足 SR_WINDOW 根时无支撑阻力位，
+    前一根成交量 <= 0 时无成交量变化。堆叠宽度取最长序列（至少 max(MA_WINDOWS)），
+    RSI 按完整序列计算，与单序列 rsi() 的结果相同。
+
+    Args:
+        frames: 每个币种的 OHLCV DataFrame（含 close/volume/high/low 列，可为 None 或空）
+    """
+    width = max([max(MA_WINDOWS)] + [len(df) for df in frames if df is not None])
+    n = len(frames)
+    closes = np.full((n, width), np.nan)
+    volumes = np.full((n, width), np.nan)
+    highs = np.full((n, width), np.nan)
+    lows = np.full((n, width), np.nan)
+    lengths = np.zeros(n, dtype=np.int64)
+
+    # 每个币种只做一次整表转换（逐列取 Series 的开销远大于计算本身）
+    for i, df in enumerate(frames):
+        if df is None or df.empty:
+            continue
+        tail = _ohlcv_tail(df, width)
+        k = len(tail)
+        closes[i, width - k:] = tail[:, 0]
+        volumes[i, width - k:] = tail[:, 1]
+        highs[i, width - k:] = tail[:, 2]
+        lows[i, width - k:] = tail[:, 3]
+        lengths[i] = len(df)
+
+    return compute_stacked(closes, volumes, highs, lows, lengths)
+
+
+if __name__ == "__main__":
+    # 自检：参考值 + 与 pandas / 逐行循环实现一致；基准：单序列 10k 根、多币种批量
+    import time
+
+    def timed(fn, repeat=5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            value = fn()
+        return value, (time.perf_counter() - start) / repeat
+
+    # --- 参考值：Wilder RSI(14) 经典示例（StockCharts） ---
+    sample = np.array([
+        44.3389, 44.0902, 44.1497, 43.6124, 44.3278, 44.8264, 45.0955, 45.4245, 45.8433, 46.0826,
+        45.8931, 46.0328, 45.6140, 46.2820, 46.2820, 46.0028, 46.0328, 46.4116, 46.2222, 45.6439,
+    ])
+    assert np.allclose(rsi(sample)[14:], [70.53, 66.32, 66.55, 69.41, 66.36, 57.97], atol=0.01)
+    assert np.isnan(rsi(sample)[:14]).all()
+    assert rsi(np.full(30, 5.0))[-1] == 50.0 and rsi(np.arange(30.0))[-1] == 100.0
+
+    # --- 单序列指标：10k 根随机游走 ---
+    rng = np.random.default_rng(7)
+    n = 10_000
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = close * (1 + rng.uniform(0, 0.01, n))
+    low = close * (1 - rng.uniform(0, 0.01, n))
+    volume = rng.uniform(1, 1000, n)
+    s_close, s_high, s_low, s_volume = map(pd.Series, (close, high, low, volume))
+
+    def wilder_loop(values, period):
+        out = np.full(len(values), np.nan)
+        first = int(np.flatnonzero(~np.isnan(values))[0])
+        avg = values[first:first + period].mean()
+        out[first + period - 1] = avg
+        for t in range(first + period, len(values)):
+            avg = (avg * (period - 1) + values[t]) / period
+            out[t] = avg
+        return out
+
+    def rsi_loop(values, period=14):
+        delta = np.diff(values, prepend=np.nan)
+        gain = wilder_loop(np.clip(delta, 0, None), period)
+        loss = wilder_loop(np.clip(-delta, 0, None), period)
+        return 100 - 100 / (1 + gain / loss)
+
+    def atr_loop(hi, lo, c, period=14):
+        tr = np.empty(len(c))
+        tr[0] = hi[0] - lo[0]
+        for t in range(1, len(c)):
+            tr[t] = max(hi[t] - lo[t], abs(hi[t] - c[t - 1]), abs(lo[t] - c[t - 1]))
+        return wilder_loop(tr, period)
+
+    def obv_loop(c, v):
+        out = np.zeros(len(c))
+        for t in range(1, len(c)):
+            out[t] = out[t - 1] + (v[t] if c[t] > c[t - 1] else -v[t] if c[t] < c[t - 1] else 0)
+        return out
+
+    def pandas_macd():
+        dif = s_close.ewm(span=12, adjust=False).mean() - s_close.ewm(span=26, adjust=False).mean()
+        return dif, dif.ewm(span=9, adjust=False).mean()
+
+    def pandas_bollinger():
+        mid = s_close.rolling(20).mean()
+        std = s_close.rolling(20).std(ddof=0)
+        return mid + 2 * std, mid, mid - 2 * std
+
+    def pandas_vwap():
+        typical = (s_high + s_low + s_close) / 3
+        return (typical * s_volume).cumsum() / s_volume.cumsum()
+
+    checks = [
+        # 名称, numpy 实现, 参考实现, 比较函数
+        ('SMA(20)', lambda: rolling_mean(close, 20), lambda: s_close.rolling(20).mean().to_numpy(),
+         lambda a, b: np.allclose(a, b, equal_nan=True)),
+        ('EMA(12)', lambda: ema(close, 12), lambda: s_close.ewm(span=12, adjust=False).mean().to_numpy(),
+         lambda a, b: np.allclose(a, b)),
+        ('RSI(14)', lambda: rsi(close), lambda: rsi_loop(close),
+         lambda a, b: np.allclose(a, b, equal_nan=True)),
+        ('MACD', lambda: macd(close), pandas_macd,
+         lambda a, b: np.allclose(a[0], b[0]) and np.allclose(a[1], b[1])),
+        ('BOLL(20,2)', lambda: bollinger(close), pandas_bollinger,
+         lambda a, b: all(np.allclose(x, y, equal_nan=True) for x, y in zip(a, b))),
+        ('ATR(14)', lambda: atr(high, low, close), lambda: atr_loop(high, low, close),
+         lambda a, b: np.allclose(a, b, equal_nan=True)),
+        ('OBV', lambda: obv(close, volume), lambda: obv_loop(close, volume),
+         lambda a, b: np.allclose(a, b)),
+        ('VWAP', lambda: vwap(high, low, close, volume), pandas_vwap,
+         lambda a, b: np.allclose(a, b)),
+    ]
+    print(f"单序列 {n} 根:")
+    for name, fast, reference, same in checks:
+        got, fast_time = timed(fast)
+        expected, ref_time = timed(reference, repeat=1)
+        assert same(got, expected), name
+        print(f"  {name:<11} numpy {fast_time * 1000:7.3f} ms | 参考实现 {ref_time * 1000:8.3f} ms")
+
+    rolling_vwap = vwap(high, low, close, volume, window=24)
+    assert np.isclose(rolling_vwap[-1], np.average(((high + low + close) / 3)[-24:], weights=volume[-24:]))
+
+    # --- 多币种批量：与逐币种 pandas 结果一致 ---
+    n_symbols, n_bars = 500, 100
+
+    frames = []
+    for i in range(n_symbols):
+        bars = n_bars if i % 10 else int(rng.integers(1, n_bars))   # 部分币种 K 线不足
+        series = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+        frames.append(pd.DataFrame({
+            'open': series,
+            'high': series * 1.01,
+            'low': series * 0.99,
+            'close': series,
+            'volume': rng.uniform(0, 1000, bars),
+        }))
+    frames[3] = None
+
+    def per_symbol(df):
+        out = {}
+        if df is None or len(df) < 7:
+            return out
+        out['ma7'] = df['close'].rolling(window=7).mean().iloc[-1]
+        if len(df) >= 25:
+            out['ma25'] = df['close'].rolling(window=25).mean().iloc[-1]
+        if len(df) >= 99:
+            out['ma99'] = df['close'].rolling(window=99).mean().iloc[-1]
+        if len(df) >= 20:
+            out['support'] = df['low'].iloc[-20:].min()
+            out['resistance'] = df['high'].iloc[-20:].max()
+        return out
+
+    expected, pandas_time = timed(lambda: [per_symbol(df) for df in frames], repeat=1)
+    batch, batch_time = timed(lambda: compute_batch(frames))
+
+    # 纯向量化部分（数据已按列堆叠，如来自行情表）
+    width = max(max(MA_WINDOWS), n_bars)
+    stacked = [
+        stack_last([df[name].to_numpy() if df is not None else None for df in frames], width)[0]
+        for name in ('close', 'volume', 'high', 'low')
+    ]
+    core, core_time = timed(lambda: compute_stacked(*stacked, batch.lengths))
+    assert np.allclose(core.ma25, batch.ma25, equal_nan=True)
+
+    for i, ref in enumerate(expected):
+        row = batch.row(i)
+        for key, value in ref.items():
+            assert np.isclose(row[key], value), (i, key, row[key], value)
+        for key in ('ma7', 'ma25', 'ma99', 'support', 'resistance'):
+            if key not in ref:
+                assert row[key] is None, (i, key)
+        if frames[i] is not None and len(frames[i]) > RSI_PERIOD:
+            assert np.isclose(row['rsi_14'], rsi(frames[i]['close'].to_numpy())[-1]), (i, 'rsi_14')
+
+    # 长于均线窗口的序列：批量 RSI 与单序列 rsi() 相同
+    long_df = pd.DataFrame({'close': close[:500], 'volume': volume[:500], 'high': high[:500], 'low': low[:500]})
+    long_batch = compute_batch([long_df, frames[1]])
+    assert np.isclose(long_batch.row(0)['rsi_14'], rsi(close[:500])[-1])
+    assert np.isclose(long_batch.row(1)['rsi_14'], rsi(frames[1]['close'].to_numpy())[-1])
+    assert np.isclose(long_batch.row(1)['ma99'], batch.row(1)['ma99'])
+
+    print(f"{n_symbols} 个币种 x {n_bars} 根: 逐币种 pandas {pandas_time * 1000:.1f} ms, "
+          f"compute_batch {batch_time * 1000:.1f} ms ({pandas_time / batch_time:.0f}x), "
+          f"compute_stacked {core_time * 1000:.2f} ms ({pandas_time / core_time:.0f}x)")
@@ -0,0 +1,343 @@
+"""
+本地订单簿引擎
+
+订单簿按价格排序存为 NumPy 数组（买盘降序、卖盘升序），支持：
+- 全量快照替换（REST 定期拉取或 ccxt.pro 推送的完整订单簿）
+- 增量更新（[price, size] 列表，size 为 0 表示删除该档），向量化合并
+- 累计挂单额缓存：深度、滑点、买卖失衡都只需一次 searchsorted
+
+每次更新后的分析指标均为微秒级，可以在每次分析中为每个交易对计算流动性指标。
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _to_levels(levels: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """[[price, size, ...], ...] -> (价格数组, 数量数组)"""
+    if levels is None or len(levels) == 0:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+    arr = np.asarray([lvl[:2] for lvl in levels], dtype=np.float64)
+    return arr[:, 0].copy(), arr[:, 1].copy()
+
+
+class OrderBook:
+    """
+    单个交易对的本地订单簿
+
+    使用示例：
+        book = OrderBook('BTC/USDT', 'okx')
+        book.apply_snapshot(ob['bids'], ob['asks'])
+        book.apply_diff(bids=[[64000.1, 0]], asks=[[64010.0, 1.2]])
+        book.depth_within(1.0)          # 中间价 ±1% 内的买/卖挂单额
+        book.slippage(100_000, 'buy')   # 市价买入 10 万计价货币的滑点 (%)
+    """
+
+    def __init__(self, symbol: str, exchange: str = ''):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.bid_prices = np.empty(0, dtype=np.float64)   # 降序
+        self.bid_sizes = np.empty(0, dtype=np.float64)
+        self.ask_prices = np.empty(0, dtype=np.float64)   # 升序
+        self.ask_sizes = np.empty(0, dtype=np.float64)
+        self.nonce: Optional[int] = None
+        self.timestamp: Optional[datetime] = None
+        self.updates = 0
+        self._bid_cum: Optional[np.ndarray] = None
+        self._ask_cum: Optional[np.ndarray] = None
+
+    # ---------- 更新 ----------
+
+    def apply_snapshot(
+        self,
+        bids: Sequence,
+        asks: Sequence,
+        nonce: Optional[int] = None,
+        timestamp: Optional[datetime] = None,
+    ):
+        """用全量快照替换订单簿"""
+        bid_p, bid_s = _to_levels(bids)
+        ask_p, ask_s = _to_levels(asks)
+        self.bid_prices, self.bid_sizes = self._sorted(bid_p, bid_s, descending=True)
+        self.ask_prices, self.ask_sizes = self._sorted(ask_p, ask_s, descending=False)
+        self._touch(nonce, timestamp)
+
+    def apply_diff(
+        self,
+        bids: Sequence = (),
+        asks: Sequence = (),
+        nonce: Optional[int] = None,
+        timestamp: Optional[datetime] = None,
+    ) -> bool:
+        """
+        应用增量更新（size 为 0 表示删除该价位）
+
+        Returns:
+            是否已应用（nonce 不大于当前 nonce 的过期更新会被忽略）
+        """
+        if nonce is not None and self.nonce is not None and nonce <= self.nonce:
+            return False
+        if len(bids):
+            self.bid_prices, self.bid_sizes = self._merge(self.bid_prices, self.bid_sizes, *_to_levels(bids), descending=True)
+        if len(asks):
+            self.ask_prices, self.ask_sizes = self._merge(self.ask_prices, self.ask_sizes, *_to_levels(asks), descending=False)
+        self._touch(nonce, timestamp)
+        return True
+
+    def _touch(self, nonce: Optional[int], timestamp: Optional[datetime]):
+        self.nonce = nonce if nonce is not None else self.nonce
+        self.timestamp = timestamp or datetime.now()
+        self.updates += 1
+        self._bid_cum = None
+        self._ask_cum = None
+
+    @staticmethod
+    def _sorted(prices: np.ndarray, sizes: np.ndarray, descending: bool) -> Tuple[np.ndarray, np.ndarray]:
+        keep = sizes > 0
+        prices, sizes = prices[keep], sizes[keep]
+        order = np.argsort(-prices if descending else prices, kind='stable')
+        return prices[order], sizes[order]
+
+    @staticmethod
+    def _merge(
+        prices: np.ndarray,
+        sizes: np.ndarray,
+        upd_prices: np.ndarray,
+        upd_sizes: np.ndarray,
+        descending: bool,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """把更新并入已排序的价位（同价位以更新为准，数量为 0 的价位删除）"""
+        # 更新放在前面并倒序（同一批次内后出现的更新优先），np.unique 取每个价位首次出现的位置
+        all_prices = np.concatenate([upd_prices[::-1], prices])
+        all_sizes = np.concatenate([upd_sizes[::-1], sizes])
+        unique_prices, first = np.unique(all_prices, return_index=True)
+        unique_sizes = all_sizes[first]
+        keep = unique_sizes > 0
+        unique_prices, unique_sizes = unique_prices[keep], unique_sizes[keep]
+        if descending:
+            return unique_prices[::-1].copy(), unique_sizes[::-1].copy()
+        return unique_prices, unique_sizes
+
+    # ---------- 基础属性 ----------
+
+    @property
+    def best_bid(self) -> float:
+        return float(self.bid_prices[0]) if self.bid_prices.size else 0.0
+
+    @property
+    def best_ask(self) -> float:
+        return float(self.ask_prices[0]) if self.ask_prices.size else 0.0
+
+    @property
+    def mid(self) -> float:
+        if self.bid_prices.size and self.ask_prices.size:
+            return (self.best_bid + self.best_ask) / 2
+        return self.best_bid or self.best_ask
+
+    @property
+    def spread_pct(self) -> float:
+        """买卖价差 (%)"""
+        if self.best_bid > 0 and self.best_ask > 0:
+            return (self.best_ask - self.best_bid) / self.mid * 100
+        return 0.0
+
+    def _cum_notional(self, side: str) -> np.ndarray:
+        """各档累计挂单额（计价货币），更新后首次使用时计算"""
+        if side == 'bid':
+            if self._bid_cum is None:
+                self._bid_cum = np.cumsum(self.bid_prices * self.bid_sizes)
+            return self._bid_cum
+        if self._ask_cum is None:
+            self._ask_cum = np.cumsum(self.ask_prices * self.ask_sizes)
+        return self._ask_cum
+
+    # ---------- 分析指标 ----------
+
+    def depth_within(self, pct: float) -> Tuple[float, float]:
+        """
+        中间价 ±pct% 范围内的买盘、卖盘挂单额（计价货币）
+
+        Returns:
+            (买盘挂单额, 卖盘挂单额)
+        """
+        mid = self.mid
+        if mid <= 0:
+            return 0.0, 0.0
+        # 买盘降序，取反后升序以便 searchsorted
+        n_bid = int(np.searchsorted(-self.bid_prices, -mid * (1 - pct / 100), side='right'))
+        n_ask = int(np.searchsorted(self.ask_prices, mid * (1 + pct / 100), side='right'))
+        bid_cum = self._cum_notional('bid')
+        ask_cum = self._cum_notional('ask')
+        return (
+            float(bid_cum[n_bid - 1]) if n_bid else 0.0,
+            float(ask_cum[n_ask - 1]) if n_ask else 0.0,
+        )
+
+    def slippage(self, notional: float, side: str = 'buy') -> Optional[float]:
+        """
+        按当前挂单吃掉 notional（计价货币）时，成交均价相对中间价的滑点 (%)
+
+        Args:
+            notional: 成交额
+            side: 'buy' 吃卖盘，'sell' 吃买盘
+
+        Returns:
+            滑点百分比（正数）；深度不足时返回 None
+        """
+        mid = self.mid
+        if notional <= 0 or mid <= 0:
+            return 0.0 if notional <= 0 else None
+
+        if side == 'buy':
+            prices, sizes, cum = self.ask_prices, self.ask_sizes, self._cum_notional('ask')
+        else:
+            prices, sizes, cum = self.bid_prices, self.bid_sizes, self._cum_notional('bid')
+        if cum.size == 0 or cum[-1] < notional:
+            return None
+
+        # 最后一档只成交一部分
+        i = int(np.searchsorted(cum, notional, side='left'))
+        filled_before = cum[i - 1] if i else 0.0
+        qty = (sizes[:i].sum() if i else 0.0) + (notional - filled_before) / prices[i]
+        avg_price = notional / qty
+        return float(abs(avg_price - mid) / mid * 100)
+
+    def imbalance(self, pct: float = 1.0) -> float:
+        """
+        中间价 ±pct% 范围内的买卖失衡
+
+        Returns:
+            (买 - 卖) / (买 + 卖)，取值 [-1, 1]，正数表示买盘更厚
+        """
+        bid, ask = self.depth_within(pct)
+        total = bid + ask
+        return (bid - ask) / total if total > 0 else 0.0
+
+    def walls(self, side: str = 'bid', multiple: float = 5.0, top: int = 3) -> List[Dict[str, float]]:
+        """
+        识别大单墙：挂单额超过该侧中位数 multiple 倍的价位
+
+        Returns:
+            按挂单额降序的 [{'price', 'size', 'notional', 'distance_pct'}]
+        """
+        if side == 'bid':
+            prices, sizes = self.bid_prices, self.bid_sizes
+        else:
+            prices, sizes = self.ask_prices, self.ask_sizes
+        if prices.size < 3:
+            return []
+
+        notional = prices * sizes
+        threshold = np.median(notional) * multiple
+        idx = np.flatnonzero(notional > threshold)
+        if idx.size == 0:
+            return []
+        idx = idx[np.argsort(-notional[idx], kind='stable')][:top]
+
+        mid = self.mid
+        return [
+            {
+                'price': float(prices[i]),
+                'size': float(sizes[i]),
+                'notional': float(notional[i]),
+                'distance_pct': float(abs(prices[i] - mid) / mid * 100) if mid > 0 else 0.0,
+            }
+            for i in idx
+        ]
+
+    def liquidity_metrics(
+        self,
+        depth_pcts: Sequence[float] = (0.5, 1.0, 2.0),
+        notionals: Sequence[float] = (10_000, 100_000),
+    ) -> Dict[str, Any]:
+        """
+        汇总流动性指标
+
+        Returns:
+            {
+                'mid', 'spread_pct',
+                'depth': {pct: {'bid': 挂单额, 'ask': 挂单额}},
+                'slippage': {notional: {'buy': %, 'sell': %}},
+                'imbalance_1pct', 'bid_walls', 'ask_walls',
+            }
+        """
+        return {
+            'mid': self.mid,
+            'spread_pct': self.spread_pct,
+            'depth': {
+                pct: dict(zip(('bid', 'ask'), self.depth_within(pct)))
+                for pct in depth_pcts
+            },
+            'slippage': {
+                n: {'buy': self.slippage(n, 'buy'), 'sell': self.slippage(n, 'sell')}
+                for n in notionals
+            },
+            'imbalance_1pct': self.imbalance(1.0),
+            'bid_walls': self.walls('bid'),
+            'ask_walls': self.walls('ask'),
+        }
+
+    def to_levels(self, limit: Optional[int] = None) -> Tuple[List[List[float]], List[List[float]]]:
+        """导出为 ccxt 格式的 (bids, asks)"""
+        bids = np.column_stack([self.bid_prices, self.bid_sizes])[:limit].tolist()
+        asks = np.column_stack([self.ask_prices, self.ask_sizes])[:limit].tolist()
+        return bids, asks
+
+    def __repr__(self) -> str:
+        return (f"OrderBook({self.symbol}, bid={self.best_bid:g} x{self.bid_prices.size}, "
+                f"ask={self.best_ask:g} x{self.ask_prices.size})")
+
+
+if __name__ == "__main__":
+    import time
+
+    # 自检：增量合并
+    book = OrderBook('TEST/USDT')
+    book.apply_snapshot([[99, 1], [100, 2], [98, 3]], [[101, 1], [102, 2]])
+    assert book.bid_prices.tolist() == [100, 99, 98] and book.best_ask == 101
+    book.apply_diff(bids=[[99, 0], [99.5, 4]], asks=[[101, 0], [101.5, 1], [101.5, 5]])
+    assert book.bid_prices.tolist() == [100, 99.5, 98] and book.bid_sizes.tolist() == [2, 4, 3]
+    assert book.ask_prices.tolist() == [101.5, 102] and book.ask_sizes.tolist() == [5, 2]
+    book.apply_diff(bids=[[97, 1]], nonce=5)
+    assert book.apply_diff(bids=[[96, 1]], nonce=4) is False
+
+    # 滑点：买入 101.5*5 + 102*1 → 均价 (507.5+102)/6
+    mid = book.mid
+    expected = abs((507.5 + 102) / 6 - mid) / mid * 100
+    assert abs(book.slippage(609.5, 'buy') - expected) < 1e-9
+    assert book.slippage(1e9, 'buy') is None
+
+    # 基准：每侧 400 档
+    rng = np.random.default_rng(0)
+    levels = 400
+    bids = np.column_stack([64000 - np.arange(levels) * 0.5, rng.exponential(0.5, levels)])
+    asks = np.column_stack([64000.5 + np.arange(levels) * 0.5, rng.exponential(0.5, levels)])
+    bids[37, 1] = 80  # 大单墙
+    book = OrderBook('BTC/USDT', 'bench')
+    book.apply_snapshot(bids.tolist(), asks.tolist())
+    assert book.walls('bid')[0]['price'] == bids[37, 0]
+
+    diff = [[64000 - 3.0, 1.5], [64000 - 10.5, 0.0]]
+
+    def bench(fn, rounds=20000) -> float:
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        return (time.perf_counter() - t0) / rounds * 1e6
+
+    results = {
+        'apply_diff': bench(lambda: book.apply_diff(bids=diff), rounds=5000),
+        'depth_within(1%)': bench(lambda: book.depth_within(1.0)),
+        'slippage(100k)': bench(lambda: book.slippage(100_000, 'buy')),
+        'imbalance': bench(lambda: book.imbalance(1.0)),
+        'walls': bench(lambda: book.walls('ask')),
+        'liquidity_metrics': bench(lambda: book.liquidity_metrics(), rounds=2000),
+    }
+    for name, us in results.items():
+        print(f"{name:>18}: {us:7.1f} µs")
+    print("OK")
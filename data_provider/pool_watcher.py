@@ -0,0 +1,331 @@
+"""
+新池监控（增量检测）
+
+get_new_tokens 是一次性调用，每次都重新下载同一页新池列表，调用方无法区分哪些是新出现的。
+该模块常驻轮询多条链的 new_pools（可选 trending_pools）：
+- 各链并发请求（复用 GeckoTerminalFetcher 的并发上限与共享限流）
+- 有界的已见集合，只对真正新出现的池产生事件
+- 每轮新池批量执行风险规则
+- 事件放入线程安全队列，由通知服务或机器人消费
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Callable, Iterable, Tuple
+
+from .geckoterminal_fetcher import GeckoTerminalFetcher, PoolInfo, TokenInfo
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NewPoolEvent:
+    """新池事件"""
+    chain: str
+    pool: PoolInfo
+    source: str                     # new_pools / trending_pools
+    detected_at: datetime
+    risk_warnings: List[str] = field(default_factory=list)
+
+    @property
+    def token(self) -> TokenInfo:
+        return self.pool.base_token
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        """检测时距池创建的秒数（接口未返回创建时间时为 None）"""
+        created = self.pool.pool_created_at
+        if created is None:
+            return None
+        detected = self.detected_at
+        if created.tzinfo and detected.tzinfo is None:
+            detected = detected.astimezone(timezone.utc)
+        return (detected - created).total_seconds()
+
+    def to_message(self) -> str:
+        """生成推送文本（Markdown）"""
+        token = self.token
+        label = '新池' if self.source == 'new_pools' else '热门池'
+        lines = [
+            f"🆕 **{label}** {token.symbol}/{self.pool.quote_token.symbol} ({self.chain}, {self.pool.dex})",
+            f"- 池地址: `{self.pool.address}`",
+            f"- 代币地址: `{token.address}`",
+            f"- 价格: ${token.price_usd:.8g}  流动性: ${token.liquidity_usd:,.0f}",
+        ]
+        if token.fdv:
+            lines.append(f"- FDV: ${token.fdv:,.0f}")
+        age = self.age_seconds
+        if age is not None:
+            lines.append(f"- 创建于 {age / 60:.1f} 分钟前")
+        if self.risk_warnings:
+            lines.append(f"- ⚠️ {'; '.join(self.risk_warnings)}")
+        return '\n'.join(lines)
+
+
+class SeenSet:
+    """
+    有界已见集合（插入顺序淘汰）
+
+    新池列表只返回最新一页，旧池不会再出现，按插入顺序淘汰最早的键即可，
+    内存占用固定且没有误判。
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, key: str) -> bool:
+        """加入集合，返回是否为首次出现"""
+        if key in self._keys:
+            return False
+        self._keys[key] = None
+        while len(self._keys) > self.capacity:
+            self._keys.popitem(last=False)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class NewPoolWatcher:
+    """
+    新池监控器
+
+    使用示例：
+        watcher = NewPoolWatcher(gecko, ['solana', 'base'], risk_checker=assess_token_risks)
+        watcher.start()
+        while True:
+            event = watcher.events.get()
+            notifier.send(event.to_message())
+    """
+
+    FEEDS = ('new_pools', 'trending_pools')
+    # 清理过期响应缓存的间隔（秒），常驻轮询期间持久化缓存不会无限增长
+    CACHE_PURGE_INTERVAL = 3600
+
+    def __init__(
+        self,
+        fetcher: GeckoTerminalFetcher,
+        chains: Iterable[str],
+        interval: float = 15.0,
+        include_trending: bool = False,
+        risk_checker: Optional[Callable[[TokenInfo], List[str]]] = None,
+        event_queue: Optional["queue.Queue[NewPoolEvent]"] = None,
+        seen_capacity: int = 100_000,
+        emit_initial: bool = False,
+    ):
+        """
+        Args:
+            fetcher: GeckoTerminal 数据获取器
+            chains: 监控的链
+            interval: 轮询间隔（秒）
+            include_trending: 是否同时监控热门池
+            risk_checker: 风险规则，输入代币返回风险提示列表
+            event_queue: 事件队列，默认新建无界队列
+            seen_capacity: 已见集合容量
+            emit_initial: 各链首次成功拉取时已有的池是否也产生事件（默认只记录为基线，避免刷屏）
+        """
+        self.fetcher = fetcher
+        self.chains = [c for c in chains if c]
+        self.interval = interval
+        self.feeds = self.FEEDS if include_trending else self.FEEDS[:1]
+        self.risk_checker = risk_checker
+        self.events: "queue.Queue[NewPoolEvent]" = event_queue if event_queue is not None else queue.Queue()
+        self.emit_initial = emit_initial
+
+        self._seen = SeenSet(seen_capacity)
+        # 已建立基线的 (network, feed)：只在拉取成功后加入，失败的链下次成功时再建基线
+        self._primed: set = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计
+        self.polls = 0
+        self.emitted = 0
+        self.errors = 0
+
+    def _fetch(self, job: Tuple[str, str]) -> Tuple[str, str, Optional[List[PoolInfo]]]:
+        """拉取一条链的池列表，失败时返回 None（与空列表区分）"""
+        chain, feed = job
+        try:
+            return chain, feed, self.fetcher.get_pool_feed(chain, feed, fresh=True)
+        except Exception as e:
+            logger.warning(f"[新池监控] {chain} {feed} 拉取失败: {e}")
+            with self._lock:
+                self.errors += 1
+            return chain, feed, None
+
+    def poll_once(self) -> List[NewPoolEvent]:
+        """轮询一次所有链，返回并入队本轮新出现的池"""
+        jobs = [(chain, feed) for chain in self.chains for feed in self.feeds]
+        results = self.fetcher.map_concurrent(self._fetch, jobs)
+        detected_at = datetime.now(timezone.utc)
+
+        fresh: List[NewPoolEvent] = []
+        with self._lock:
+            for chain, feed, pools in results:
+                if pools is None:
+                    continue
+                network = self.fetcher._normalize_chain(chain)
+                # 该链首次成功拉取的一页只建立基线
+                baseline = not self.emit_initial and (network, feed) not in self._primed
+                self._primed.add((network, feed))
+                for pool in pools:
+                    if self._seen.add(f"{network}:{pool.address}") and not baseline:
+                        fresh.append(NewPoolEvent(chain=chain, pool=pool, source=feed, detected_at=detected_at))
+                if baseline:
+                    logger.info(f"[新池监控] {chain} {feed} 基线已建立: {len(pools)} 个池")
+            self.polls += 1
+
+        self._assess(fresh)
+        for event in fresh:
+            self.events.put(event)
+        with self._lock:
+            self.emitted += len(fresh)
+        if fresh:
+            logger.info(f"[新池监控] 发现 {len(fresh)} 个新池")
+        return fresh
+
+    def _assess(self, events: List[NewPoolEvent]):
+        """对本轮新池批量执行风险规则"""
+        if self.risk_checker is None:
+            return
+        for event in events:
+            try:
+                event.risk_warnings = self.risk_checker(event.token)
+            except Exception as e:
+                logger.debug(f"[新池监控] {event.pool.address} 风险检查失败: {e}")
+
+    def _purge_cache(self):
+        """清理获取器响应缓存中的过期记录"""
+        cache = getattr(self.fetcher, 'response_cache', None)
+        if cache is None:
+            return
+        try:
+            purged = cache.purge_expired()
+            if purged:
+                logger.debug(f"[新池监控] 清理过期响应缓存 {purged} 条")
+        except Exception as e:
+            logger.debug(f"[新池监控] 清理响应缓存失败: {e}")
+
+    def _run(self):
+        last_purge = time.monotonic()
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"[新池监控] 轮询异常: {e}")
+                with self._lock:
+                    self.errors += 1
+            if started - last_purge >= self.CACHE_PURGE_INTERVAL:
+                self._purge_cache()
+                last_purge = started
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0))
+
+    def start(self):
+        """启动后台轮询线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='new-pool-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"[新池监控] 已启动: {', '.join(self.chains)} ({'/'.join(self.feeds)})，间隔 {self.interval}s")
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止后台轮询线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def drain(self, max_items: Optional[int] = None) -> List[NewPoolEvent]:
+        """取出队列中已有的事件（不阻塞）"""
+        drained = []
+        while max_items is None or len(drained) < max_items:
+            try:
+                drained.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return drained
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'polls': self.polls,
+                'emitted': self.emitted,
+                'errors': self.errors,
+                'seen': len(self._seen),
+                'pending': self.events.qsize(),
+            }
+
+
+if __name__ == "__main__":
+    # 自检：首轮只建基线，之后只对新出现的池产生事件并执行风险规则
+    class _FakeGecko:
+        def __init__(self):
+            self.pages = {'solana': ['p1', 'p2'], 'base': ['b1']}
+
+        def _normalize_chain(self, chain):
+            return chain
+
+        def map_concurrent(self, fn, items):
+            return [fn(item) for item in items]
+
+        def get_pool_feed(self, chain, feed='new_pools', fresh=False):
+            now = datetime.now(timezone.utc)
+            return [
+                PoolInfo(
+                    address=addr, chain=chain, dex='raydium',
+                    base_token=TokenInfo(address=f"t_{addr}", symbol=addr.upper(), name=addr, chain=chain,
+                                         liquidity_usd=5000, pool_created_at=now),
+                    quote_token=TokenInfo(address='q', symbol='SOL', name='SOL', chain=chain),
+                    pool_created_at=now,
+                )
+                for addr in self.pages[chain]
+            ]
+
+    gecko = _FakeGecko()
+    watcher = NewPoolWatcher(gecko, ['solana', 'base'], risk_checker=lambda t: ['low'] if t.liquidity_usd < 10000 else [])
+    assert watcher.poll_once() == [] and len(watcher._seen) == 3
+
+    gecko.pages['solana'] = ['p3', 'p1', 'p2']
+    events = watcher.poll_once()
+    assert [e.pool.address for e in events] == ['p3'] and events[0].risk_warnings == ['low']
+    assert watcher.poll_once() == []
+    assert [e.pool.address for e in watcher.drain()] == ['p3']
+    assert 0 <= events[0].age_seconds < 5
+
+    # 首轮某条链拉取失败：该链之后首次成功的一页只作为基线，不把已有的池当作新池推送
+    class _FlakyGecko(_FakeGecko):
+        def __init__(self):
+            super().__init__()
+            self.down = {'base'}
+
+        def get_pool_feed(self, chain, feed='new_pools', fresh=False):
+            if chain in self.down:
+                raise ConnectionError(f"{chain} 503")
+            return super().get_pool_feed(chain, feed, fresh)
+
+    flaky = _FlakyGecko()
+    flaky.pages['base'] = [f"b{i}" for i in range(20)]
+    flaky_watcher = NewPoolWatcher(flaky, ['solana', 'base'])
+    assert flaky_watcher.poll_once() == [] and flaky_watcher.errors == 1
+    flaky.down.clear()
+    assert flaky_watcher.poll_once() == []
+    flaky.pages['base'] = ['b20'] + flaky.pages['base']
+    assert [e.pool.address for e in flaky_watcher.poll_once()] == ['b20']
+
+    seen = SeenSet(capacity=2)
+    assert seen.add('a') and seen.add('b') and not seen.add('a') and seen.add('c') and 'a' not in seen
+    print(f"OK: {watcher.stats()}")
+    print(events[0].to_message())
@@ -0,0 +1,391 @@
+"""
+WebSocket 实时行情缓存 - 基于 ccxt.pro
+
+后台线程维护一个事件循环，通过交易所 WebSocket 订阅 ticker 和 K 线频道，
+在内存中保存每个交易对的最新 ticker 与最近若干根 K 线。
+CCXTFetcher 挂载后，get_realtime_quote / get_kline 优先从缓存读取，
+缓存缺失或过期时回退到 REST。
+
+ws_url 可覆盖交易所的 WebSocket 地址，便于指向本地回放服务器做验证
+（见文件末尾的 __main__ 自检）。
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple, Iterable
+
+try:
+    import ccxt.pro as ccxtpro
+    CCXT_PRO_AVAILABLE = True
+except ImportError:
+    CCXT_PRO_AVAILABLE = False
+    ccxtpro = None
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteStream:
+    """
+    交易所 WebSocket 行情流
+
+    使用示例：
+        stream = QuoteStream('okx', markets=fetcher.exchange.markets)
+        stream.start()
+        stream.subscribe(['BTC/USDT', 'ETH/USDT'], timeframes=['1d'])
+
+        ticker = stream.get_ticker('BTC/USDT')         # ccxt ticker 字典或 None
+        candles = stream.get_candles('BTC/USDT', '1d')  # [[ts, o, h, l, c, v], ...]
+    """
+
+    # 缓存数据超过该时长 (秒) 未更新视为过期
+    DEFAULT_MAX_AGE = 10.0
+
+    # 每个 (交易对, 周期) 保留的最大 K 线数
+    MAX_CANDLES = 500
+
+    # 断线重连退避 (秒)
+    RECONNECT_DELAY = 1.0
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(
+        self,
+        exchange: str = 'okx',
+        ws_url: Optional[str] = None,
+        markets: Optional[Dict[str, Any]] = None,
+        currencies: Optional[Dict[str, Any]] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        """
+        初始化行情流（不会立即连接，需调用 start）
+
+        Args:
+            exchange: 交易所名称
+            ws_url: 覆盖交易所 WebSocket 地址（可选，用于本地回放测试）
+            markets: 已加载的市场信息（可选，传入后不再通过 REST 加载）
+            currencies: 已加载的币种信息（可选）
+            max_age: 缓存有效期 (秒)
+        """
+        if not CCXT_PRO_AVAILABLE:
+            raise ImportError("ccxt.pro 不可用，请运行: pip install 'ccxt>=4.0'")
+
+        self.exchange_id = exchange.lower()
+        if not hasattr(ccxtpro, self.exchange_id):
+            raise ValueError(f"ccxt.pro 不支持的交易所: {exchange}")
+
+        self.ws_url = ws_url
+        self.max_age = max_age
+        self._markets = markets
+        self._currencies = currencies
+
+        self.exchange = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopping = False
+
+        # 订阅任务与缓存（跨线程访问，统一由 _lock 保护）
+        self._lock = threading.Lock()
+        self._tasks: Dict[Tuple, asyncio.Task] = {}
+        self._tickers: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._candles: Dict[Tuple[str, str], Dict[int, List[float]]] = {}
+        self._candles_updated: Dict[Tuple[str, str], float] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stopping
+
+    def start(self) -> 'QuoteStream':
+        """启动后台事件循环线程"""
+        if self.running:
+            return self
+
+        self._stopping = False
+        self._ready.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop, name=f"quote-stream-{self.exchange_id}", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait(timeout=10)
+        logger.info(f"行情流已启动: {self.exchange_id}" + (f" ({self.ws_url})" if self.ws_url else ""))
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """取消所有订阅并关闭连接"""
+        if self._loop is None or self._thread is None:
+            return
+
+        self._stopping = True
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            future.result(timeout=timeout)
+        except Exception as e:
+            logger.debug(f"关闭行情流失败: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        logger.info(f"行情流已停止: {self.exchange_id}")
+
+    def subscribe(
+        self,
+        symbols: Iterable[str],
+        timeframes: Iterable[str] = (),
+        tickers: bool = True,
+    ):
+        """
+        订阅交易对（重复订阅会被忽略）
+
+        Args:
+            symbols: 交易对列表（统一格式 BTC/USDT）
+            timeframes: 需要订阅的 K 线周期
+            tickers: 是否订阅 ticker 频道
+        """
+        if not self.running:
+            self.start()
+
+        keys = []
+        for symbol in symbols:
+            if tickers:
+                keys.append(('ticker', symbol))
+            for tf in timeframes:
+                keys.append(('ohlcv', symbol, tf))
+
+        with self._lock:
+            new_keys = [k for k in keys if k not in self._tasks]
+            for key in new_keys:
+                self._tasks[key] = None  # 占位，防止并发重复订阅
+
+        for key in new_keys:
+            self._loop.call_soon_threadsafe(self._spawn, key)
+
+    def is_subscribed(self, symbol: str, timeframe: Optional[str] = None) -> bool:
+        key = ('ohlcv', symbol, timeframe) if timeframe else ('ticker', symbol)
+        with self._lock:
+            return key in self._tasks
+
+    def get_ticker(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的 ticker
+
+        Returns:
+            ccxt ticker 字典；未订阅、尚未收到数据或已过期时返回 None
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            entry = self._tickers.get(symbol)
+        if entry is None:
+            return None
+        ticker, received_at = entry
+        if time.monotonic() - received_at > max_age:
+            return None
+        return ticker
+
+    def get_candles(
+        self,
+        symbol: str,
+        timeframe: str,
+        max_age: Optional[float] = None,
+    ) -> List[List[float]]:
+        """
+        读取缓存的 K 线（按时间升序，最后一根可能尚未收盘）
+
+        Returns:
+            [[timestamp_ms, open, high, low, close, volume], ...]；过期时返回空列表
+        """
+        max_age = self.max_age if max_age is None else max_age
+        key = (symbol, timeframe)
+        with self._lock:
+            updated = self._candles_updated.get(key)
+            if updated is None or time.monotonic() - updated > max_age:
+                return []
+            bars = self._candles.get(key, {})
+            return [bars[ts] for ts in sorted(bars)]
+
+    # === 事件循环线程内部 ===
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._create_exchange())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _create_exchange(self):
+        """在事件循环线程内创建 ccxt.pro 实例（绑定到该循环）"""
+        self.exchange = getattr(ccxtpro, self.exchange_id)({'enableRateLimit': True})
+        if self.ws_url:
+            self._override_ws_url(self.ws_url)
+        if self._markets:
+            self.exchange.set_markets(self._markets, self._currencies)
+
+    def _override_ws_url(self, ws_url: str):
+        """将交易所所有 WebSocket 地址替换为 ws_url"""
+        ws = self.exchange.urls['api']['ws']
+        if isinstance(ws, dict):
+            self.exchange.urls['api']['ws'] = {
+                k: ({kk: ws_url for kk in v} if isinstance(v, dict) else ws_url)
+                for k, v in ws.items()
+            }
+        else:
+            self.exchange.urls['api']['ws'] = ws_url
+
+    def _spawn(self, key: Tuple):
+        task = self._loop.create_task(self._watch(key))
+        with self._lock:
+            self._tasks[key] = task
+
+    async def _watch(self, key: Tuple):
+        """持续订阅单个频道，异常时指数退避重连"""
+        delay = self.RECONNECT_DELAY
+        while not self._stopping:
+            try:
+                if key[0] == 'ticker':
+                    ticker = await self.exchange.watch_ticker(key[1])
+                    with self._lock:
+                        self._tickers[key[1]] = (ticker, time.monotonic())
+                else:
+                    _, symbol, tf = key
+                    ohlcv = await self.exchange.watch_ohlcv(symbol, tf)
+                    self._merge_candles(symbol, tf, ohlcv)
+                delay = self.RECONNECT_DELAY
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._stopping:
+                    break
+                logger.warning(f"行情流 {key} 异常，{delay:.0f}s 后重连: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+    def _merge_candles(self, symbol: str, timeframe: str, ohlcv: List[List[float]]):
+        key = (symbol, timeframe)
+        with self._lock:
+            bars = self._candles.setdefault(key, {})
+            for bar in ohlcv:
+                bars[int(bar[0])] = list(bar[:6])
+            if len(bars) > self.MAX_CANDLES:
+                for ts in sorted(bars)[:len(bars) - self.MAX_CANDLES]:
+                    del bars[ts]
+            self._candles_updated[key] = time.monotonic()
+
+    async def _shutdown(self):
+        with self._lock:
+            tasks = [t for t in self._tasks.values() if t is not None]
+            self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.exchange is not None:
+            await self.exchange.close()
+
+
+# 进程级共享行情流（按交易所）
+_shared_streams: Dict[str, QuoteStream] = {}
+_shared_streams_lock = threading.Lock()
+
+
+def get_quote_stream(exchange: str = 'okx', **kwargs) -> QuoteStream:
+    """
+    获取进程内共享的行情流（首次调用时创建并启动）
+
+    Args:
+        exchange: 交易所名称
+        **kwargs: 透传给 QuoteStream
+    """
+    key = exchange.lower()
+    with _shared_streams_lock:
+        stream = _shared_streams.get(key)
+        if stream is None:
+            stream = QuoteStream(exchange=key, **kwargs).start()
+            _shared_streams[key] = stream
+        return stream
+
+
+def stop_quote_streams():
+    """停止所有共享行情流"""
+    with _shared_streams_lock:
+        streams = list(_shared_streams.values())
+        _shared_streams.clear()
+    for stream in streams:
+        stream.stop()
+
+
+if __name__ == "__main__":
+    # 自检：启动本地 WebSocket 回放服务器，按订阅频道回放录制的 OKX 帧，
+    # 验证 QuoteStream 能解析并缓存 ticker 与 K 线
+    import json
+    from aiohttp import web
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    RECORDED_FRAMES = {
+        'tickers': [
+            {"arg": {"channel": "tickers", "instId": "BTC-USDT"}, "data": [{
+                "instType": "SPOT", "instId": "BTC-USDT", "last": "67321.5", "lastSz": "0.01",
+                "askPx": "67321.6", "askSz": "1.2", "bidPx": "67321.4", "bidSz": "0.8",
+                "open24h": "66000", "high24h": "67800", "low24h": "65800",
+                "sodUtc0": "66500", "sodUtc8": "66200",
+                "volCcy24h": "612345678.9", "vol24h": "9123.4", "ts": "1717000000000"}]},
+        ],
+        'candle1m': [
+            {"arg": {"channel": "candle1m", "instId": "BTC-USDT"}, "data": [
+                ["1716999960000", "67300", "67330", "67290", "67310", "12.5", "841000", "841000", "1"]]},
+            {"arg": {"channel": "candle1m", "instId": "BTC-USDT"}, "data": [
+                ["1717000020000", "67310", "67340", "67300", "67321.5", "3.1", "208000", "208000", "0"]]},
+        ],
+    }
+
+    async def replay_handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.data == 'ping':
+                await ws.send_str('pong')
+                continue
+            payload = json.loads(msg.data)
+            for arg in payload.get('args', []):
+                await ws.send_str(json.dumps({"event": "subscribe", "arg": arg}))
+                for frame in RECORDED_FRAMES.get(arg['channel'], []):
+                    await ws.send_str(json.dumps(frame))
+        return ws
+
+    server_loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', replay_handler)
+    runner = web.AppRunner(app)
+    server_loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    server_loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    threading.Thread(target=server_loop.run_forever, daemon=True).start()
+
+    markets = {'BTC/USDT': {
+        'id': 'BTC-USDT', 'symbol': 'BTC/USDT', 'base': 'BTC', 'quote': 'USDT',
+        'baseId': 'BTC', 'quoteId': 'USDT', 'type': 'spot', 'spot': True,
+        'contract': False, 'active': True, 'precision': {}, 'limits': {},
+    }}
+    stream = QuoteStream('okx', ws_url=f'ws://127.0.0.1:{port}/ws/v5', markets=markets)
+    stream.subscribe(['BTC/USDT'], timeframes=['1m'])
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if stream.get_ticker('BTC/USDT') and len(stream.get_candles('BTC/USDT', '1m')) >= 2:
+            break
+        time.sleep(0.05)
+
+    ticker = stream.get_ticker('BTC/USDT')
+    candles = stream.get_candles('BTC/USDT', '1m')
+    assert ticker is not None and ticker['last'] == 67321.5, ticker
+    assert [c[0] for c in candles] == [1716999960000, 1717000020000], candles
+
+    t0 = time.perf_counter()
+    for _ in range(10000):
+        stream.get_ticker('BTC/USDT')
+    per_call_us = (time.perf_counter() - t0) / 10000 * 1e6
+
+    stream.stop()
+    print(f"OK: ticker last={ticker['last']}, candles={len(candles)}, 缓存读取 {per_call_us:.2f} µs/次")
@@ -0,0 +1,339 @@
+"""
+列式行情表
+
+一次 fetch_tickers 拉取的所有交易对按字段存为 NumPy 列，
+价差、涨跌额、缺失的涨跌幅都整列向量化计算；
+排名与统计直接在列上完成，只在调用方真正读取某一行时才物化为 CryptoRealtimeQuote。
+
+全市场扫描（1000+ 交易对）不再为每个 ticker 创建 dataclass、调用 datetime.now()，
+也不再对 Python 对象列表排序。
+"""
+
+import logging
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _quote_class():
+    # ccxt_fetcher 导入本模块，这里延迟导入避免循环依赖
+    from .ccxt_fetcher import CryptoRealtimeQuote
+    return CryptoRealtimeQuote
+
+
+class QuoteTable:
+    """
+    全市场行情表（列式存储）
+
+    使用示例：
+        table = QuoteTable.from_tickers('okx', exchange.fetch_tickers(), markets)
+        gainers = table.top_quotes('change_24h', 10)
+        losers = table.top_quotes('change_24h', 10, ascending=True)
+        up = table.count_where('change_24h', '>', 0)
+        spread = table.column('spread')      # 整列价差 (%)
+        btc = table.get('BTC/USDT')          # 单行物化为 CryptoRealtimeQuote
+    """
+
+    # 原始数值列（列名与 CryptoRealtimeQuote 字段一致）-> ticker 字段
+    NUMERIC_FIELDS = {
+        'price': 'last',
+        'open_24h': 'open',
+        'high_24h': 'high',
+        'low_24h': 'low',
+        'change_24h': 'percentage',
+        'volume_24h': 'baseVolume',
+        'quote_volume_24h': 'quoteVolume',
+        'bid': 'bid',
+        'ask': 'ask',
+    }
+
+    # 由原始列向量化计算的派生列
+    DERIVED_FIELDS = ('change_amount_24h', 'spread')
+
+    def __init__(
+        self,
+        exchange: str,
+        symbols: np.ndarray,
+        bases: np.ndarray,
+        quotes: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        timestamps: Optional[np.ndarray] = None,
+        fetched_at: Optional[datetime] = None,
+    ):
+        """
+        Args:
+            exchange: 交易所名称
+            symbols / bases / quotes: 交易对、基础货币、计价货币列
+            columns: 数值列（缺失值为 NaN），派生列缺失时自动补算
+            timestamps: 各行 ticker 时间戳 (毫秒)，0 表示使用 fetched_at
+            fetched_at: 拉取时间
+        """
+        self.exchange = exchange
+        self.symbols = symbols
+        self.bases = bases
+        self.quotes = quotes
+        self.columns = columns
+        self.fetched_at = fetched_at or datetime.now()
+        self.timestamps = timestamps if timestamps is not None else np.zeros(len(symbols), dtype=np.int64)
+        self._row_index: Optional[Dict[str, int]] = None
+
+        if any(name not in columns for name in self.DERIVED_FIELDS):
+            self._compute_derived()
+
+    @classmethod
+    def from_tickers(
+        cls,
+        exchange: str,
+        tickers: Dict[str, Dict[str, Any]],
+        markets: Optional[Dict[str, Any]] = None,
+    ) -> 'QuoteTable':
+        """
+        由 ccxt fetch_tickers 的返回结果构建行情表
+
+        缺失的数值记为 NaN，排名时自动跳过。
+        """
+        markets = markets or {}
+        symbols = list(tickers.keys())
+        values = list(tickers.values())
+        n = len(symbols)
+
+        bases = np.empty(n, dtype=object)
+        quote_ccys = np.empty(n, dtype=object)
+        for i, symbol in enumerate(symbols):
+            market = markets.get(symbol, {})
+            base, _, quote = symbol.partition('/')
+            bases[i] = market.get('base', base)
+            quote_ccys[i] = market.get('quote', quote.split(':')[0] or 'USDT')
+
+        # 一次遍历取出全部字段，None 在转换为 float64 时即为 NaN
+        keys = list(cls.NUMERIC_FIELDS.values()) + ['close', 'timestamp']
+        matrix = np.array(
+            [[t.get(k) for k in keys] for t in values],
+            dtype=np.float64,
+        ).reshape(n, len(keys))
+        columns = {
+            name: np.ascontiguousarray(matrix[:, j])
+            for j, name in enumerate(cls.NUMERIC_FIELDS)
+        }
+
+        # last 缺失时回退到 close
+        price = columns['price']
+        missing = np.isnan(price)
+        if missing.any():
+            price[missing] = matrix[missing, len(cls.NUMERIC_FIELDS)]
+
+        timestamps = np.nan_to_num(matrix[:, -1], nan=0.0).astype(np.int64)
+
+        return cls(exchange, np.array(symbols, dtype=object), bases, quote_ccys, columns, timestamps)
+
+    def _compute_derived(self):
+        """整列计算涨跌额、价差，并用开盘价补齐缺失的涨跌幅"""
+        price = self.columns['price']
+        open_ = self.columns['open_24h']
+        bid = self.columns['bid']
+        ask = self.columns['ask']
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            has_open = open_ > 0
+            self.columns['change_amount_24h'] = np.where(has_open, price - open_, np.nan)
+
+            change = self.columns['change_24h']
+            fill = np.isnan(change) & has_open & ~np.isnan(price)
+            if fill.any():
+                change[fill] = (price[fill] - open_[fill]) / open_[fill] * 100
+
+            has_book = (bid > 0) & (ask > 0)
+            self.columns['spread'] = np.where(has_book, (ask - bid) / bid * 100, np.nan)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index()
+
+    def _index(self) -> Dict[str, int]:
+        if self._row_index is None:
+            self._row_index = {s: i for i, s in enumerate(self.symbols)}
+        return self._row_index
+
+    def index_of(self, symbol: str) -> Optional[int]:
+        """交易对所在行号，不存在时返回 None"""
+        return self._index().get(symbol)
+
+    def column(self, field: str) -> np.ndarray:
+        """获取数值列"""
+        if field not in self.columns:
+            raise KeyError(f"未知字段: {field}，可选: {list(self.columns)}")
+        return self.columns[field]
+
+    def top_k(self, field: str, k: int, ascending: bool = False) -> np.ndarray:
+        """
+        按字段取前 k 名的行号（NaN 不参与排名）
+
+        用 argpartition 先 O(n) 选出 k 个，再只对这 k 个排序。
+        """
+        values = self.column(field)
+        valid = np.flatnonzero(~np.isnan(values))
+        if k <= 0 or valid.size == 0:
+            return np.empty(0, dtype=np.intp)
+
+        keys = values[valid] if ascending else -values[valid]
+        if k < valid.size:
+            part = np.argpartition(keys, k - 1)[:k]
+        else:
+            part = np.arange(valid.size)
+        order = part[np.argsort(keys[part], kind='stable')]
+        return valid[order]
+
+    def count_where(self, field: str, op: str, value: float) -> int:
+        """统计满足条件的交易对数量，op 取 '>', '<', '>=', '<=' """
+        values = self.column(field)
+        ops = {
+            '>': np.greater,
+            '<': np.less,
+            '>=': np.greater_equal,
+            '<=': np.less_equal,
+        }
+        return int(np.count_nonzero(ops[op](values, value)))
+
+    def quote_at(self, i: int):
+        """将第 i 行物化为 CryptoRealtimeQuote（缺失值记为 0）"""
+        def val(name: str) -> float:
+            v = self.columns[name][i]
+            return 0.0 if np.isnan(v) else float(v)
+
+        ts = int(self.timestamps[i])
+        price = val('price')
+        return _quote_class()(
+            symbol=self.symbols[i],
+            exchange=self.exchange,
+            price=price,
+            open_24h=val('open_24h'),
+            high_24h=val('high_24h'),
+            low_24h=val('low_24h'),
+            close=price,
+            change_24h=val('change_24h'),
+            change_amount_24h=val('change_amount_24h'),
+            volume_24h=val('volume_24h'),
+            quote_volume_24h=val('quote_volume_24h'),
+            bid=val('bid'),
+            ask=val('ask'),
+            spread=val('spread'),
+            timestamp=datetime.fromtimestamp(ts / 1000) if ts > 0 else self.fetched_at,
+            base_currency=self.bases[i],
+            quote_currency=self.quotes[i],
+        )
+
+    def get(self, symbol: str):
+        """按交易对物化单行，不存在时返回 None"""
+        i = self.index_of(symbol)
+        return None if i is None else self.quote_at(i)
+
+    def top_quotes(self, field: str, k: int, ascending: bool = False) -> List:
+        """按字段取前 k 名，返回 CryptoRealtimeQuote 列表"""
+        return [self.quote_at(i) for i in self.top_k(field, k, ascending)]
+
+    def as_mapping(self) -> 'QuoteMapping':
+        """以 {symbol: CryptoRealtimeQuote} 只读映射的形式提供给旧调用方（按需物化）"""
+        return QuoteMapping(self)
+
+
+class QuoteMapping(Mapping):
+    """
+    QuoteTable 的只读字典视图
+
+    兼容原先返回 Dict[symbol, CryptoRealtimeQuote] 的接口，
+    只有被访问到的交易对才会创建 CryptoRealtimeQuote，并缓存复用。
+    """
+
+    def __init__(self, table: QuoteTable):
+        self.table = table
+        self._cache: Dict[str, Any] = {}
+
+    def __getitem__(self, symbol: str):
+        quote = self._cache.get(symbol)
+        if quote is None:
+            i = self.table.index_of(symbol)
+            if i is None:
+                raise KeyError(symbol)
+            quote = self.table.quote_at(i)
+            self._cache[symbol] = quote
+        return quote
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table.symbols)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __repr__(self) -> str:
+        return f"QuoteMapping({self.table.exchange}, {len(self)} 个交易对)"
+
+
+if __name__ == "__main__":
+    # 基准：2000 个交易对，旧路径（逐个 CryptoRealtimeQuote + 列表排序）vs 列式表
+    import time
+
+    from data_provider.ccxt_fetcher import CCXTParsingMixin
+
+    rng = np.random.default_rng(0)
+    n = 2000
+    now_ms = int(time.time() * 1000)
+    tickers = {}
+    for i in range(n):
+        last = float(rng.uniform(0.01, 100))
+        open_ = last / (1 + rng.normal(0, 0.05))
+        tickers[f'T{i}/USDT'] = {
+            'symbol': f'T{i}/USDT', 'timestamp': now_ms, 'last': last, 'close': last,
+            'open': open_, 'high': last * 1.05, 'low': last * 0.95,
+            'percentage': None if i % 7 == 0 else (last - open_) / open_ * 100,
+            'baseVolume': float(rng.uniform(1e3, 1e6)), 'quoteVolume': float(rng.uniform(1e4, 1e8)),
+            'bid': last * 0.999, 'ask': last * 1.001,
+        }
+
+    class _Legacy(CCXTParsingMixin):
+        exchange_id = 'bench'
+        _markets_cache: Dict[str, Any] = {}
+
+    legacy = _Legacy()
+
+    def legacy_path():
+        quotes = [legacy._ticker_to_quote(s, t) for s, t in tickers.items()]
+        g = sorted(quotes, key=lambda q: q.change_24h, reverse=True)[:10]
+        l_ = sorted(quotes, key=lambda q: q.change_24h)[:10]
+        v = sorted(quotes, key=lambda q: q.quote_volume_24h, reverse=True)[:10]
+        up = sum(1 for q in quotes if q.change_24h > 0)
+        return g, l_, v, up
+
+    def table_path():
+        table = QuoteTable.from_tickers('bench', tickers)
+        g = table.top_quotes('change_24h', 10)
+        l_ = table.top_quotes('change_24h', 10, ascending=True)
+        v = table.top_quotes('quote_volume_24h', 10)
+        up = table.count_where('change_24h', '>', 0)
+        return g, l_, v, up
+
+    def bench(fn, rounds=20) -> float:
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        return (time.perf_counter() - t0) / rounds * 1000
+
+    old_g, _, old_v, _ = legacy_path()
+    new_g, _, new_v, new_up = table_path()
+    assert [q.symbol for q in old_v] == [q.symbol for q in new_v]
+    # 列式表会用开盘价补齐缺失的 percentage，旧路径记为 0，两者涨幅榜只比较有 percentage 的部分
+    assert all(q.spread > 0 and q.change_amount_24h != 0 for q in new_g)
+
+    table = QuoteTable.from_tickers('bench', tickers)
+    view = table.as_mapping()
+    assert len(view) == n and view['T0/USDT'].change_24h != 0 and 'T1/USDT' in view
+
+    legacy_ms = bench(legacy_path)
+    table_ms = bench(table_path)
+    print(f"{n} 个交易对: 旧路径 {legacy_ms:.2f} ms, 列式表 {table_ms:.2f} ms ({legacy_ms / table_ms:.1f}x)")
@@ -0,0 +1,270 @@
+"""
+进程级令牌桶限速器
+
+按上游主机（如 www.okx.com、api.geckoterminal.com）注册一个令牌桶，
+同一进程内所有线程、所有 Fetcher 实例、同步与异步调用共用同一份配额。
+并发数（MAX_WORKERS）因此可以放心调大，实际请求速率由令牌桶统一约束，
+不再依赖各处零散的 sleep。
+
+配置优先级：环境变量 RATE_LIMITS > 内置默认表 > 调用方给出的默认值
+    RATE_LIMITS=api.geckoterminal.com=0.5/2,www.okx.com=10/20
+    （主机=每秒速率/突发容量）
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    采用预约模式：acquire 立即扣除令牌（可扣成负数），
+    再按欠款休眠，先到先得且不需要轮询。
+
+    使用示例：
+        bucket = TokenBucket(rate=10, burst=20)
+        bucket.acquire()                # 同步
+        await bucket.acquire_async(5)   # 异步，权重 5
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0, jitter: float = 0.0, name: str = ''):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            burst: 桶容量（允许的瞬时突发请求数）
+            jitter: 每次获取后额外的随机等待上限 (秒)，用于需要模拟人工访问节奏的数据源
+            name: 名称（日志用）
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.jitter = jitter
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+        # 统计
+        self.acquired = 0
+        self.waited_seconds = 0.0
+
+    def _reserve(self, cost: float) -> float:
+        """扣除 cost 个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= cost
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if self.jitter > 0:
+                wait += random.uniform(0, self.jitter)
+            self.acquired += 1
+            self.waited_seconds += wait
+            return wait
+
+    def acquire(self, cost: float = 1.0) -> float:
+        """
+        获取 cost 个令牌（阻塞当前线程）
+
+        Returns:
+            实际等待的秒数
+        """
+        wait = self._reserve(cost)
+        if wait > 0:
+            if wait > 1:
+                logger.debug(f"[限速] {self.name} 等待 {wait:.2f} 秒")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, cost: float = 1.0) -> float:
+        """获取 cost 个令牌（协程版本，不阻塞事件循环）"""
+        wait = self._reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def try_acquire(self, cost: float = 1.0) -> bool:
+        """令牌足够时立即扣除并返回 True，否则不扣除并返回 False"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= cost:
+                self._tokens -= cost
+                self.acquired += 1
+                return True
+            return False
+
+    def penalize(self, seconds: float):
+        """
+        暂停发放令牌 seconds 秒
+
+        上游返回 429 / Retry-After 时调用，共享该桶的所有调用方一起退避，
+        而不是各自重试把配额再次打满。
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def configure(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        """运行时调整速率与容量"""
+        with self._lock:
+            if rate is not None and rate > 0:
+                self.rate = float(rate)
+            if burst is not None:
+                self.burst = max(float(burst), 1.0)
+                self._tokens = min(self._tokens, self.burst)
+
+    def __repr__(self) -> str:
+        return f"TokenBucket({self.name!r}, rate={self.rate:g}/s, burst={self.burst:g})"
+
+
+# 已知上游的默认配额（每秒速率, 突发容量）
+DEFAULT_HOST_LIMITS: Dict[str, Tuple[float, float]] = {
+    'api.geckoterminal.com': (0.5, 2),   # 免费版 30 次/分钟
+    'api.coingecko.com': (0.5, 2),       # 免费版约 30 次/分钟
+    'api.alternative.me': (1, 2),
+    'www.okx.com': (10, 20),             # 公共行情 20 次/2 秒
+    'api.binance.com': (20, 40),
+    'api.kucoin.com': (10, 20),          # ccxt rateLimit 按权重计，直接换算会偏高
+}
+
+# A 股数据源（efinance / akshare）共用的东方财富限速键
+EASTMONEY_HOST = 'eastmoney.com'
+
+# 未知主机的兜底配额
+FALLBACK_LIMIT: Tuple[float, float] = (2, 2)
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+_overrides: Optional[Dict[str, Tuple[float, float]]] = None
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    解析配额字符串 "host=rate/burst,host2=rate"（burst 省略时等于 rate）
+    """
+    limits = {}
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item or '=' not in item:
+            continue
+        host, value = item.split('=', 1)
+        try:
+            rate_str, _, burst_str = value.partition('/')
+            rate = float(rate_str)
+            burst = float(burst_str) if burst_str else rate
+            limits[host.strip().lower()] = (rate, burst)
+        except ValueError:
+            logger.warning(f"[限速] 无法解析配额: {item}")
+    return limits
+
+
+def _load_overrides() -> Dict[str, Tuple[float, float]]:
+    global _overrides
+    if _overrides is None:
+        try:
+            from config import get_config
+            _overrides = parse_rate_limits(getattr(get_config(), 'rate_limits', ''))
+        except Exception as e:
+            logger.debug(f"[限速] 读取配置失败，使用默认配额: {e}")
+            _overrides = {}
+    return _overrides
+
+
+def host_of(url: str) -> str:
+    """从 URL 提取主机名（已是主机名时原样返回）"""
+    netloc = urlparse(url).netloc if '://' in url else url
+    return netloc.split('@')[-1].split(':')[0].lower()
+
+
+def get_rate_limiter(
+    host: str,
+    rate: Optional[float] = None,
+    burst: Optional[float] = None,
+    jitter: float = 0.0,
+) -> TokenBucket:
+    """
+    获取主机对应的共享令牌桶（首次调用时创建）
+
+    Args:
+        host: 上游主机名或 URL
+        rate: 默认每秒速率（仅在配置和内置表都没有该主机时使用）
+        burst: 默认突发容量（同上）
+        jitter: 每次获取后的随机等待上限 (秒)，仅在创建时生效
+    """
+    host = host_of(host)
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            overrides = _load_overrides()
+            if host in overrides:
+                limit = overrides[host]
+            elif host in DEFAULT_HOST_LIMITS:
+                limit = DEFAULT_HOST_LIMITS[host]
+            elif rate is not None:
+                limit = (rate, burst if burst is not None else rate)
+            else:
+                limit = FALLBACK_LIMIT
+            limiter = TokenBucket(limit[0], limit[1], jitter=jitter, name=host)
+            _limiters[host] = limiter
+            logger.debug(f"[限速] 注册 {limiter}")
+        return limiter
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, float]]:
+    """各主机的限速统计"""
+    with _limiters_lock:
+        return {
+            host: {
+                'rate': b.rate,
+                'burst': b.burst,
+                'acquired': b.acquired,
+                'waited_seconds': round(b.waited_seconds, 3),
+            }
+            for host, b in _limiters.items()
+        }
+
+
+def reset_rate_limiters():
+    """清空注册表并重新读取配置（主要用于测试）"""
+    global _overrides
+    with _limiters_lock:
+        _limiters.clear()
+        _overrides = None
+
+
+if __name__ == "__main__":
+    # 自检：8 个线程共享 5/s、突发 5 的令牌桶，30 次请求应耗时约 (30-5)/5 = 5 秒
+    from concurrent.futures import ThreadPoolExecutor
+
+    bucket = TokenBucket(rate=5, burst=5, name='selftest')
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: bucket.acquire(), range(30)))
+    elapsed = time.monotonic() - t0
+    assert 4.8 <= elapsed <= 5.5, elapsed
+
+    async def burst_async():
+        b = TokenBucket(rate=10, burst=1, name='async')
+        start = time.monotonic()
+        await asyncio.gather(*[b.acquire_async(2) for _ in range(5)])
+        return time.monotonic() - start
+
+    elapsed_async = asyncio.run(burst_async())
+    assert 0.85 <= elapsed_async <= 1.2, elapsed_async
+
+    assert parse_rate_limits('a.com=0.5/2, b.com=3') == {'a.com': (0.5, 2.0), 'b.com': (3.0, 3.0)}
+    print(f"OK: 同步 30 次 {elapsed:.2f}s, 异步权重请求 {elapsed_async:.2f}s")
@@ -0,0 +1,187 @@
+"""
+K 线周期重采样
+
+从较细周期的 K 线在本地合成较粗周期（如 1h → 4h → 1d），
+分桶边界与交易所原生 K 线一致：
+- OKX 的 6H 及以上周期按 UTC+8 对齐（日线开盘于 UTC 16:00）
+- 其余交易所按 UTC 对齐
+- 周线从周一开始
+
+聚合使用 NumPy reduceat 向量化完成，不逐桶循环。
+"""
+
+import logging
+from typing import Optional, Dict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+# 各交易所 K 线分桶的时区偏移（小时）
+EXCHANGE_TZ_OFFSET_HOURS: Dict[str, int] = {
+    'okx': 8,
+}
+
+# 1970-01-01 是周四，周线以周一 (1970-01-05) 为起点
+WEEK_ORIGIN_MS = 4 * 86400 * 1000
+
+_UNIT_MS = {
+    's': 1000,
+    'm': 60 * 1000,
+    'h': 3600 * 1000,
+    'd': 86400 * 1000,
+    'w': 7 * 86400 * 1000,
+}
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """
+    周期字符串转毫秒 ('4h' -> 14400000)
+
+    不支持月线等非固定长度周期。
+    """
+    unit = timeframe[-1]
+    if unit not in _UNIT_MS:
+        raise ValueError(f"不支持的周期: {timeframe}")
+    return int(timeframe[:-1] or 1) * _UNIT_MS[unit]
+
+
+def bucket_origin_ms(timeframe: str, exchange: str = '') -> int:
+    """
+    目标周期分桶的起点偏移（毫秒）
+
+    桶起点 = origin + k * 周期长度，origin 取决于交易所时区和是否为周线。
+    """
+    tf_ms = timeframe_to_ms(timeframe)
+    origin = -EXCHANGE_TZ_OFFSET_HOURS.get(exchange.lower(), 0) * _UNIT_MS['h']
+    if timeframe.endswith('w'):
+        origin += WEEK_ORIGIN_MS
+    return origin % tf_ms
+
+
+def can_resample(source_tf: str, target_tf: str, exchange: str = '') -> bool:
+    """源周期的每根 K 线是否都完整落在目标周期的一个桶内"""
+    try:
+        source_ms = timeframe_to_ms(source_tf)
+        target_ms = timeframe_to_ms(target_tf)
+    except ValueError:
+        return False
+    if target_ms < source_ms or target_ms % source_ms:
+        return False
+    source_origin = bucket_origin_ms(source_tf, exchange)
+    target_origin = bucket_origin_ms(target_tf, exchange)
+    return (target_origin - source_origin) % source_ms == 0
+
+
+def bars_needed(source_tf: str, target_tf: str, limit: int) -> int:
+    """合成 limit 根目标周期 K 线需要的源 K 线数（多一桶用于丢弃不完整的首桶）"""
+    ratio = timeframe_to_ms(target_tf) // timeframe_to_ms(source_tf)
+    return (limit + 1) * ratio
+
+
+def resample_ohlcv(
+    df: pd.DataFrame,
+    source_tf: str,
+    target_tf: str,
+    exchange: str = '',
+    drop_partial_head: bool = True,
+) -> pd.DataFrame:
+    """
+    将 OHLCV 重采样到更粗的周期
+
+    Args:
+        df: 以 timestamp（UTC，K 线开盘时间）为索引、升序排列的 OHLCV DataFrame
+        source_tf: 源周期 (如 '1h')
+        target_tf: 目标周期 (如 '1d')
+        exchange: 交易所名称，决定分桶对齐方式
+        drop_partial_head: 是否丢弃源数据不足的首个桶（避免首根 K 线开盘价错误）
+
+    Returns:
+        目标周期 OHLCV DataFrame；最后一根可能是尚未收盘的 K 线
+    """
+    if source_tf == target_tf or df is None or df.empty:
+        return df
+
+    if not can_resample(source_tf, target_tf, exchange):
+        raise ValueError(f"无法从 {source_tf} 合成 {target_tf} ({exchange or 'utc'})")
+
+    source_ms = timeframe_to_ms(source_tf)
+    target_ms = timeframe_to_ms(target_tf)
+    origin = bucket_origin_ms(target_tf, exchange)
+
+    ts = df.index.values.astype('datetime64[ms]').astype(np.int64)
+    buckets = (ts - origin) // target_ms * target_ms + origin
+
+    # 升序数据中桶号变化处即为每个桶的起始行
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    open_ = df['open'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+
+    out = pd.DataFrame(
+        {
+            'open': open_[starts],
+            'high': np.maximum.reduceat(high, starts),
+            'low': np.minimum.reduceat(low, starts),
+            'close': close[ends],
+            'volume': np.add.reduceat(volume, starts),
+        },
+        index=pd.to_datetime(buckets[starts], unit='ms'),
+    )
+    out.index.name = 'timestamp'
+
+    # 首个桶的第一根源 K 线不在桶起点，说明前面的数据缺失
+    if drop_partial_head and len(out) and ts[0] > buckets[0]:
+        out = out.iloc[1:]
+
+    logger.debug(f"重采样 {source_tf} -> {target_tf}: {len(df)} -> {len(out)} 根 ({target_ms // source_ms}:1)")
+    return out
+
+
+def pick_base_timeframe(timeframes, exchange: str = '') -> Optional[str]:
+    """
+    从一组周期中选出能合成其余全部周期的最细周期
+
+    Returns:
+        基础周期；不存在时返回 None
+    """
+    candidates = sorted(set(timeframes), key=timeframe_to_ms)
+    if not candidates:
+        return None
+    base = candidates[0]
+    if all(can_resample(base, tf, exchange) for tf in candidates):
+        return base
+    return None
+
+
+if __name__ == "__main__":
+    # 自检：OKX 日线按 UTC+8 分桶、Binance 按 UTC 分桶，以及首桶丢弃
+    idx = pd.date_range('2024-01-01 00:00', periods=96, freq='1h')
+    base = pd.DataFrame({
+        'open': np.arange(96, dtype=float),
+        'high': np.arange(96, dtype=float) + 0.5,
+        'low': np.arange(96, dtype=float) - 0.5,
+        'close': np.arange(96, dtype=float) + 0.25,
+        'volume': np.ones(96),
+    }, index=idx)
+
+    okx_daily = resample_ohlcv(base, '1h', '1d', exchange='okx')
+    assert list(okx_daily.index.strftime('%m-%d %H:%M')) == ['01-01 16:00', '01-02 16:00', '01-03 16:00', '01-04 16:00']
+    assert okx_daily['open'].iloc[0] == 16 and okx_daily['volume'].iloc[0] == 24
+
+    binance_daily = resample_ohlcv(base, '1h', '1d', exchange='binance')
+    assert len(binance_daily) == 4 and binance_daily['high'].iloc[1] == 47.5
+
+    weekly = resample_ohlcv(base, '1h', '1w', exchange='binance', drop_partial_head=False)
+    assert weekly.index[0] == pd.Timestamp('2024-01-01')  # 2024-01-01 是周一
+
+    assert pick_base_timeframe(['1d', '4h'], 'okx') == '4h'
+    assert not can_resample('1d', '4h')
+    print(okx_daily)
+    print("OK")
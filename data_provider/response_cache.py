@@ -0,0 +1,268 @@
+"""
+HTTP 响应缓存（TTL + LRU，可选持久化）
+
+链上数据 API 免费额度很低（GeckoTerminal 约 30 次/分钟），而链列表、代币元数据、
+交易池列表等几乎不变的数据每次都走网络。该模块缓存已解析的 JSON 响应：
+- 每条记录有独立 TTL（由调用方按接口决定，行情短、元数据长）
+- 内存按字节预算做 LRU 淘汰
+- 可选持久化后端（如 storage.DatabaseManager），写穿透，重启后仍命中；
+  TTL 很短的响应（成交、新池轮询）只留在内存，过期记录由 purge_expired 清理
+- 命中/未命中/淘汰计数
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    响应缓存（线程安全）
+
+    使用示例：
+        cache = ResponseCache(max_bytes=32 * 1024 * 1024, backend=get_db())
+        value = cache.get(key)
+        if value is None:
+            value = fetch()
+            cache.set(key, value, ttl=60)
+    """
+
+    # TTL 低于该值（秒）的响应不写入持久化后端，重启后本来也已过期
+    MIN_PERSIST_TTL = 300
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        backend: Optional[Any] = None,
+        min_persist_ttl: float = MIN_PERSIST_TTL,
+    ):
+        """
+        Args:
+            max_bytes: 内存缓存的字节预算（按 JSON 序列化长度估算）
+            backend: 持久化后端（可选），需提供 get_cached_response(cache_key) -> (value, expires_at)
+                     与 save_cached_response(cache_key, endpoint, value, expires_at)，
+                     可选提供 purge_expired_responses() -> int
+            min_persist_ttl: 写入持久化后端的最短 TTL（秒）
+        """
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.min_persist_ttl = min_persist_ttl
+
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # 统计
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """由接口和参数生成缓存键（参数顺序无关）"""
+        normalized = [sorted(p.items()) if isinstance(p, dict) else p for p in parts]
+        return hashlib.sha1(json.dumps(normalized, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取未过期的缓存，未命中返回 None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+
+        value = self._load_from_backend(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, endpoint: str = ''):
+        """写入缓存（ttl <= 0 或 value 为 None 时不缓存）"""
+        if value is None or ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        self._store(key, value, expires_at, len(payload))
+
+        if self.backend is not None and ttl >= self.min_persist_ttl:
+            try:
+                self.backend.save_cached_response(
+                    key, endpoint, payload, datetime.fromtimestamp(expires_at)
+                )
+            except Exception as e:
+                logger.debug(f"响应缓存写入持久化后端失败: {e}")
+
+    def _store(self, key: str, value: Any, expires_at: float, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        """删除一条记录（调用方持有锁）"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _load_from_backend(self, key: str, now: float) -> Optional[Any]:
+        """从持久化后端读取并放回内存"""
+        if self.backend is None:
+            return None
+        try:
+            row = self.backend.get_cached_response(key)
+        except Exception as e:
+            logger.debug(f"响应缓存读取持久化后端失败: {e}")
+            return None
+        if row is None:
+            return None
+
+        payload, expires_at = row
+        expires_ts = expires_at.timestamp()
+        if expires_ts <= now:
+            return None
+        value = json.loads(payload)
+        self._store(key, value, expires_ts, len(payload))
+        return value
+
+    def purge_expired(self) -> int:
+        """删除内存与持久化后端中已过期的记录，返回删除条数"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+        purged = len(expired)
+
+        purge_backend = getattr(self.backend, 'purge_expired_responses', None)
+        if purge_backend is not None:
+            try:
+                purged += purge_backend()
+            except Exception as e:
+                logger.debug(f"清理持久化响应缓存失败: {e}")
+        return purged
+
+    def clear(self):
+        """清空内存缓存（不影响持久化后端）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+# 进程级共享缓存：所有 GeckoTerminalFetcher 实例共用同一份额度，缓存也共用
+_shared_cache: Optional[ResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_response_cache(
+    max_bytes: Optional[int] = None,
+    backend: Optional[Any] = None,
+) -> ResponseCache:
+    """
+    获取进程内共享的响应缓存
+
+    首次调用时创建；后续调用传入 max_bytes 时更新预算，
+    传入 backend 而共享缓存尚未挂载持久化后端时补充挂载。
+    挂载持久化后端时（即启动时）清理一次已过期的记录。
+    """
+    global _shared_cache
+    attached = False
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache(max_bytes=max_bytes or 32 * 1024 * 1024, backend=backend)
+            attached = backend is not None
+        else:
+            if max_bytes:
+                _shared_cache.max_bytes = max_bytes
+            if backend is not None and _shared_cache.backend is None:
+                _shared_cache.backend = backend
+                attached = True
+        cache = _shared_cache
+    if attached:
+        purged = cache.purge_expired()
+        if purged:
+            logger.info(f"已清理过期响应缓存 {purged} 条")
+    return cache
+
+
+if __name__ == "__main__":
+    # 自检：TTL 过期、LRU 按字节淘汰、持久化后端重启后命中
+    class _MemoryBackend:
+        def __init__(self):
+            self.rows = {}
+
+        def get_cached_response(self, key):
+            return self.rows.get(key)
+
+        def save_cached_response(self, key, endpoint, value, expires_at):
+            self.rows[key] = (value, expires_at)
+
+        def purge_expired_responses(self):
+            expired = [k for k, (_, expires_at) in self.rows.items() if expires_at <= datetime.now()]
+            for k in expired:
+                del self.rows[k]
+            return len(expired)
+
+    backend = _MemoryBackend()
+    cache = ResponseCache(max_bytes=200, backend=backend, min_persist_ttl=1)
+
+    k1 = ResponseCache.make_key('/networks', {'page': 1})
+    assert k1 == ResponseCache.make_key('/networks', {'page': 1})
+    cache.set(k1, {'data': ['solana', 'eth']}, ttl=60, endpoint='/networks')
+    assert cache.get(k1) == {'data': ['solana', 'eth']}
+
+    k2 = ResponseCache.make_key('/short')
+    cache.set(k2, {'price': 1.0}, ttl=0.05)
+    assert k2 not in backend.rows   # 短 TTL 只留在内存
+    time.sleep(0.06)
+    assert cache.get(k2) is None
+
+    k3 = ResponseCache.make_key('/expiring')
+    cache.set(k3, {'x': 1}, ttl=1)
+    assert k3 in backend.rows
+    time.sleep(1.05)
+    assert cache.purge_expired() >= 1 and k3 not in backend.rows and k1 in backend.rows
+
+    for i in range(10):
+        cache.set(ResponseCache.make_key('/pools', {'page': i}), {'data': 'x' * 40}, ttl=60)
+    assert cache.stats()['bytes'] <= 200 and cache.evictions > 0
+
+    restarted = ResponseCache(backend=backend)
+    assert restarted.get(k1) == {'data': ['solana', 'eth']} and restarted.disk_hits == 1
+    assert restarted.get(k1) is not None and restarted.hits == 1
+    print(f"OK: {cache.stats()}")
@@ -0,0 +1,136 @@
+"""
+请求合并（single-flight）
+
+多个线程同时发起相同的请求时，只有第一个真正访问网络，
+其余线程等待并共享同一个结果；请求完成后的短时间窗口内，
+相同请求直接复用结果。突发的并发请求因此不会被放大，也不易触发交易所限速。
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """一次进行中（或刚完成）的请求"""
+
+    __slots__ = ('event', 'result', 'error', 'done_at')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done_at: Optional[float] = None
+
+
+class SingleFlight:
+    """
+    相同 key 的并发调用只执行一次
+
+    使用示例：
+        flight = SingleFlight(reuse_window=1.0)
+        ticker = flight.do(('fetch_ticker', 'BTC/USDT'), lambda: exchange.fetch_ticker('BTC/USDT'))
+
+    异常不会被缓存：失败结果只共享给同时等待的调用方，之后的调用会重新请求。
+    """
+
+    # 已完成请求超过该数量时，清理过期条目
+    PRUNE_THRESHOLD = 256
+
+    def __init__(self, reuse_window: float = 0.0):
+        """
+        Args:
+            reuse_window: 请求完成后结果的复用时间 (秒)，0 表示只合并并发请求
+        """
+        self.reuse_window = reuse_window
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+        # 统计
+        self.executed = 0
+        self.shared = 0
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        reuse_window: Optional[float] = None,
+    ) -> Any:
+        """
+        执行 fn，或等待/复用相同 key 的结果
+
+        Args:
+            key: 请求标识（需可哈希）
+            fn: 无参调用，实际发起请求
+            reuse_window: 覆盖实例的复用窗口 (秒)
+
+        Returns:
+            fn 的返回值（可能与其他调用方共享同一对象，调用方不应修改）
+        """
+        window = self.reuse_window if reuse_window is None else reuse_window
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                if call.done_at is None:
+                    leader = False
+                elif call.error is None and time.monotonic() - call.done_at < window:
+                    self.shared += 1
+                    return call.result
+                else:
+                    call = None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                call.done_at = time.monotonic()
+                if call.error is not None or window <= 0:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+                elif len(self._calls) > self.PRUNE_THRESHOLD:
+                    self._prune(window)
+            call.event.set()
+
+        return call.result
+
+    def _prune(self, window: float):
+        """清理已过复用窗口的条目（调用方需持有锁）"""
+        now = time.monotonic()
+        expired = [
+            k for k, c in self._calls.items()
+            if c.done_at is not None and now - c.done_at >= window
+        ]
+        for k in expired:
+            del self._calls[k]
+
+    def forget(self, key: Hashable):
+        """丢弃 key 的已完成结果，下一次调用重新请求"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done_at is not None:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """返回实际执行与共享结果的次数"""
+        with self._lock:
+            return {'executed': self.executed, 'shared': self.shared}
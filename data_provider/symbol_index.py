@@ -0,0 +1,234 @@
+"""
+交易对索引
+
+每次加载市场信息后构建一次，提供：
+- 交易所原生 id、拼接写法（BTCUSDT）、分隔符变体（BTC-USDT / BTC_USDT）
+  以及常见别名（XBT）到标准交易对（BTC/USDT）的 O(1) 映射
+- base / quote 查找表
+- 前缀字典树，用于输入联想式搜索（每次按键都可以调用）
+
+同一写法对应多个市场时（如 BTCUSDT 同时是现货与永续合约的 id），
+优先级：活跃 > 现货 > 常用计价货币 > 符号更短。
+"""
+
+import logging
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 计价货币优先级（仅输入 base 时选择默认交易对）
+QUOTE_PRIORITY = ['USDT', 'USDC', 'FDUSD', 'BUSD', 'USD', 'BTC', 'ETH', 'BNB', 'EUR']
+
+# 常见别名 -> 标准币种代码
+BASE_ALIASES = {
+    'XBT': 'BTC',
+    'BCC': 'BCH',
+}
+
+# 每个字典树节点保留的候选数
+TRIE_NODE_CAPACITY = 50
+
+_SEPARATORS = str.maketrans('', '', '/-_: ')
+
+
+def compact(text: str) -> str:
+    """去掉分隔符并转大写：'btc-usdt' -> 'BTCUSDT'"""
+    return text.upper().translate(_SEPARATORS)
+
+
+class _TrieNode:
+    __slots__ = ('children', 'symbols')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.symbols: List[str] = []
+
+
+class SymbolIndex:
+    """
+    交易对索引
+
+    使用示例：
+        index = SymbolIndex(exchange.markets)
+        index.resolve('btcusdt')      # 'BTC/USDT'
+        index.resolve('ETH')          # 'ETH/USDT'
+        index.search('SO', limit=5)   # ['SOL/USDT', 'SOL/USDC', ...]
+    """
+
+    def __init__(self, markets: Dict[str, Dict[str, Any]]):
+        self.markets = markets
+        self._lookup: Dict[str, str] = {}
+        self._by_base: Dict[str, List[str]] = {}
+        self._by_quote: Dict[str, List[str]] = {}
+        self._trie = _TrieNode()
+
+        for symbol in sorted(markets, key=lambda s: self._rank(s, markets[s])):
+            self._add(symbol, markets[symbol])
+
+        logger.debug(f"交易对索引构建完成: {len(markets)} 个市场, {len(self._lookup)} 个键")
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    @staticmethod
+    def _rank(symbol: str, market: Dict[str, Any]) -> Tuple:
+        """排序键：越小越优先"""
+        quote = market.get('quote') or ''
+        quote_rank = QUOTE_PRIORITY.index(quote) if quote in QUOTE_PRIORITY else len(QUOTE_PRIORITY)
+        return (
+            market.get('active') is False,
+            not market.get('spot', market.get('type', 'spot') == 'spot'),
+            quote_rank,
+            len(symbol),
+            symbol,
+        )
+
+    def _add(self, symbol: str, market: Dict[str, Any]):
+        base = (market.get('base') or symbol.split('/')[0]).upper()
+        quote = (market.get('quote') or (symbol.split('/')[1].split(':')[0] if '/' in symbol else '')).upper()
+
+        keys = {symbol.upper(), compact(symbol)}
+        market_id = market.get('id')
+        if market_id:
+            keys.add(str(market_id).upper())
+            keys.add(compact(str(market_id)))
+        if quote and ':' not in symbol:
+            keys.add(f"{base}{quote}")
+        for alias, canonical in BASE_ALIASES.items():
+            if canonical == base and quote:
+                keys.add(f"{alias}/{quote}")
+                keys.add(f"{alias}{quote}")
+
+        # 按优先级顺序插入，先到者占据该写法
+        for key in keys:
+            self._lookup.setdefault(key, symbol)
+
+        self._by_base.setdefault(base, []).append(symbol)
+        if quote:
+            self._by_quote.setdefault(quote, []).append(symbol)
+
+        for key in {base, compact(symbol)}:
+            self._trie_insert(key, symbol)
+
+    def _trie_insert(self, key: str, symbol: str):
+        node = self._trie
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            if len(node.symbols) < TRIE_NODE_CAPACITY and symbol not in node.symbols:
+                node.symbols.append(symbol)
+
+    def resolve(self, text: str, default_quote: str = 'USDT') -> Optional[str]:
+        """
+        将任意写法解析为标准交易对
+
+        Args:
+            text: 'BTC/USDT'、'BTCUSDT'、'btc-usdt'、'XBT'、'BTC' 等
+            default_quote: 只给出 base 时优先使用的计价货币
+
+        Returns:
+            标准交易对；无法识别时返回 None
+        """
+        key = text.strip().upper()
+        if not key:
+            return None
+
+        symbol = self._lookup.get(key) or self._lookup.get(compact(key))
+        if symbol:
+            return symbol
+
+        base = BASE_ALIASES.get(compact(key), compact(key))
+        candidates = self._by_base.get(base)
+        if candidates:
+            preferred = f"{base}/{default_quote.upper()}"
+            return preferred if preferred in self.markets else candidates[0]
+
+        return None
+
+    def symbols_for_base(self, base: str) -> List[str]:
+        """base 对应的全部交易对（按优先级排序）"""
+        base = base.upper()
+        return list(self._by_base.get(BASE_ALIASES.get(base, base), []))
+
+    def symbols_for_quote(self, quote: str) -> List[str]:
+        """quote 对应的全部交易对（按优先级排序）"""
+        return list(self._by_quote.get(quote.upper(), []))
+
+    def search(self, keyword: str, limit: int = 20) -> List[str]:
+        """
+        前缀搜索交易对
+
+        匹配 base 或去掉分隔符后的交易对前缀；关键词正好是计价货币时返回该计价货币的交易对。
+
+        Returns:
+            按优先级排序的交易对列表
+        """
+        key = compact(keyword)
+        if not key:
+            return []
+
+        results: List[str] = []
+        seen = set()
+
+        def extend(symbols: Iterable[str]):
+            for s in symbols:
+                if len(results) >= limit:
+                    return
+                if s not in seen:
+                    seen.add(s)
+                    results.append(s)
+
+        exact = self.resolve(keyword)
+        if exact and exact.startswith(BASE_ALIASES.get(key, key)):
+            extend([exact])
+
+        node = self._trie
+        for ch in BASE_ALIASES.get(key, key):
+            node = node.children.get(ch)
+            if node is None:
+                break
+        else:
+            extend(node.symbols)
+
+        if len(results) < limit and key in self._by_quote:
+            extend(self._by_quote[key])
+
+        return results
+
+
+if __name__ == "__main__":
+    # 自检：离线构造的市场结构
+    import time
+
+    markets = {
+        'BTC/USDT': {'id': 'BTCUSDT', 'base': 'BTC', 'quote': 'USDT', 'spot': True, 'active': True},
+        'BTC/USDT:USDT': {'id': 'BTCUSDT', 'base': 'BTC', 'quote': 'USDT', 'spot': False, 'type': 'swap', 'active': True},
+        'BTC/USDC': {'id': 'BTCUSDC', 'base': 'BTC', 'quote': 'USDC', 'spot': True, 'active': True},
+        'ETH/BTC': {'id': 'ETHBTC', 'base': 'ETH', 'quote': 'BTC', 'spot': True, 'active': True},
+        'ETH/USDT': {'id': 'ETHUSDT', 'base': 'ETH', 'quote': 'USDT', 'spot': True, 'active': True},
+        'USDC/USDT': {'id': 'USDCUSDT', 'base': 'USDC', 'quote': 'USDT', 'spot': True, 'active': True},
+        'SOL/USDT': {'id': 'SOL-USDT', 'base': 'SOL', 'quote': 'USDT', 'spot': True, 'active': True},
+        'BTC/FDUSD': {'id': 'BTCFDUSD', 'base': 'BTC', 'quote': 'FDUSD', 'spot': True, 'active': True},
+    }
+    for i in range(3000):
+        markets[f'T{i}/USDT'] = {'id': f'T{i}USDT', 'base': f'T{i}', 'quote': 'USDT', 'spot': True, 'active': True}
+
+    index = SymbolIndex(markets)
+    assert index.resolve('btcusdt') == 'BTC/USDT'
+    assert index.resolve('BTCUSDC') == 'BTC/USDC'
+    assert index.resolve('USDCUSDT') == 'USDC/USDT'
+    assert index.resolve('BTC-USDT') == 'BTC/USDT'      # 旧的后缀猜测会得到 'BTC-/USDT'
+    assert index.resolve('ETHBTC') == 'ETH/BTC'
+    assert index.resolve('BTCFDUSD') == 'BTC/FDUSD'     # 旧逻辑会得到 'BTCFDUSD/USDT'
+    assert index.resolve('sol-usdt') == 'SOL/USDT'
+    assert index.resolve('XBT') == 'BTC/USDT'
+    assert index.resolve('ETH') == 'ETH/USDT'
+    assert index.resolve('NOPE') is None
+    assert index.search('BT')[:2] == ['BTC/USDT', 'BTC/USDC'], index.search('BT')
+    assert index.search('T12', limit=3) == ['T12/USDT', 'T120/USDT', 'T121/USDT'], index.search('T12', limit=3)
+
+    t0 = time.perf_counter()
+    for _ in range(10000):
+        index.search('T1', limit=20)
+    per_search_us = (time.perf_counter() - t0) / 10000 * 1e6
+    print(f"OK: {len(index)} 个市场, 前缀搜索 {per_search_us:.1f} µs/次")
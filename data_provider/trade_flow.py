@@ -0,0 +1,340 @@
+"""
+DEX 成交流聚合（巨鲸检测）
+
+OnchainIndicators 的巨鲸字段此前从未填充。该模块拉取代币主交易池的最近成交：
+- 按 tx hash 去重，记录每个池的游标（最新成交时间），后续调用只处理游标之后的新成交
+- trades 接口没有分页参数，单页最多 300 笔；单页打满且与上次游标之间有缺口时，
+  再用成交额过滤查询补齐窗口内的巨鲸成交，并记录完整覆盖的起始时间
+- 成交按列存储（numpy 数组），按时间窗口向量化聚合买卖流与巨鲸笔数
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 聚合窗口（秒）
+WINDOWS = {
+    '1h': 3600,
+    '6h': 6 * 3600,
+    '24h': 24 * 3600,
+}
+
+
+@dataclass
+class TradeFlow:
+    """交易池在一个时间窗口内的成交流"""
+    chain: str
+    pool_address: str
+    window: str
+
+    buys: int = 0
+    sells: int = 0
+    buy_volume_usd: float = 0.0
+    sell_volume_usd: float = 0.0
+
+    # 巨鲸（单笔成交额 >= 阈值）
+    whale_buys: int = 0
+    whale_sells: int = 0
+    whale_buy_usd: float = 0.0
+    whale_sell_usd: float = 0.0
+
+    # 窗口是否被完整覆盖（单页打满且有缺口时，普通成交只覆盖到 covered_since）
+    complete: bool = True
+    whale_complete: bool = True
+    covered_since: Optional[datetime] = None
+
+    @property
+    def net_flow_usd(self) -> float:
+        return self.buy_volume_usd - self.sell_volume_usd
+
+    @property
+    def whale_net_flow_usd(self) -> float:
+        return self.whale_buy_usd - self.whale_sell_usd
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'window': self.window,
+            'buys': self.buys,
+            'sells': self.sells,
+            'buy_volume_usd': self.buy_volume_usd,
+            'sell_volume_usd': self.sell_volume_usd,
+            'net_flow_usd': self.net_flow_usd,
+            'whale_buys': self.whale_buys,
+            'whale_sells': self.whale_sells,
+            'whale_net_flow_usd': self.whale_net_flow_usd,
+            'complete': self.complete,
+            'whale_complete': self.whale_complete,
+        }
+
+
+class _PoolTrades:
+    """单个交易池的成交列与游标"""
+
+    def __init__(self):
+        self.ts = np.empty(0, dtype=np.int64)
+        self.side = np.empty(0, dtype=np.int8)       # 1 买 / -1 卖
+        self.usd = np.empty(0, dtype=np.float64)
+        self.tx: List[str] = []
+        self.hashes: set = set()
+
+        self.cursor_ms = 0                   # 已记录的最新成交时间
+        self.covered_since_ms: Optional[int] = None
+        self.whale_covered_since_ms: Optional[int] = None
+        self.updated_at = 0.0                # 上次拉取时间 (time.time)
+
+
+class TradeFlowAggregator:
+    """
+    成交流聚合器（线程安全）
+
+    使用示例：
+        flows = TradeFlowAggregator(gecko, whale_threshold_usd=100000)
+        flow = flows.get_flow('solana', pool_address, '24h')
+        flow.whale_buys, flow.whale_net_flow_usd
+    """
+
+    def __init__(
+        self,
+        fetcher: Any,
+        whale_threshold_usd: float = 100000.0,
+        min_refresh_seconds: float = 15.0,
+    ):
+        """
+        Args:
+            fetcher: GeckoTerminalFetcher（需提供 get_pool_trades 与 TRADES_PAGE_LIMIT）
+            whale_threshold_usd: 巨鲸单笔成交额阈值 (USD)
+            min_refresh_seconds: 同一交易池两次拉取的最短间隔（秒），与 trades 接口缓存 TTL 一致
+        """
+        self.fetcher = fetcher
+        self.whale_threshold_usd = whale_threshold_usd
+        self.min_refresh_seconds = min_refresh_seconds
+        self.page_limit = getattr(fetcher, 'TRADES_PAGE_LIMIT', 300)
+        self.window_ms = max(WINDOWS.values()) * 1000
+
+        self._pools: Dict[Tuple[str, str], _PoolTrades] = {}
+        self._lock = threading.Lock()
+
+        # 统计
+        self.requests = 0
+        self.new_trades = 0
+        self.duplicates = 0
+
+    def _state(self, chain: str, pool_address: str) -> _PoolTrades:
+        key = (chain, pool_address)
+        with self._lock:
+            state = self._pools.get(key)
+            if state is None:
+                state = self._pools[key] = _PoolTrades()
+            return state
+
+    def update(self, chain: str, pool_address: str, now_ms: Optional[int] = None) -> int:
+        """
+        拉取交易池最新成交并合并，返回新增成交数
+
+        单页未打满说明接口已返回窗口内全部成交；打满且最旧一笔仍晚于游标时存在缺口，
+        普通成交从该笔开始覆盖，巨鲸成交再用成交额过滤查询补齐。
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        window_start = now_ms - self.window_ms
+        state = self._state(chain, pool_address)
+
+        page = self.fetcher.get_pool_trades(chain, pool_address)
+        with self._lock:
+            self.requests += 1
+            had_cursor = state.cursor_ms > 0
+            gap = len(page) >= self.page_limit and (
+                not had_cursor or min(t['timestamp'] for t in page) > state.cursor_ms
+            )
+            added = self._merge(state, page, stop_at_cursor=True)
+
+            if len(page) < self.page_limit:
+                state.covered_since_ms = state.whale_covered_since_ms = window_start
+            elif gap:
+                state.covered_since_ms = min(t['timestamp'] for t in page)
+
+        if gap:
+            whales = self.fetcher.get_pool_trades(chain, pool_address, min_volume_usd=self.whale_threshold_usd)
+            with self._lock:
+                self.requests += 1
+                added += self._merge(state, whales, stop_at_cursor=False)
+                if len(whales) < self.page_limit:
+                    state.whale_covered_since_ms = window_start
+                else:
+                    state.whale_covered_since_ms = min(t['timestamp'] for t in whales)
+
+        with self._lock:
+            self._prune(state, window_start)
+            state.updated_at = time.time()
+        return added
+
+    def _merge(self, state: _PoolTrades, page: List[Dict[str, Any]], stop_at_cursor: bool) -> int:
+        """按 tx hash 去重后追加成交（调用方持有锁）；页按时间倒序，早于游标即停止"""
+        cursor = state.cursor_ms
+        ts, side, usd, tx = [], [], [], []
+        for trade in page:
+            if stop_at_cursor and trade['timestamp'] < cursor:
+                break
+            tx_hash = trade['tx_hash']
+            if tx_hash in state.hashes:
+                self.duplicates += 1
+                continue
+            state.hashes.add(tx_hash)
+            ts.append(trade['timestamp'])
+            side.append(1 if trade['kind'] == 'buy' else -1)
+            usd.append(trade['volume_usd'])
+            tx.append(tx_hash)
+
+        if ts:
+            state.ts = np.concatenate([state.ts, np.asarray(ts, dtype=np.int64)])
+            state.side = np.concatenate([state.side, np.asarray(side, dtype=np.int8)])
+            state.usd = np.concatenate([state.usd, np.asarray(usd, dtype=np.float64)])
+            state.tx.extend(tx)
+            state.cursor_ms = max(cursor, max(ts))
+            self.new_trades += len(ts)
+        return len(ts)
+
+    @staticmethod
+    def _prune(state: _PoolTrades, window_start: int):
+        """丢弃窗口外的成交（调用方持有锁）"""
+        keep = state.ts >= window_start
+        if keep.all():
+            return
+        state.ts = state.ts[keep]
+        state.side = state.side[keep]
+        state.usd = state.usd[keep]
+        state.tx = [h for h, k in zip(state.tx, keep) if k]
+        state.hashes = set(state.tx)
+
+    def _aggregate(
+        self,
+        chain: str,
+        pool_address: str,
+        state: _PoolTrades,
+        window: str,
+        now_ms: int,
+    ) -> TradeFlow:
+        """按列向量化聚合窗口内成交（调用方持有锁）"""
+        start = now_ms - WINDOWS[window] * 1000
+        mask = state.ts >= start
+        side = state.side[mask]
+        usd = state.usd[mask]
+        buy = side > 0
+        sell = ~buy
+        whale = usd >= self.whale_threshold_usd
+
+        covered = state.covered_since_ms
+        whale_covered = state.whale_covered_since_ms
+        return TradeFlow(
+            chain=chain,
+            pool_address=pool_address,
+            window=window,
+            buys=int(buy.sum()),
+            sells=int(sell.sum()),
+            buy_volume_usd=float(usd[buy].sum()),
+            sell_volume_usd=float(usd[sell].sum()),
+            whale_buys=int((buy & whale).sum()),
+            whale_sells=int((sell & whale).sum()),
+            whale_buy_usd=float(usd[buy & whale].sum()),
+            whale_sell_usd=float(usd[sell & whale].sum()),
+            complete=covered is not None and covered <= start,
+            whale_complete=whale_covered is not None and whale_covered <= start,
+            covered_since=datetime.fromtimestamp(covered / 1000) if covered else None,
+        )
+
+    def get_flows(
+        self,
+        chain: str,
+        pool_address: str,
+        refresh: bool = True,
+        now_ms: Optional[int] = None,
+    ) -> Dict[str, TradeFlow]:
+        """
+        获取交易池所有窗口的成交流
+
+        Args:
+            refresh: 距上次拉取超过 min_refresh_seconds 时拉取新成交
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        state = self._state(chain, pool_address)
+        if refresh and time.time() - state.updated_at >= self.min_refresh_seconds:
+            try:
+                self.update(chain, pool_address, now_ms)
+            except Exception as e:
+                logger.warning(f"[成交流] {chain}:{pool_address} 拉取失败: {e}")
+
+        with self._lock:
+            return {w: self._aggregate(chain, pool_address, state, w, now_ms) for w in WINDOWS}
+
+    def get_flow(
+        self,
+        chain: str,
+        pool_address: str,
+        window: str = '24h',
+        refresh: bool = True,
+        now_ms: Optional[int] = None,
+    ) -> TradeFlow:
+        """获取交易池单个窗口的成交流"""
+        return self.get_flows(chain, pool_address, refresh=refresh, now_ms=now_ms)[window]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'pools': len(self._pools),
+                'requests': self.requests,
+                'new_trades': self.new_trades,
+                'duplicates': self.duplicates,
+            }
+
+
+if __name__ == "__main__":
+    # 自检：游标去重、单页打满时补齐巨鲸成交、按窗口聚合
+    class _FakeGecko:
+        TRADES_PAGE_LIMIT = 3
+
+        def __init__(self):
+            self.trades = []
+            self.calls = []
+
+        def get_pool_trades(self, chain, pool_address, min_volume_usd=0.0):
+            self.calls.append(min_volume_usd)
+            rows = [t for t in self.trades if t['volume_usd'] > min_volume_usd]
+            return sorted(rows, key=lambda t: -t['timestamp'])[:self.TRADES_PAGE_LIMIT]
+
+    def _trade(tx, kind, usd, minutes_ago, now):
+        return {'tx_hash': tx, 'kind': kind, 'volume_usd': usd, 'timestamp': now - minutes_ago * 60_000, 'from_address': ''}
+
+    now = 1_700_000_000_000
+    gecko = _FakeGecko()
+    gecko.trades = [
+        _trade('a', 'buy', 200_000, 600, now),   # 10 小时前的巨鲸买入，只在过滤查询中出现
+        _trade('b', 'sell', 500, 30, now),
+        _trade('c', 'buy', 1_000, 20, now),
+        _trade('d', 'sell', 150_000, 10, now),
+    ]
+    flows = TradeFlowAggregator(gecko, whale_threshold_usd=100_000, min_refresh_seconds=0)
+
+    result = flows.get_flows('solana', 'POOL', now_ms=now)
+    assert gecko.calls == [0.0, 100_000]                    # 单页打满 -> 补齐巨鲸
+    day, hour = result['24h'], result['1h']
+    assert (day.whale_buys, day.whale_sells, day.whale_net_flow_usd) == (1, 1, 50_000)
+    assert day.whale_complete and not day.complete and not hour.complete
+    assert (hour.buys, hour.sells, hour.net_flow_usd) == (1, 2, 1_000 - 150_500)
+
+    # 新增一笔：游标之后只合并新成交，无缺口不再补查
+    gecko.trades.append(_trade('e', 'buy', 2_000, 1, now))
+    gecko.calls.clear()
+    assert flows.update('solana', 'POOL', now_ms=now) == 1 and gecko.calls == [0.0]
+    assert flows.get_flow('solana', 'POOL', '1h', refresh=False, now_ms=now).buys == 2
+    assert flows.duplicates >= 2
+
+    # 窗口外成交被清理
+    later = now + 11 * 3600 * 1000
+    assert flows.get_flows('solana', 'POOL', refresh=False, now_ms=later)['24h'].whale_buys == 1
+    print(f"OK: {flows.stats()}")
@@ -15,7 +15,6 @@ TushareFetcher - 备用数据源 1 (Priority 2)
 """
 
 import logging
-import time
 from datetime import datetime
 from typing import Optional, Tuple
 
@@ -29,10 +28,14 @@ from tenacity import (
 )
 
 from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .rate_limiter import get_rate_limiter
 from config import get_config
 
 logger = logging.getLogger(__name__)
 
+# Tushare Pro 接口主机（限速键）
+TUSHARE_HOST = 'api.tushare.pro'
+
 
 class TushareFetcher(BaseFetcher):
     """
@@ -42,8 +45,8 @@ class TushareFetcher(BaseFetcher):
     数据来源：Tushare Pro API
     
     关键策略：
-    - 每分钟调用计数器，防止超出配额
-    - 超过 80 次/分钟时强制等待
+    - 共享令牌桶限速，防止超出配额
+    - 超过 80 次/分钟时阻塞等待
     - 失败后指数退避重试
     
     配额说明（Tushare 免费用户）：
@@ -62,8 +65,11 @@ class TushareFetcher(BaseFetcher):
             rate_limit_per_minute: 每分钟最大请求数（默认80，Tushare免费配额）
         """
         self.rate_limit_per_minute = rate_limit_per_minute
-        self._call_count = 0  # 当前分钟内的调用次数
-        self._minute_start: Optional[float] = None  # 当前计数周期开始时间
+        self.rate_limiter = get_rate_limiter(
+            TUSHARE_HOST,
+            rate=rate_limit_per_minute / 60,
+            burst=rate_limit_per_minute,
+        )
         self._api: Optional[object] = None  # Tushare API 实例
         
         # 尝试初始化 API
@@ -101,42 +107,10 @@ class TushareFetcher(BaseFetcher):
         检查并执行速率限制
         
         流控策略：
-        1. 检查是否进入新的一分钟
-        2. 如果是，重置计数器
-        3. 如果当前分钟调用次数超过限制，强制休眠
+        使用 api.tushare.pro 的共享令牌桶（容量 = 每分钟配额，匀速补充），
+        多线程、多实例共用同一份配额，超出时阻塞等待而非整分钟休眠
         """
-        current_time = time.time()
-        
-        # 检查是否需要重置计数器（新的一分钟）
-        if self._minute_start is None:
-            self._minute_start = current_time
-            self._call_count = 0
-        elif current_time - self._minute_start >= 60:
-            # 已经过了一分钟，重置计数器
-            self._minute_start = current_time
-            self._call_count = 0
-            logger.debug("速率限制计数器已重置")
-        
-        # 检查是否超过配额
-        if self._call_count >= self.rate_limit_per_minute:
-            # 计算需要等待的时间（到下一分钟）
-            elapsed = current_time - self._minute_start
-            sleep_time = max(0, 60 - elapsed) + 1  # +1 秒缓冲
-            
-            logger.warning(
-                f"Tushare 达到速率限制 ({self._call_count}/{self.rate_limit_per_minute} 次/分钟)，"
-                f"等待 {sleep_time:.1f} 秒..."
-            )
-            
-            time.sleep(sleep_time)
-            
-            # 重置计数器
-            self._minute_start = time.time()
-            self._call_count = 0
-        
-        # 增加调用计数
-        self._call_count += 1
-        logger.debug(f"Tushare 当前分钟调用次数: {self._call_count}/{self.rate_limit_per_minute}")
+        self.rate_limiter.acquire()
     
     def _convert_stock_code(self, stock_code: str) -> str:
         """
@@ -42,12 +42,19 @@ from typing import List, Dict, Any, Optional, Tuple
 from feishu_doc import FeishuDocManager
 
 from config import get_config, Config
-from data_provider.ccxt_fetcher import CCXTFetcher, CryptoRealtimeQuote
-from data_provider.geckoterminal_fetcher import GeckoTerminalFetcher, TokenInfo, OnchainMetrics
+from data_provider.ccxt_fetcher import CryptoRealtimeQuote, get_shared_fetcher
+from data_provider.consolidated_quotes import ConsolidatedQuoteService
+from data_provider.crypto_manager import CryptoFetcherManager
+from data_provider.derivatives import DerivativesFetcher
+from data_provider.base import DataFetchError
+from data_provider.geckoterminal_fetcher import TokenInfo, OnchainMetrics, get_shared_gecko_fetcher
+from data_provider.pool_watcher import NewPoolWatcher
+from data_provider.response_cache import get_shared_response_cache
 from analyzer import GeminiAnalyzer, AnalysisResult, CRYPTO_NAME_MAP
 from notification import NotificationService, NotificationChannel
 from search_service import SearchService, SearchResponse
-from crypto_analyzer import CryptoTrendAnalyzer, CryptoAnalysisResult
+from storage import get_db
+from crypto_analyzer import CryptoTrendAnalyzer, CryptoAnalysisResult, assess_token_risks
 from crypto_market_analyzer import CryptoMarketAnalyzer, CryptoMarketOverview
 
 # 配置日志格式
@@ -146,9 +153,56 @@ class CryptoAnalysisPipeline:
         self.max_workers = max_workers or self.config.max_workers
         
         # 初始化各模块
-        self.ccxt_fetcher = CCXTFetcher(exchange='okx')  # 使用 OKX，Binance 在某些地区被限制
-        self.gecko_fetcher = GeckoTerminalFetcher()  # 链上数据获取
-        self.trend_analyzer = CryptoTrendAnalyzer()  # 加密货币趋势分析器
+        candle_store = get_db() if self.config.kline_cache_enabled else None  # 本地 K 线仓库
+        # 默认使用 OKX（DEFAULT_EXCHANGE），Binance 在某些地区被限制；进程内共享同一实例，市场信息只加载一次
+        fetcher_kwargs = dict(
+            markets_cache_dir=self.config.markets_cache_dir,
+            markets_ttl=self.config.markets_cache_ttl,
+            coalesce_window=self.config.request_coalesce_window,
+            kline_partial_max_age=self.config.kline_partial_max_age,
+        )
+        self.ccxt_fetcher = get_shared_fetcher(
+            exchange=self.config.default_exchange,
+            candle_store=candle_store,
+            **fetcher_kwargs,
+        )
+        
+        # 多交易所故障切换：主交易所慢于其 P90 延迟时向备用交易所发起对冲请求
+        self.crypto_manager = CryptoFetcherManager(
+            [self.config.default_exchange] + self.config.fallback_exchanges,
+            fetchers={self.ccxt_fetcher.exchange_id: self.ccxt_fetcher},
+            hedge_percentile=self.config.hedge_percentile,
+            timeout=self.config.crypto_fetch_timeout,
+            **fetcher_kwargs,
+        )
+        
+        # 跨交易所聚合行情（CONSOLIDATED_EXCHANGES 非空时启用）
+        self.quote_service: Optional[ConsolidatedQuoteService] = None
+        if self.config.consolidated_exchanges:
+            self.quote_service = ConsolidatedQuoteService(
+                self.config.consolidated_exchanges,
+                timeout=self.config.consolidated_timeout,
+                fetchers={self.ccxt_fetcher.exchange_id: self.ccxt_fetcher},
+                **fetcher_kwargs,
+            )
+        if self.config.quote_stream_enabled:
+            try:
+                self.ccxt_fetcher.enable_quote_stream(
+                    ws_url=self.config.quote_stream_ws_url,
+                    max_age=self.config.quote_stream_max_age,
+                )
+            except Exception as e:
+                logger.warning(f"启用 WebSocket 行情流失败，使用 REST: {e}")
+        self.gecko_fetcher = get_shared_gecko_fetcher(self.config)  # 链上数据获取（缓存、主池索引、K 线仓库）
+        # 永续合约数据（资金费率、持仓量、基差），与趋势分析器共享缓存
+        self.derivatives: Optional[DerivativesFetcher] = None
+        if self.config.derivatives_enabled:
+            self.derivatives = DerivativesFetcher(self.ccxt_fetcher, ttl=self.config.derivatives_cache_ttl)
+        self.trend_analyzer = CryptoTrendAnalyzer(  # 加密货币趋势分析器
+            ccxt_fetcher=self.ccxt_fetcher,
+            gecko_fetcher=self.gecko_fetcher,
+            derivatives_fetcher=self.derivatives,
+        )
         self.analyzer = GeminiAnalyzer()
         self.notifier = NotificationService()
         
@@ -169,30 +223,66 @@ class CryptoAnalysisPipeline:
     def fetch_crypto_data(
         self,
         symbol: str,
-        exchange: str = 'okx'  # 默认使用 OKX，Binance 在某些地区被限制
+        exchange: Optional[str] = None
     ) -> Tuple[bool, Optional[str], Optional[Dict]]:
         """
         获取单个加密货币数据
         
         Args:
             symbol: 交易对符号（如 BTC/USDT）
-            exchange: 交易所名称（默认 okx）
+            exchange: 交易所名称（仅用于日志；实际数据来源由 CryptoFetcherManager 按健康状况选择）
             
         Returns:
             Tuple[是否成功, 错误信息, 数据字典]
         """
         try:
-            logger.info(f"[{symbol}] 开始从 {exchange} 获取数据...")
+            logger.info(f"[{symbol}] 开始从 {exchange or self.crypto_manager.ranked_venues()[0]} 获取数据...")
             
-            # 获取实时行情（只传 symbol 参数）
-            realtime_quote = self.ccxt_fetcher.get_realtime_quote(symbol)
-            if not realtime_quote:
-                return False, "获取实时行情失败", None
+            # 获取实时行情（主交易所变慢或失败时自动对冲/切换到备用交易所）
+            try:
+                realtime_quote, exchange = self.crypto_manager.get_realtime_quote(symbol)
+            except DataFetchError as e:
+                return False, f"获取实时行情失败: {e}", None
             
-            # 获取K线数据（用于技术分析）
-            kline_data = self.ccxt_fetcher.get_kline(symbol, timeframe='1d', limit=100)
-            if not kline_data or kline_data.data.empty:
-                return False, "获取K线数据失败", None
+            # 获取K线数据（日线用于 AI 上下文，default_timeframe 用于趋势分析）
+            # 只请求最细的周期，其余在本地重采样；多个周期来自同一交易所
+            try:
+                klines, kline_exchange = self.crypto_manager.get_multi_timeframe_klines(
+                    symbol, ['1d', self.config.default_timeframe], limit=100
+                )
+            except DataFetchError as e:
+                return False, f"获取K线数据失败: {e}", None
+            kline_data = klines.get('1d')
+            if kline_exchange != exchange:
+                logger.info(f"[{symbol}] 行情来自 {exchange}，K线来自 {kline_exchange}")
+            
+            # 跨交易所聚合行情（最优买卖价、加权价格、价格离散度）
+            consolidated = None
+            if self.quote_service is not None:
+                try:
+                    consolidated = self.quote_service.get_quote(realtime_quote.symbol)
+                except Exception as e:
+                    logger.warning(f"[{symbol}] 获取跨交易所行情失败: {e}")
+            
+            # 订单簿流动性（深度、滑点、买卖失衡、大单墙），与行情取自同一交易所
+            liquidity = None
+            if self.config.orderbook_limit > 0:
+                try:
+                    orderbook = self.crypto_manager.fetcher(exchange).get_orderbook(
+                        realtime_quote.symbol, limit=self.config.orderbook_limit
+                    )
+                    if orderbook:
+                        liquidity = dict(orderbook['liquidity'], bid_ask_ratio=orderbook['bid_ask_ratio'])
+                except Exception as e:
+                    logger.debug(f"[{symbol}] 获取订单簿失败: {e}")
+            
+            # 永续合约数据（run() 已批量预取，这里命中缓存）
+            derivatives = None
+            if self.derivatives is not None:
+                try:
+                    derivatives = self.derivatives.get(realtime_quote.symbol)
+                except Exception as e:
+                    logger.debug(f"[{symbol}] 获取永续合约数据失败: {e}")
             
             # 尝试获取链上数据（如果是链上Token）
             onchain_data = None
@@ -217,6 +307,10 @@ class CryptoAnalysisPipeline:
                 'exchange': exchange,
                 'realtime': realtime_quote,
                 'kline': kline_data,
+                'klines': klines,
+                'consolidated': consolidated,
+                'liquidity': liquidity,
+                'derivatives': derivatives,
                 'onchain': onchain_data,
             }
             
@@ -260,10 +354,15 @@ class CryptoAnalysisPipeline:
                           f"24h涨跌={realtime_quote.change_24h:+.2f}%, 成交量=${realtime_quote.volume_24h:,.0f}")
             
             # Step 2: 趋势分析（基于加密货币交易理念）
-            # 注意：CryptoTrendAnalyzer.analyze() 只接受 identifier 参数，内部会自动获取数据
+            # 复用 Step 1 已获取的行情和 K 线，不再重复请求
             trend_result: Optional[CryptoAnalysisResult] = None
             try:
-                trend_result = self.trend_analyzer.analyze(symbol)
+                trend_result = self.trend_analyzer.analyze(
+                    symbol,
+                    kline=crypto_data.get('klines', {}).get(self.config.default_timeframe),
+                    quote=realtime_quote,
+                    derivatives=crypto_data.get('derivatives'),
+                )
                 if trend_result:
                     logger.info(f"[{symbol}] 趋势分析: 信号评分={trend_result.signal_strength}/100, "
                               f"趋势={trend_result.technical.trend_status.value}")
@@ -347,6 +446,23 @@ class CryptoAnalysisPipeline:
                     'rsi_14': trend_result.technical.rsi_14,
                 }
             
+            # 添加订单簿流动性
+            liquidity = crypto_data.get('liquidity')
+            if liquidity:
+                context['liquidity'] = liquidity
+                if context['realtime']:
+                    context['realtime']['buy_sell_ratio'] = round(liquidity['bid_ask_ratio'], 2)
+            
+            # 添加永续合约数据
+            derivatives = crypto_data.get('derivatives')
+            if derivatives is not None and derivatives.funding_rate is not None:
+                context['derivatives'] = derivatives.to_dict()
+            
+            # 添加跨交易所行情
+            consolidated = crypto_data.get('consolidated')
+            if consolidated is not None and len(consolidated.venues) > 1:
+                context['cross_exchange'] = consolidated.to_dict()
+            
             # 添加链上数据
             if onchain_data:
                 context['onchain'] = onchain_data
@@ -495,6 +611,18 @@ class CryptoAnalysisPipeline:
         
         results: List[AnalysisResult] = []
         
+        # 行情流预订阅：后续行情/K线请求直接命中内存缓存
+        self.ccxt_fetcher.watch_symbols(
+            crypto_symbols, timeframes=['1d', self.config.default_timeframe]
+        )
+        
+        # 永续合约数据批量预取：支持批量接口的交易所一次请求全部交易对
+        if self.derivatives is not None:
+            try:
+                self.derivatives.refresh(crypto_symbols)
+            except Exception as e:
+                logger.warning(f"批量获取永续合约数据失败: {e}")
+        
         # 使用线程池并发处理
         # 注意：max_workers 设置较低（默认3）以避免触发API限流
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
@@ -617,6 +745,7 @@ def parse_arguments() -> argparse.Namespace:
   python main.py --single-notify    # 启用单币推送模式（每分析完一个立即推送）
   python main.py --schedule         # 启用定时任务模式
   python main.py --market-review    # 仅运行市场复盘
+  python main.py --watch-pools      # 常驻监控新池并推送
         '''
     )
     
@@ -675,6 +804,12 @@ def parse_arguments() -> argparse.Namespace:
         help='跳过市场复盘分析'
     )
     
+    parser.add_argument(
+        '--watch-pools',
+        action='store_true',
+        help='常驻监控各链新上线交易池，发现后立即推送'
+    )
+    
     return parser.parse_args()
 
 
@@ -730,6 +865,37 @@ def run_market_review(notifier: NotificationService, analyzer=None, search_servi
     return None
 
 
+def run_pool_watcher(config: Config, notifier: NotificationService, send_notification: bool = True):
+    """
+    常驻监控新池，事件逐条推送（阻塞直到中断）
+    
+    Args:
+        config: 配置
+        notifier: 通知服务
+        send_notification: 是否推送（否则仅记录日志）
+    """
+    gecko = get_shared_gecko_fetcher(config)
+    watcher = NewPoolWatcher(
+        gecko,
+        chains=config.pool_watch_chains or config.preferred_chains,
+        interval=config.pool_watch_interval,
+        include_trending=config.pool_watch_trending,
+        risk_checker=assess_token_risks,
+    )
+    watcher.start()
+    
+    try:
+        while True:
+            event = watcher.events.get()
+            message = event.to_message()
+            logger.info(f"[新池监控] {event.chain} {event.token.symbol} {event.pool.address}")
+            if send_notification and notifier.is_available():
+                notifier.send(message)
+    finally:
+        watcher.stop(timeout=5)
+        logger.info(f"[新池监控] 已停止: {watcher.stats()}")
+
+
 def run_full_analysis(
     config: Config,
     args: argparse.Namespace,
@@ -879,24 +1045,38 @@ def main() -> int:
             run_market_review(notifier, analyzer, search_service)
             return 0
         
-        # 模式2: 定时任务模式
+        # 模式2: 新池监控
+        if args.watch_pools:
+            logger.info("模式: 新池监控")
+            run_pool_watcher(config, NotificationService(), send_notification=not args.no_notify)
+            return 0
+        
+        # 模式3: 定时任务模式
         if args.schedule or config.schedule_enabled:
             logger.info("模式: 定时任务")
-            logger.info(f"每日执行时间: {config.schedule_time}")
+            if config.schedule_timeframe:
+                logger.info(f"执行时间: 每根 {config.schedule_timeframe} K 线收盘后 ({config.default_exchange})")
+            else:
+                logger.info(f"每日执行时间: {config.schedule_time}")
             
             from scheduler import run_with_schedule
             
             def scheduled_task():
+                # 每轮先清理过期的持久化响应缓存，常驻运行时 http_cache 表不会无限增长
+                if config.gecko_cache_enabled:
+                    get_shared_response_cache().purge_expired()
                 run_full_analysis(config, args, crypto_symbols)
             
             run_with_schedule(
                 task=scheduled_task,
                 schedule_time=config.schedule_time,
-                run_immediately=True  # 启动时先执行一次
+                run_immediately=True,  # 启动时先执行一次
+                bar_timeframe=config.schedule_timeframe or None,
+                exchange=config.default_exchange,
             )
             return 0
         
-        # 模式3: 正常单次运行
+        # 模式4: 正常单次运行
         run_full_analysis(config, args, crypto_symbols)
         
         logger.info("\n程序执行完成")
@@ -82,6 +82,11 @@ class Scheduler:
         self._task_callback: Optional[Callable] = None
         self._running = False
         
+        # 按 K 线收盘对齐的任务（set_bar_close_task）
+        self._bar_timeframe: Optional[str] = None
+        self._bar_planner = None
+        self._next_bar_run: Optional[float] = None
+        
     def set_daily_task(self, task: Callable, run_immediately: bool = True):
         """
         设置每日定时任务
@@ -100,6 +105,52 @@ class Scheduler:
             logger.info("立即执行一次任务...")
             self._safe_run_task()
     
+    def set_bar_close_task(
+        self,
+        task: Callable,
+        timeframe: str,
+        exchange: str = '',
+        grace_seconds: float = 5.0,
+        run_immediately: bool = True,
+    ):
+        """
+        设置按 K 线收盘对齐的任务
+        
+        每根 timeframe K 线收盘后（等待 grace_seconds 让交易所生成新 K 线）执行一次，
+        分桶边界与交易所一致（如 OKX 日线在北京时间 0 点收盘）。
+        
+        Args:
+            task: 要执行的任务函数（无参数）
+            timeframe: 对齐的周期 (1h, 4h, 1d 等)
+            exchange: 交易所名称，决定分桶对齐方式
+            grace_seconds: 收盘后的等待时间 (秒)
+            run_immediately: 是否在设置后立即执行一次
+        """
+        from data_provider.fetch_planner import KlineFetchPlanner
+        
+        planner = KlineFetchPlanner(exchange, grace_seconds=grace_seconds)
+        if not planner.supports(timeframe):
+            raise ValueError(f"不支持按收盘对齐的周期: {timeframe}")
+        
+        self._task_callback = task
+        self._bar_timeframe = timeframe
+        self._bar_planner = planner
+        self._next_bar_run = planner.next_refresh_ms(timeframe) / 1000
+        logger.info(f"已设置 {timeframe} K 线收盘任务 ({exchange or 'UTC'})，"
+                    f"下次执行: {self._get_next_run_time()}")
+        
+        if run_immediately:
+            logger.info("立即执行一次任务...")
+            self._safe_run_task()
+    
+    def _run_bar_task_if_due(self):
+        """到达 K 线收盘时间时执行任务并计算下一次时间"""
+        if self._next_bar_run is None or time.time() < self._next_bar_run:
+            return
+        self._safe_run_task()
+        self._next_bar_run = self._bar_planner.next_refresh_ms(self._bar_timeframe) / 1000
+        logger.info(f"下次执行时间: {self._get_next_run_time()}")
+    
     def _safe_run_task(self):
         """安全执行任务（带异常捕获）"""
         if self._task_callback is None:
@@ -129,7 +180,13 @@ class Scheduler:
         
         while self._running and not self.shutdown_handler.should_shutdown:
             self.schedule.run_pending()
-            time.sleep(30)  # 每30秒检查一次
+            self._run_bar_task_if_due()
+            
+            # 每30秒检查一次，K 线收盘任务临近时提前醒来
+            wait = 30.0
+            if self._next_bar_run is not None:
+                wait = min(wait, max(self._next_bar_run - time.time(), 0.5))
+            time.sleep(wait)
             
             # 每小时打印一次心跳
             if datetime.now().minute == 0 and datetime.now().second < 30:
@@ -139,10 +196,11 @@ class Scheduler:
     
     def _get_next_run_time(self) -> str:
         """获取下次执行时间"""
-        jobs = self.schedule.get_jobs()
-        if jobs:
-            next_run = min(job.next_run for job in jobs)
-            return next_run.strftime('%Y-%m-%d %H:%M:%S')
+        runs = [job.next_run for job in self.schedule.get_jobs()]
+        if self._next_bar_run is not None:
+            runs.append(datetime.fromtimestamp(self._next_bar_run))
+        if runs:
+            return min(runs).strftime('%Y-%m-%d %H:%M:%S')
         return "未设置"
     
     def stop(self):
@@ -153,7 +211,9 @@ class Scheduler:
 def run_with_schedule(
     task: Callable,
     schedule_time: str = "18:00",
-    run_immediately: bool = True
+    run_immediately: bool = True,
+    bar_timeframe: Optional[str] = None,
+    exchange: str = '',
 ):
     """
     便捷函数：使用定时调度运行任务
@@ -162,9 +222,14 @@ def run_with_schedule(
         task: 要执行的任务函数
         schedule_time: 每日执行时间
         run_immediately: 是否立即执行一次
+        bar_timeframe: 按该周期 K 线收盘对齐执行（设置后忽略 schedule_time）
+        exchange: 交易所名称（决定 K 线收盘时间）
     """
     scheduler = Scheduler(schedule_time=schedule_time)
-    scheduler.set_daily_task(task, run_immediately=run_immediately)
+    if bar_timeframe:
+        scheduler.set_bar_close_task(task, bar_timeframe, exchange=exchange, run_immediately=run_immediately)
+    else:
+        scheduler.set_daily_task(task, run_immediately=run_immediately)
     scheduler.run()
 
 
@@ -24,6 +24,8 @@ from enum import Enum
 import pandas as pd
 import numpy as np
 
+from data_provider.indicators import rolling_mean, rsi
+
 logger = logging.getLogger(__name__)
 
 
@@ -73,6 +75,7 @@ class TrendAnalysisResult:
     ma20: float = 0.0
     ma60: float = 0.0
     current_price: float = 0.0
+    rsi_14: Optional[float] = None   # RSI(14)，数据不足 15 根时为 None
     
     # 乖离率（与 MA5 的偏离度）
     bias_ma5: float = 0.0            # (Close - MA5) / MA5 * 100
@@ -107,6 +110,7 @@ class TrendAnalysisResult:
             'ma20': self.ma20,
             'ma60': self.ma60,
             'current_price': self.current_price,
+            'rsi_14': self.rsi_14,
             'bias_ma5': self.bias_ma5,
             'bias_ma10': self.bias_ma10,
             'bias_ma20': self.bias_ma20,
@@ -174,6 +178,8 @@ class StockTrendAnalyzer:
         result.ma10 = float(latest['MA10'])
         result.ma20 = float(latest['MA20'])
         result.ma60 = float(latest.get('MA60', 0))
+        last_rsi = rsi(df['close'].to_numpy(dtype=np.float64))[-1]
+        result.rsi_14 = None if np.isnan(last_rsi) else float(last_rsi)
         
         # 1. 趋势判断
         self._analyze_trend(df, result)
@@ -193,13 +199,14 @@ class StockTrendAnalyzer:
         return result
     
     def _calculate_mas(self, df: pd.DataFrame) -> pd.DataFrame:
-        """计算均线"""
+        """计算均线（累加和一次算出，避免逐个 rolling）"""
         df = df.copy()
-        df['MA5'] = df['close'].rolling(window=5).mean()
-        df['MA10'] = df['close'].rolling(window=10).mean()
-        df['MA20'] = df['close'].rolling(window=20).mean()
+        close = df['close'].to_numpy(dtype=np.float64)
+        df['MA5'] = rolling_mean(close, 5)
+        df['MA10'] = rolling_mean(close, 10)
+        df['MA20'] = rolling_mean(close, 20)
         if len(df) >= 60:
-            df['MA60'] = df['close'].rolling(window=60).mean()
+            df['MA60'] = rolling_mean(close, 60)
         else:
             df['MA60'] = df['MA20']  # 数据不足时使用 MA20 替代
         return df
@@ -465,6 +472,7 @@ class StockTrendAnalyzer:
             f"   MA5:  {result.ma5:.2f} (乖离 {result.bias_ma5:+.2f}%)",
             f"   MA10: {result.ma10:.2f} (乖离 {result.bias_ma10:+.2f}%)",
             f"   MA20: {result.ma20:.2f} (乖离 {result.bias_ma20:+.2f}%)",
+            f"   RSI(14): {result.rsi_14:.1f}" if result.rsi_14 is not None else "   RSI(14): -",
             f"",
             f"📊 量能分析: {result.volume_status.value}",
             f"   量比(vs5日): {result.volume_ratio_5d:.2f}",
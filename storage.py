@@ -11,6 +11,7 @@ A股自选股智能分析系统 - 存储层
 4. 实现智能更新逻辑（断点续传）
 """
 
+import json
 import logging
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any
@@ -25,12 +26,15 @@ from sqlalchemy import (
     Date,
     DateTime,
     Integer,
+    Text,
     Index,
     UniqueConstraint,
     select,
     and_,
     desc,
+    func,
 )
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import (
     declarative_base,
     sessionmaker,
@@ -119,6 +123,107 @@ class StockDaily(Base):
         }
 
 
+class CryptoKline(Base):
+    """
+    加密货币 K 线数据模型（本地 K 线仓库）
+    
+    按 (exchange, symbol, timeframe, timestamp) 唯一存储，
+    用于增量同步：只从交易所拉取最后一根已存 K 线之后的数据
+    """
+    __tablename__ = 'crypto_kline'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # 数据源标识（交易所 ID，如 okx, binance）
+    exchange = Column(String(50), nullable=False)
+    
+    # 交易对（如 BTC/USDT）
+    symbol = Column(String(100), nullable=False)
+    
+    # 时间周期（如 1h, 4h, 1d）
+    timeframe = Column(String(10), nullable=False)
+    
+    # K 线开盘时间（UTC）
+    timestamp = Column(DateTime, nullable=False)
+    
+    # OHLCV 数据
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(Float)
+    
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        UniqueConstraint('exchange', 'symbol', 'timeframe', 'timestamp', name='uix_kline_key_ts'),
+        Index('ix_kline_key_ts', 'exchange', 'symbol', 'timeframe', 'timestamp'),
+    )
+    
+    def __repr__(self):
+        return (f"<CryptoKline(exchange={self.exchange}, symbol={self.symbol}, "
+                f"timeframe={self.timeframe}, timestamp={self.timestamp}, close={self.close})>")
+
+
+class HttpCacheEntry(Base):
+    """
+    HTTP 响应缓存（data_provider.response_cache 的持久化后端）
+    
+    按缓存键存储已序列化的 JSON 响应，过期记录在读取时忽略
+    """
+    __tablename__ = 'http_cache'
+    
+    # 缓存键（接口 + 参数的摘要）
+    cache_key = Column(String(64), primary_key=True)
+    
+    # 接口路径（便于排查）
+    endpoint = Column(String(255))
+    
+    # JSON 响应
+    value = Column(Text, nullable=False)
+    
+    # 过期时间（本地时间）
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<HttpCacheEntry(endpoint={self.endpoint}, expires_at={self.expires_at})>"
+
+
+class TokenPoolIndex(Base):
+    """
+    链上代币交易池索引
+    
+    记录 (链, 代币) 的主交易池（流动性最大）与前 N 个交易池，
+    重复分析时跳过交易池发现，直接获取主池 K 线
+    """
+    __tablename__ = 'token_pool_index'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # 链（GeckoTerminal 网络 ID，如 solana, eth）
+    chain = Column(String(50), nullable=False)
+    
+    # 代币合约地址
+    token_address = Column(String(128), nullable=False)
+    
+    # 主交易池地址
+    main_pool = Column(String(128))
+    
+    # 前 N 个交易池（JSON 列表，按流动性降序）
+    pools = Column(Text, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        UniqueConstraint('chain', 'token_address', name='uix_pool_index_token'),
+    )
+    
+    def __repr__(self):
+        return f"<TokenPoolIndex(chain={self.chain}, token={self.token_address}, main_pool={self.main_pool})>"
+
+
 class DatabaseManager:
     """
     数据库管理器 - 单例模式
@@ -463,6 +568,265 @@ class DatabaseManager:
             return "短期走弱 🔽"
         else:
             return "震荡整理 ↔️"
+    
+    # === 加密货币 K 线仓库 ===
+    
+    KLINE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+    KLINE_BATCH_SIZE = 500
+    
+    def get_latest_kline_time(
+        self,
+        exchange: str,
+        symbol: str,
+        timeframe: str
+    ) -> Optional[datetime]:
+        """
+        获取本地已存最后一根 K 线的开盘时间
+        
+        用于增量同步：交易所只需返回该时间之后的 K 线
+        
+        Returns:
+            最后一根 K 线的开盘时间（UTC），无数据时返回 None
+        """
+        with self.get_session() as session:
+            return session.execute(
+                select(func.max(CryptoKline.timestamp)).where(
+                    and_(
+                        CryptoKline.exchange == exchange,
+                        CryptoKline.symbol == symbol,
+                        CryptoKline.timeframe == timeframe,
+                    )
+                )
+            ).scalar()
+    
+    def get_klines(
+        self,
+        exchange: str,
+        symbol: str,
+        timeframe: str,
+        limit: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        读取本地 K 线
+        
+        Args:
+            exchange: 交易所 ID
+            symbol: 交易对
+            timeframe: 时间周期
+            limit: 只返回最近 N 根（可选）
+            start: 开始时间（含，可选）
+            end: 结束时间（含，可选）
+            
+        Returns:
+            以 timestamp 为索引、包含 open/high/low/close/volume 列的 DataFrame（按时间升序）
+        """
+        conditions = [
+            CryptoKline.exchange == exchange,
+            CryptoKline.symbol == symbol,
+            CryptoKline.timeframe == timeframe,
+        ]
+        if start is not None:
+            conditions.append(CryptoKline.timestamp >= start)
+        if end is not None:
+            conditions.append(CryptoKline.timestamp <= end)
+        
+        query = (
+            select(
+                CryptoKline.timestamp,
+                CryptoKline.open,
+                CryptoKline.high,
+                CryptoKline.low,
+                CryptoKline.close,
+                CryptoKline.volume,
+            )
+            .where(and_(*conditions))
+            .order_by(desc(CryptoKline.timestamp))
+        )
+        if limit:
+            query = query.limit(limit)
+        
+        with self.get_session() as session:
+            rows = session.execute(query).all()
+        
+        df = pd.DataFrame(rows, columns=['timestamp'] + self.KLINE_COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df.set_index('timestamp', inplace=True)
+        df.sort_index(inplace=True)
+        return df
+    
+    def save_klines(
+        self,
+        df: pd.DataFrame,
+        exchange: str,
+        symbol: str,
+        timeframe: str
+    ) -> int:
+        """
+        批量写入 K 线（UPSERT）
+        
+        最后一根 K 线通常尚未收盘，再次同步时会被新数据覆盖
+        
+        Args:
+            df: 以 timestamp 为索引的 OHLCV DataFrame
+            exchange: 交易所 ID
+            symbol: 交易对
+            timeframe: 时间周期
+            
+        Returns:
+            写入的记录数
+        """
+        if df is None or df.empty:
+            return 0
+        
+        now = datetime.now()
+        timestamps = pd.to_datetime(df.index).to_pydatetime()
+        values = df[self.KLINE_COLUMNS].astype(float).to_numpy()
+        records = [
+            {
+                'exchange': exchange,
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'timestamp': ts,
+                'open': row[0],
+                'high': row[1],
+                'low': row[2],
+                'close': row[3],
+                'volume': row[4],
+                'updated_at': now,
+            }
+            for ts, row in zip(timestamps, values.tolist())
+        ]
+        
+        with self.get_session() as session:
+            try:
+                # 分批写入，避免超过 SQLite 单条语句的参数上限
+                for i in range(0, len(records), self.KLINE_BATCH_SIZE):
+                    stmt = sqlite_insert(CryptoKline).values(records[i:i + self.KLINE_BATCH_SIZE])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=['exchange', 'symbol', 'timeframe', 'timestamp'],
+                        set_={
+                            col: stmt.excluded[col]
+                            for col in self.KLINE_COLUMNS + ['updated_at']
+                        },
+                    )
+                    session.execute(stmt)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"保存 K 线失败 {exchange}:{symbol} {timeframe}: {e}")
+                raise
+        
+        logger.debug(f"保存 {exchange}:{symbol} {timeframe} K 线 {len(records)} 条")
+        return len(records)
+    
+    # === 链上代币交易池索引 ===
+    
+    def get_pool_index(self, chain: str, token_address: str) -> Optional[Dict[str, Any]]:
+        """
+        读取代币的交易池索引
+        
+        Returns:
+            {'main_pool': str, 'pools': List[Dict], 'updated_at': datetime}，无记录时返回 None
+        """
+        with self.get_session() as session:
+            row = session.execute(
+                select(TokenPoolIndex.main_pool, TokenPoolIndex.pools, TokenPoolIndex.updated_at).where(
+                    and_(
+                        TokenPoolIndex.chain == chain,
+                        TokenPoolIndex.token_address == token_address,
+                    )
+                )
+            ).first()
+        if row is None:
+            return None
+        return {'main_pool': row[0], 'pools': json.loads(row[1]), 'updated_at': row[2]}
+    
+    def save_pool_index(self, chain: str, token_address: str, pools: List[Dict[str, Any]]) -> None:
+        """
+        写入代币的交易池索引（UPSERT）
+        
+        Args:
+            chain: 链
+            token_address: 代币地址
+            pools: 交易池列表（按流动性降序，第一个为主交易池）
+        """
+        with self.get_session() as session:
+            try:
+                stmt = sqlite_insert(TokenPoolIndex).values(
+                    chain=chain,
+                    token_address=token_address,
+                    main_pool=pools[0]['address'] if pools else None,
+                    pools=json.dumps(pools, ensure_ascii=False),
+                    updated_at=datetime.now(),
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['chain', 'token_address'],
+                    set_={col: stmt.excluded[col] for col in ['main_pool', 'pools', 'updated_at']},
+                )
+                session.execute(stmt)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"保存交易池索引失败 {chain}:{token_address}: {e}")
+                raise
+    
+    # === HTTP 响应缓存 ===
+    
+    def get_cached_response(self, cache_key: str) -> Optional[tuple]:
+        """
+        读取缓存的响应
+        
+        Returns:
+            (JSON 字符串, 过期时间)，不存在时返回 None
+        """
+        with self.get_session() as session:
+            row = session.execute(
+                select(HttpCacheEntry.value, HttpCacheEntry.expires_at).where(
+                    HttpCacheEntry.cache_key == cache_key
+                )
+            ).first()
+        return (row[0], row[1]) if row else None
+    
+    def save_cached_response(
+        self,
+        cache_key: str,
+        endpoint: str,
+        value: str,
+        expires_at: datetime
+    ) -> None:
+        """写入缓存的响应（UPSERT）"""
+        with self.get_session() as session:
+            try:
+                stmt = sqlite_insert(HttpCacheEntry).values(
+                    cache_key=cache_key,
+                    endpoint=endpoint[:255],
+                    value=value,
+                    expires_at=expires_at,
+                    updated_at=datetime.now(),
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['cache_key'],
+                    set_={col: stmt.excluded[col] for col in ['endpoint', 'value', 'expires_at', 'updated_at']},
+                )
+                session.execute(stmt)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"保存响应缓存失败 {endpoint}: {e}")
+                raise
+    
+    def purge_expired_responses(self) -> int:
+        """删除已过期的响应缓存，返回删除条数"""
+        with self.get_session() as session:
+            deleted = session.query(HttpCacheEntry).filter(
+                HttpCacheEntry.expires_at <= datetime.now()
+            ).delete(synchronize_session=False)
+            session.commit()
+        if deleted:
+            logger.debug(f"清理过期响应缓存 {deleted} 条")
+        return deleted
 
 
 # 便捷函数